@@ -0,0 +1,130 @@
+"""
+Diff Engine Benchmark
+=====================
+
+Head-to-head timing of the line diff algorithms on synthetic inputs.
+
+Usage:
+    python benchmarks/bench_diff_engines.py [--lines N] [--edits N] [--repeat N]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.myers_algorithm import MyersDiff
+from core.patience_algorithm import PatienceDiff
+from core.histogram_algorithm import HistogramDiff
+
+
+ENGINES: Dict[str, Callable[[List[str], List[str]], MyersDiff]] = {
+    'myers-greedy': lambda a, b: MyersDiff(a, b, algorithm='greedy'),
+    'myers-linear': lambda a, b: MyersDiff(a, b, algorithm='linear'),
+    'myers-bitparallel': lambda a, b: MyersDiff(a, b, algorithm='bitparallel'),
+    'patience': lambda a, b: PatienceDiff(a, b),
+    'histogram': lambda a, b: HistogramDiff(a, b),
+}
+
+
+def sql_migration(rng: random.Random, lines: int) -> List[str]:
+    """Generate a generated-SQL-style file made of heavily repeated statements."""
+    out: List[str] = []
+    table = 0
+    while len(out) < lines:
+        table += 1
+        out.append(f"CREATE TABLE t_{table} (")
+        for column in range(rng.randint(3, 12)):
+            out.append(f"    c_{column} INTEGER NOT NULL,")
+        out.append("    PRIMARY KEY (id)")
+        out.append(");")
+        out.append("")
+        for _ in range(rng.randint(0, 4)):
+            out.append(f"INSERT INTO t_{table} VALUES (DEFAULT);")
+        out.append("")
+    return out[:lines]
+
+
+def boilerplate(rng: random.Random, lines: int) -> List[str]:
+    """Generate a file drawn from a few dozen repeated boilerplate lines."""
+    vocabulary = [f"ALTER TABLE audit ADD COLUMN col_{i % 8} TEXT;" for i in range(40)]
+    vocabulary += [f"GRANT SELECT ON audit TO role_{i};" for i in range(12)]
+    return [rng.choice(vocabulary) for _ in range(lines)]
+
+
+def source_code(rng: random.Random, lines: int) -> List[str]:
+    """Generate a C-like source file with lots of braces and blank lines."""
+    out: List[str] = []
+    func = 0
+    while len(out) < lines:
+        func += 1
+        out.append(f"int func_{func}(int x) {{")
+        for stmt in range(rng.randint(2, 10)):
+            out.append(f"    x += {rng.randint(0, 9)};")
+        out.append("    return x;")
+        out.append("}")
+        out.append("")
+    return out[:lines]
+
+
+def mutate(rng: random.Random, lines: List[str], edits: int) -> List[str]:
+    """Apply random line edits, block insertions and block deletions."""
+    out = list(lines)
+    for _ in range(edits):
+        pos = rng.randrange(max(len(out), 1))
+        op = rng.random()
+        if op < 0.4:
+            out[pos:pos + 1] = [out[pos] + " -- changed"] if out else []
+        elif op < 0.7:
+            block = out[pos:pos + rng.randint(1, 20)]
+            out[pos:pos] = block
+        else:
+            del out[pos:pos + rng.randint(1, 20)]
+    return out
+
+
+def time_engine(factory: Callable[[List[str], List[str]], MyersDiff],
+                a: List[str], b: List[str], repeat: int) -> Tuple[float, int]:
+    """Return the best wall time of `repeat` runs and the number of results."""
+    best = float('inf')
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = factory(a, b).compute()
+        best = min(best, time.perf_counter() - start)
+        count = len(results)
+    return best, count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the line diff engines')
+    parser.add_argument('--lines', type=int, default=20000, help='Lines per input file')
+    parser.add_argument('--edits', type=int, default=200, help='Random edits applied to the copy')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per engine (best is reported)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    workloads = {
+        'sql-migration': sql_migration(rng, args.lines),
+        'boilerplate': boilerplate(rng, args.lines),
+        'source-code': source_code(rng, args.lines),
+    }
+    
+    print(f"{'workload':<16}{'engine':<20}{'seconds':>10}{'results':>10}")
+    for name, a in workloads.items():
+        b = mutate(rng, a, args.edits)
+        for engine, factory in ENGINES.items():
+            seconds, count = time_engine(factory, a, b, args.repeat)
+            print(f"{name:<16}{engine:<20}{seconds:>10.3f}{count:>10}")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,10 +8,13 @@ Handles application configuration, settings, and user preferences.
 import os
 import yaml
 import json
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 from pathlib import Path
 from dataclasses import dataclass, asdict, field
 
+if TYPE_CHECKING:
+    from core.diff_cache import DiffCache
+
 
 @dataclass
 class AppConfig:
@@ -72,6 +75,8 @@ class AppConfig:
     # Performance
     large_file_threshold: int = 100 * 1024 * 1024  # 100 MB
     chunk_size: int = 10 * 1024 * 1024  # 10 MB
+    diff_cache_enabled: bool = True
+    diff_cache_max_mb: int = 64
 
 
 class ConfigManager:
@@ -95,6 +100,7 @@ class ConfigManager:
         self.config_file = self.config_dir / 'config.yaml'
         self.sessions_dir = self.config_dir / 'sessions'
         self.sessions_dir.mkdir(exist_ok=True)
+        self.cache_dir = self.config_dir / 'diff_cache'
         
         self.config = AppConfig()
         self.load_config()
@@ -225,6 +231,18 @@ class ConfigManager:
         """
         return [f.stem for f in self.sessions_dir.glob('*.json')]
     
+    def get_diff_cache(self) -> Optional['DiffCache']:
+        """
+        Get the on-disk cache of diff results.
+        
+        Returns:
+            DiffCache instance, or None if the cache is disabled
+        """
+        if not self.config.diff_cache_enabled:
+            return None
+        from core.diff_cache import DiffCache
+        return DiffCache(self.cache_dir, self.config.diff_cache_max_mb * 1024 * 1024)
+    
     def reset_to_defaults(self) -> None:
         """Reset configuration to defaults."""
         self.config = AppConfig()
@@ -0,0 +1,157 @@
+"""
+Async Runner - Executors Behind the asyncio APIs
+================================================
+
+This module lets asyncio applications (e.g. a web service) run
+comparisons without blocking their event loop:
+- File reading and hashing run in a bounded thread pool
+- Line diffs, which are CPU-bound, run in a process pool
+
+Every comparison waits for a slot before its diff is handed to the
+process pool, so a burst of requests queues up in the event loop instead
+of piling pickled inputs into the pool (backpressure).
+
+Cancelling the awaiting task cancels the operation's CancellationToken,
+which stops file reads and directory scans at their next check. A diff
+still waiting for the process pool is withdrawn; one already running in a
+worker process cannot be interrupted and its result is discarded, but it
+honours the token's deadline.
+
+One runner is normally shared by all requests of a process (see
+get_async_runner()).
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from core.cancellation import CancellationToken
+
+
+T = TypeVar('T')
+
+
+class AsyncRunner:
+    """
+    Thread and process pools with bounded concurrency.
+    """
+
+    # Diffs admitted to the process pool per worker process; more wait in
+    # the event loop
+    PENDING_PER_WORKER = 2
+
+    def __init__(self, io_workers: Optional[int] = None, cpu_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        """
+        Initialize the runner. Worker processes are started on first use.
+
+        Args:
+            io_workers: Threads for file reading and hashing (default
+                min(32, os.cpu_count() + 4))
+            cpu_workers: Worker processes for diffs (default os.cpu_count())
+            max_pending: Diffs admitted to the process pool at a time
+                (default PENDING_PER_WORKER per worker process)
+        """
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.cpu_workers * self.PENDING_PER_WORKER
+        self.io_executor = ThreadPoolExecutor(io_workers, thread_name_prefix='diff-io')
+        self._cpu_executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # asyncio primitives belong to one event loop, so every loop using
+        # the runner gets its own semaphore
+        self._slots: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = \
+            weakref.WeakKeyDictionary()
+
+    @property
+    def cpu_executor(self) -> ProcessPoolExecutor:
+        """Process pool for diffs, started on first use."""
+        with self._lock:
+            if self._cpu_executor is None:
+                self._cpu_executor = ProcessPoolExecutor(self.cpu_workers)
+            return self._cpu_executor
+
+    async def run_io(self, func: Callable[..., T], *args: Any,
+                     token: Optional[CancellationToken] = None) -> T:
+        """
+        Run a blocking I/O call in the thread pool.
+
+        Args:
+            func: Function to call
+            *args: Arguments of the call
+            token: Cancellation token of the operation, cancelled if the
+                awaiting task is cancelled
+
+        Returns:
+            Return value of the call
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.io_executor, functools.partial(func, *args))
+        except asyncio.CancelledError:
+            if token is not None:
+                token.cancel()
+            raise
+
+    async def run_cpu(self, func: Callable[..., T], *args: Any,
+                      token: Optional[CancellationToken] = None) -> T:
+        """
+        Run a CPU-bound call in the process pool, once a slot is free.
+
+        Args:
+            func: Picklable module-level function to call
+            *args: Picklable arguments of the call
+            token: Cancellation token of the operation, cancelled if the
+                awaiting task is cancelled
+
+        Returns:
+            Return value of the call
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_pending)
+        try:
+            async with slots:
+                if token is not None:
+                    token.check()
+                return await loop.run_in_executor(self.cpu_executor,
+                                                  functools.partial(func, *args))
+        except asyncio.CancelledError:
+            if token is not None:
+                token.cancel()
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the thread and process pools.
+
+        Args:
+            wait: Whether to wait for running calls to finish
+        """
+        self.io_executor.shutdown(wait=wait)
+        with self._lock:
+            if self._cpu_executor is not None:
+                self._cpu_executor.shutdown(wait=wait)
+                self._cpu_executor = None
+
+
+_default_runner: Optional[AsyncRunner] = None
+_default_lock = threading.Lock()
+
+
+def get_async_runner() -> AsyncRunner:
+    """
+    Get the runner shared by the async APIs of a process.
+
+    Returns:
+        AsyncRunner instance, created on first use
+    """
+    global _default_runner
+    with _default_lock:
+        if _default_runner is None:
+            _default_runner = AsyncRunner()
+        return _default_runner
@@ -0,0 +1,223 @@
+"""
+Base Index - Reusable Index of a Shared Base File
+=================================================
+
+This module supports comparing one base file (e.g. a golden config)
+against many variants of it. Everything that only depends on the base is
+computed once and kept in a BaseIndex:
+
+- the comparison keys of the base lines (see core.line_normalizer) and
+  the map from keys back to original lines
+- an interned integer ID per distinct key
+- the position of every key that occurs exactly once in the base
+
+Comparing a variant then only normalizes and encodes the variant. Base
+lines that are unique in the base and in the variant, in the same order,
+anchor the alignment (as in patience diff), and only the gaps between
+anchors are diffed.
+
+ManyResult aggregates the comparisons of all variants: for every base
+line, the number of variants in which it was changed or removed, which
+answers "which lines differ in k of N variants".
+"""
+
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.line_normalizer import LineNormalizer
+from core.myers_algorithm import DiffResult, DiffType
+from core.patience_algorithm import longest_chain
+
+
+class BaseIndex:
+    """
+    Normalized, interned and anchored form of a base file.
+    """
+
+    def __init__(self, lines: Sequence[str], options: Optional[Dict[str, Any]] = None,
+                 content_key: Optional[str] = None):
+        """
+        Build the index.
+
+        Args:
+            lines: Lines of the base file
+            options: Comparison options (see DiffEngine); variants must be
+                compared with the same options
+            content_key: Optional hash of the base content (see
+                FileInfo.content_key), used to cache comment stripping
+        """
+        self.lines = lines
+        self.options = dict(options or {})
+        self.normalizer = LineNormalizer(self.options)
+        keys, self.index = self.normalizer.normalize(lines, content_key)
+
+        # Interned key IDs, in base order
+        self.table: Dict[str, int] = {}
+        table = self.table
+        self.ids = array('i', [table.setdefault(key, len(table)) for key in keys])
+
+        # Key ID -> base position, for keys that occur exactly once
+        positions: Dict[int, int] = {}
+        for x, key_id in enumerate(self.ids):
+            positions[key_id] = -1 if key_id in positions else x
+        self.unique = {key_id: x for key_id, x in positions.items() if x >= 0}
+
+    def __len__(self) -> int:
+        """Number of base lines."""
+        return len(self.lines)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the index without its compiled normalizer."""
+        state = self.__dict__.copy()
+        del state['normalizer']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled index, recompiling its normalizer."""
+        self.__dict__.update(state)
+        self.normalizer = LineNormalizer(self.options)
+
+    def encode(self, lines: Sequence[str],
+               content_key: Optional[str] = None) -> Tuple[array, Optional[array]]:
+        """
+        Normalize and encode the lines of a variant.
+
+        Args:
+            lines: Lines of the variant
+            content_key: Optional hash of the variant content
+
+        Returns:
+            Tuple of (key IDs, index) where keys that do not occur in the
+            base get -1, and index maps keys to lines as in
+            LineNormalizer.normalize()
+        """
+        keys, index = self.normalizer.normalize(lines, content_key)
+        get = self.table.get
+        return array('i', [get(key, -1) for key in keys]), index
+
+    def anchors(self, ids: Sequence[int]) -> List[Tuple[int, int]]:
+        """
+        Find the lines that anchor a variant to the base.
+
+        Args:
+            ids: Encoded variant (see encode())
+
+        Returns:
+            (base position, variant position) of keys that are unique in
+            both, reduced to the longest chain in the same order
+        """
+        unique = self.unique
+        seen: Dict[int, int] = {}
+        for y, key_id in enumerate(ids):
+            if key_id in unique:
+                seen[key_id] = -1 if key_id in seen else y
+
+        # Candidates in variant order; variants of a common base usually
+        # keep its order, and then all of them form the chain
+        candidates = [(unique[key_id], y) for key_id, y in seen.items() if y >= 0]
+        if all(a[0] < b[0] for a, b in zip(candidates, candidates[1:])):
+            return candidates
+        candidates.sort()
+        return longest_chain(candidates)
+
+
+class ManyResult:
+    """
+    Comparisons of one base against many variants.
+
+    Attributes:
+        results: Diff results of every variant, in input order
+        changed: For every base line, the number of variants in which it was
+            changed or removed
+        inserted: For every gap before base line i (and after the last line
+            at index len(base)), the number of variants inserting lines there
+    """
+
+    def __init__(self, base_lines: int, results: List[List[DiffResult]]):
+        """
+        Aggregate the results of all variants.
+
+        Args:
+            base_lines: Number of base lines
+            results: Diff results of every variant
+        """
+        self.results = results
+        self.changed = array('l', bytes(8 * base_lines))
+        self.inserted = array('l', bytes(8 * (base_lines + 1)))
+        for variant in results:
+            for result in variant:
+                if result.type == DiffType.EQUAL:
+                    continue
+                if result.old_count:
+                    for line in range(result.old_start, result.old_start + result.old_count):
+                        self.changed[line] += 1
+                else:
+                    self.inserted[result.old_start] += 1
+
+    def __len__(self) -> int:
+        """Number of variants."""
+        return len(self.results)
+
+    def lines_differing_in(self, k: int) -> List[int]:
+        """
+        Get the base lines changed or removed in exactly k variants.
+
+        Args:
+            k: Number of variants
+
+        Returns:
+            0-based base line numbers
+        """
+        return [line for line, count in enumerate(self.changed) if count == k]
+
+    def drift_summary(self) -> Dict[int, List[int]]:
+        """
+        Group the base lines by the number of variants that change them.
+
+        Returns:
+            Dictionary mapping k (1 to N) to the base lines changed or removed
+            in exactly k variants
+        """
+        summary: Dict[int, List[int]] = {}
+        for line, count in enumerate(self.changed):
+            if count:
+                summary.setdefault(count, []).append(line)
+        return dict(sorted(summary.items()))
+
+    def format_summary(self) -> str:
+        """
+        Format the drift summary as text.
+
+        Returns:
+            One "differs in k of N variants" line per k, most common first
+        """
+        total = len(self.results)
+        lines = [f"{len(base_lines)} base line(s) differ in {k} of {total} variants"
+                 for k, base_lines in sorted(self.drift_summary().items(), reverse=True)]
+        return "\n".join(lines) if lines else f"No differences in {total} variants"
+
+
+def anchor_gaps(anchors: Sequence[Tuple[int, int]], n: int,
+                m: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Find the unaligned regions between anchors.
+
+    Args:
+        anchors: (x, y) anchor positions in increasing order
+        n: Number of base keys
+        m: Number of variant keys
+
+    Returns:
+        (x_lo, x_hi, y_lo, y_hi) of every non-empty gap between anchors (and
+        before the first and after the last one), in order; everything
+        outside the gaps matches
+    """
+    gaps = []
+    x_lo = y_lo = 0
+    for x, y in anchors:
+        if x != x_lo or y != y_lo:
+            gaps.append((x_lo, x, y_lo, y))
+        x_lo, y_lo = x + 1, y + 1
+    if x_lo != n or y_lo != m:
+        gaps.append((x_lo, n, y_lo, m))
+    return gaps
@@ -0,0 +1,84 @@
+"""
+Cancellation - Time Budgets and Cooperative Cancellation
+========================================================
+
+This module provides the token that long-running operations poll to find
+out whether they should stop:
+- Explicit cancellation from another thread (e.g. a GUI "Stop" button)
+- A deadline (time budget) after which work should wrap up
+
+What happens on expiry depends on the operation. The line diff engines
+finish with a cheaper, non-minimal edit script, while file reading and
+directory comparison raise OperationCancelled. Explicit cancellation
+always raises.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class OperationCancelled(Exception):
+    """Raised when an operation is cancelled or runs out of time."""
+
+
+class CancellationToken:
+    """
+    Cancellation flag with an optional deadline.
+
+    The token is thread-safe: cancel() may be called from any thread while
+    a worker polls check(). Deadlines use time.monotonic().
+    """
+
+    def __init__(self, timeout: Optional[float] = None,
+                 deadline: Optional[float] = None):
+        """
+        Initialize the token.
+
+        Args:
+            timeout: Time budget in seconds from now (None for no limit)
+            deadline: Absolute time.monotonic() deadline; the earlier of
+                deadline and timeout applies
+        """
+        if timeout is not None:
+            expires = time.monotonic() + timeout
+            deadline = expires if deadline is None else min(deadline, expires)
+        self.deadline = deadline
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() has been called."""
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """
+        Get the time left before the deadline.
+
+        Returns:
+            Seconds left (never negative), or None if there is no deadline
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self) -> None:
+        """
+        Raise if the operation should stop.
+
+        Raises:
+            OperationCancelled: If the token was cancelled or has expired
+        """
+        if self._cancelled.is_set():
+            raise OperationCancelled("Operation cancelled")
+        if self.expired:
+            raise OperationCancelled("Operation timed out")
@@ -0,0 +1,327 @@
+"""
+Comment Stripper - Language-Aware Comment Removal
+=================================================
+
+This module removes comments from source files for ignore_comments
+comparisons. Unlike per-line regexes it follows the lexical state of the
+file, so:
+
+- block comments spanning several lines are removed completely
+- comment markers inside string literals are left alone
+- markers that only look like comments in another language (e.g. C's
+  #include) are not touched
+
+Every language is described by a CommentSyntax. All of its opening tokens
+are joined into one regex, and the file is scanned once from left to
+right as a single text, jumping from one token to the next. Block comments
+and multi-line strings simply extend over line breaks, and a whole file is
+processed in linear time.
+
+Languages are detected from file names with the Pygments-based detection
+in utils.syntax_highlighter. Stripped files are cached by content hash.
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class CommentSyntax:
+    """
+    Comment and string syntax of a language.
+
+    Attributes:
+        line: Tokens that start a comment running to end of line
+        block: (open, close) delimiters of block comments
+        strings: Delimiters of single-line strings (closed by the same text)
+        multiline_strings: Delimiters of strings that may span lines
+        escapes: Whether a backslash escapes the next character in strings
+        nested: Whether block comments nest
+        word_start: Whether line comment tokens only count at the start of a
+            word (shell-style '#', which also appears in $# or ${#var})
+    """
+    line: Tuple[str, ...] = ()
+    block: Tuple[Tuple[str, str], ...] = ()
+    strings: Tuple[str, ...] = ()
+    multiline_strings: Tuple[str, ...] = ()
+    escapes: bool = True
+    nested: bool = False
+    word_start: bool = False
+
+
+_C_LIKE = CommentSyntax(line=('//',), block=(('/*', '*/'),), strings=('"', "'"))
+
+# Comment syntax by language ID
+COMMENT_SYNTAX: Dict[str, CommentSyntax] = {
+    'c': _C_LIKE,
+    'cpp': _C_LIKE,
+    'csharp': _C_LIKE,
+    'java': _C_LIKE,
+    'javascript': CommentSyntax(line=('//',), block=(('/*', '*/'),),
+                                strings=('"', "'"), multiline_strings=('`',)),
+    'typescript': CommentSyntax(line=('//',), block=(('/*', '*/'),),
+                                strings=('"', "'"), multiline_strings=('`',)),
+    'go': CommentSyntax(line=('//',), block=(('/*', '*/'),),
+                        strings=('"', "'"), multiline_strings=('`',)),
+    'rust': CommentSyntax(line=('//',), block=(('/*', '*/'),),
+                          strings=('"',), nested=True),
+    'kotlin': CommentSyntax(line=('//',), block=(('/*', '*/'),), strings=('"', "'"),
+                            multiline_strings=('"""',), nested=True),
+    'swift': CommentSyntax(line=('//',), block=(('/*', '*/'),), strings=('"',),
+                           multiline_strings=('"""',), nested=True),
+    'scala': CommentSyntax(line=('//',), block=(('/*', '*/'),), strings=('"', "'"),
+                           multiline_strings=('"""',), nested=True),
+    'php': CommentSyntax(line=('//', '#'), block=(('/*', '*/'),), strings=('"', "'")),
+    'css': CommentSyntax(block=(('/*', '*/'),), strings=('"', "'")),
+    'scss': _C_LIKE,
+    'python': CommentSyntax(line=('#',), strings=('"', "'"),
+                            multiline_strings=('"""', "'''")),
+    'ruby': CommentSyntax(line=('#',), strings=('"', "'")),
+    'shell': CommentSyntax(line=('#',), strings=('"', "'"), word_start=True),
+    'powershell': CommentSyntax(line=('#',), block=(('<#', '#>'),),
+                                strings=('"', "'"), word_start=True),
+    'yaml': CommentSyntax(line=('#',), strings=('"', "'"), word_start=True),
+    'toml': CommentSyntax(line=('#',), strings=('"', "'"),
+                          multiline_strings=('"""', "'''")),
+    'sql': CommentSyntax(line=('--',), block=(('/*', '*/'),), strings=("'", '"'),
+                         escapes=False),
+    'lua': CommentSyntax(line=('--',), block=(('--[[', ']]'),),
+                         strings=('"', "'")),
+    'html': CommentSyntax(block=(('<!--', '-->'),)),
+    'xml': CommentSyntax(block=(('<!--', '-->'),)),
+}
+
+# Other names of the languages above (Pygments lexer names, lowercased)
+LANGUAGE_ALIASES = {
+    'c++': 'cpp',
+    'c#': 'csharp',
+    'objective-c': 'c',
+    'jsx': 'javascript',
+    'tsx': 'typescript',
+    'bash': 'shell',
+    'sh': 'shell',
+    'transact-sql': 'sql',
+    'mysql': 'sql',
+    'postgresql sql dialect': 'sql',
+}
+
+
+class CommentStripper:
+    """
+    Single-pass comment remover for one language.
+    """
+
+    # Number of stripped files kept by strip_cached()
+    CACHE_SIZE = 32
+
+    # Shared by all strippers: (language, content key) -> stripped lines
+    _cache: 'OrderedDict[Tuple[str, str], List[str]]' = OrderedDict()
+
+    def __init__(self, language: str):
+        """
+        Compile the scanner for a language.
+
+        Args:
+            language: Language ID or alias (see COMMENT_SYNTAX)
+
+        Raises:
+            ValueError: If the language is not supported
+        """
+        resolved = resolve_language(language)
+        if resolved is None:
+            raise ValueError(f"No comment syntax for language: {language}")
+        self.language: str = resolved
+        self.syntax = syntax = COMMENT_SYNTAX[resolved]
+
+        # Every token that opens a comment or string, by its text
+        self._tokens: Dict[str, Tuple[str, str]] = {}
+        for delimiter in syntax.strings:
+            self._tokens[delimiter] = ('string', delimiter)
+        for delimiter in syntax.multiline_strings:
+            self._tokens[delimiter] = ('string', delimiter)
+        for opener, closer in syntax.block:
+            self._tokens[opener] = ('block', closer)
+        for token in syntax.line:
+            self._tokens[token] = ('line', '')
+
+        # A plain alternation keeps the regex engine's fast literal scan;
+        # longer tokens go first so that e.g. ''' wins over '
+        alternatives = []
+        for token in sorted(self._tokens, key=len, reverse=True):
+            pattern = re.escape(token)
+            if syntax.word_start and self._tokens[token][0] == 'line':
+                pattern = r'(?<![^\s;&|()])' + pattern
+            alternatives.append(pattern)
+        self._opener = re.compile('|'.join(alternatives))
+
+        # Rest of a string literal up to and including its closing delimiter
+        # (single-line strings also end at the end of their line). An escape
+        # may be a backslash before a line break, which continues the
+        # string, or a lone backslash at the end of the text
+        self._string_ends: Dict[str, 're.Pattern[str]'] = {}
+        for delimiter in syntax.strings:
+            body = r'(?:\\(?:.|\n)?|[^\\\n])*?' if syntax.escapes else r'[^\n]*?'
+            self._string_ends[delimiter] = re.compile(
+                f'{body}(?:{re.escape(delimiter)}|(?=\n)|\\Z)')
+        for delimiter in syntax.multiline_strings:
+            body = r'(?:\\.?|[^\\])*?' if syntax.escapes else r'.*?'
+            self._string_ends[delimiter] = re.compile(
+                f'{body}(?:{re.escape(delimiter)}|\\Z)', re.DOTALL)
+        self._block_ends: Dict[str, 're.Pattern[str]'] = {}
+        for opener, closer in syntax.block:
+            self._block_ends[closer] = re.compile(
+                f'(?P<open>{re.escape(opener)})|(?P<close>{re.escape(closer)})')
+
+    def strip_lines(self, lines: Sequence[str]) -> List[str]:
+        """
+        Remove comments from a file.
+
+        The lines are scanned as one text, so the work done in Python is
+        proportional to the number of comments and strings, not of lines.
+
+        Args:
+            lines: Lines of the file, in order (a line break inside a line
+                ends its line comments)
+
+        Returns:
+            One line per input line, without its comment text
+        """
+        if not lines:
+            return []
+        text = '\n'.join(lines)
+        length = len(text)
+        tokens = self._tokens
+        search = self._opener.search
+
+        pieces = []
+        # Start of the text not yet copied to pieces
+        keep = 0
+        match = search(text)
+        while match is not None:
+            kind, closer = tokens[match.group()]
+            start, pos = match.start(), match.end()
+
+            if kind == 'string':
+                # Strings are kept, including any comment markers in them
+                end = self._string_ends[closer].match(text, pos)
+                pos = end.end() if end is not None else length
+                match = search(text, pos)
+                continue
+
+            if kind == 'line':
+                pos = text.find('\n', pos)
+                if pos < 0:
+                    pos = length
+            else:
+                pos = self._block_end(text, pos, closer)
+
+            # Drop the comment but keep the line breaks inside it
+            pieces.append(text[keep:start])
+            pieces.append('\n' * text.count('\n', start, pos))
+            keep = pos
+            match = search(text, pos)
+
+        if not keep:
+            return list(lines)
+        pieces.append(text[keep:])
+        stripped = ''.join(pieces).split('\n')
+        if len(stripped) == len(lines):
+            return stripped
+
+        # Every line break is kept, so lines that contain line breaks get
+        # their pieces back
+        result = []
+        k = 0
+        for line in lines:
+            count = line.count('\n') + 1
+            result.append('\n'.join(stripped[k:k + count]))
+            k += count
+        return result
+
+    def _block_end(self, text: str, pos: int, closer: str) -> int:
+        """
+        Find the end of a block comment.
+
+        Args:
+            text: Scanned text
+            pos: Position right after the comment's opening delimiter
+            closer: Closing delimiter
+
+        Returns:
+            Position right after the comment (end of text if unterminated)
+        """
+        if not self.syntax.nested:
+            end = text.find(closer, pos)
+            return len(text) if end < 0 else end + len(closer)
+
+        depth = 1
+        search = self._block_ends[closer].search
+        while depth:
+            match = search(text, pos)
+            if match is None:
+                return len(text)
+            depth += 1 if match.lastgroup == 'open' else -1
+            pos = match.end()
+        return pos
+
+    def strip_cached(self, lines: Sequence[str], content_key: Optional[str]) -> List[str]:
+        """
+        Remove comments from a file, reusing earlier results for its content.
+
+        Args:
+            lines: Lines of the file, in order
+            content_key: Hash identifying the content (see FileInfo.content_key),
+                or None to skip the cache
+
+        Returns:
+            One line per input line, without its comment text
+        """
+        if not content_key:
+            return self.strip_lines(lines)
+
+        cache = CommentStripper._cache
+        key = (self.language, content_key)
+        stripped = cache.get(key)
+        if stripped is None or len(stripped) != len(lines):
+            stripped = self.strip_lines(lines)
+            cache[key] = stripped
+            while len(cache) > self.CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return stripped
+
+
+def resolve_language(language: Optional[str]) -> Optional[str]:
+    """
+    Map a language name to its COMMENT_SYNTAX ID.
+
+    Args:
+        language: Language ID, alias or Pygments lexer name
+
+    Returns:
+        Language ID, or None if the language is not supported
+    """
+    if not language:
+        return None
+    language = language.lower()
+    language = LANGUAGE_ALIASES.get(language, language)
+    return language if language in COMMENT_SYNTAX else None
+
+
+def detect_language(filename: str) -> Optional[str]:
+    """
+    Detect the comment syntax of a file from its name.
+
+    Args:
+        filename: File name or path
+
+    Returns:
+        Language ID, or None if unknown or unsupported
+    """
+    from utils.syntax_highlighter import PYGMENTS_AVAILABLE, SyntaxHighlighter
+    if not PYGMENTS_AVAILABLE:
+        return None
+    return resolve_language(SyntaxHighlighter().detect_language(filename))
@@ -0,0 +1,236 @@
+"""
+Diff Cache - Content-Addressed On-Disk Cache of Diff Results
+============================================================
+
+This module stores line diff edit scripts on disk, keyed by:
+- The content hashes of both inputs
+- The comparison options that affect the result
+- The diff engine version
+
+Entries are small binary files named after their key. Every run is stored
+as (type, lines in A, lines in B); start positions are implied by the
+preceding runs, so the edit script is stored without any redundant
+coordinates and then zlib-compressed. The cache is bounded in size and
+evicts the least recently used entries first (file modification times are
+refreshed on every hit).
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from core.myers_algorithm import OPCODE_SIZE
+
+
+class DiffCache:
+    """
+    Size-bounded LRU cache of packed edit scripts.
+
+    Safe to share between processes: entries are written atomically, and
+    entries that vanish or fail to decode are treated as misses.
+    """
+
+    # Default size limit (64 MB)
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    # Entry header: magic, format version, number of runs
+    MAGIC = b'EXDC'
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct('<4sHI')
+
+    # File name suffix of cache entries
+    SUFFIX = '.bin'
+
+    def __init__(self, cache_dir: Union[str, Path],
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache entries (created if needed)
+            max_bytes: Total size above which old entries are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # Total size of the entries, measured lazily on the first put()
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def make_key(hash_a: str, hash_b: str, options: Dict[str, Any],
+                 engine_version: int) -> str:
+        """
+        Build the cache key of a comparison.
+
+        Args:
+            hash_a: Content hash of the first input
+            hash_b: Content hash of the second input
+            options: Normalized options that affect the result
+            engine_version: Version of the diff engine
+
+        Returns:
+            Hex digest identifying the comparison
+        """
+        material = json.dumps([hash_a, hash_b, options, engine_version],
+                              sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[array]:
+        """
+        Look up an edit script.
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            Packed opcodes, or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            data = path.read_bytes()
+            ops = self._decode(data)
+        except (OSError, ValueError, zlib.error, struct.error):
+            return None
+
+        try:
+            # Refresh the entry's position in the LRU order
+            os.utime(path)
+        except OSError:
+            pass
+        return ops
+
+    def put(self, key: str, ops: array) -> None:
+        """
+        Store an edit script, evicting old entries if the cache is full.
+
+        Args:
+            key: Cache key from make_key()
+            ops: Packed opcodes
+        """
+        data = self._encode(ops)
+        path = self._entry_path(key)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        if self._size is None:
+            self._size = self._measure()
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        for path in self.cache_dir.glob('*' + self.SUFFIX):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        self._size = 0
+
+    def _entry_path(self, key: str) -> Path:
+        """Get the file path of an entry."""
+        return self.cache_dir / (key + self.SUFFIX)
+
+    def _measure(self) -> int:
+        """Get the total size of all entries on disk."""
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self.SUFFIX):
+                try:
+                    total += entry.stat().st_size
+                except OSError:
+                    pass
+        return total
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self.SUFFIX):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+    def _encode(self, ops: array) -> bytes:
+        """
+        Serialize packed opcodes.
+
+        Args:
+            ops: Packed opcodes
+
+        Returns:
+            Entry bytes
+        """
+        runs = len(ops) // OPCODE_SIZE
+        compact = array('q')
+        for i in range(0, len(ops), OPCODE_SIZE):
+            compact.extend((ops[i], ops[i + 2] - ops[i + 1], ops[i + 4] - ops[i + 3]))
+        if sys.byteorder != 'little':
+            compact.byteswap()
+        return (self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION, runs) +
+                zlib.compress(compact.tobytes()))
+
+    def _decode(self, data: bytes) -> array:
+        """
+        Deserialize packed opcodes.
+
+        Args:
+            data: Entry bytes
+
+        Returns:
+            Packed opcodes
+
+        Raises:
+            ValueError: If the entry is not a valid cache entry
+        """
+        magic, version, runs = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC or version != self.FORMAT_VERSION:
+            raise ValueError("Not a diff cache entry")
+
+        compact = array('q')
+        compact.frombytes(zlib.decompress(data[self.HEADER.size:]))
+        if sys.byteorder != 'little':
+            compact.byteswap()
+        if len(compact) != runs * 3:
+            raise ValueError("Truncated diff cache entry")
+
+        ops = array('l')
+        x = y = 0
+        for i in range(0, len(compact), 3):
+            tag, count_a, count_b = compact[i], compact[i + 1], compact[i + 2]
+            ops.extend((tag, x, x + count_a, y, y + count_b))
+            x += count_a
+            y += count_b
+        return ops
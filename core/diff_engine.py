@@ -7,13 +7,28 @@ additional diff functionality including three-way diffs, word-level diffs,
 and character-level diffs.
 """
 
-from typing import List, Tuple, Optional, Dict, Any, Callable
+from typing import List, Tuple, Optional, Dict, Any, Callable, Hashable, Sequence, Type
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from array import array
+from bisect import bisect_left
 from enum import Enum
-import difflib
-import re
+import asyncio
+import os
 
-from core.myers_algorithm import MyersDiff, DiffResult, DiffType
+from core.async_runner import AsyncRunner, get_async_runner
+from core.base_index import BaseIndex, ManyResult, anchor_gaps
+from core.cancellation import CancellationToken, OperationCancelled
+from core.diff_cache import DiffCache
+from core.file_handler import FileHandler
+from core.inline_diff import InlineDiffer, LineSpans, WORD_PATTERN, sequence_opcodes
+from core.line_aligner import FuzzyLineAligner, layout_pairs
+from core.line_normalizer import LineNormalizer, map_opcodes
+from core.move_detector import MoveDetector
+from core.myers_algorithm import (MyersDiff, DiffResult, DiffType, OPCODE_SIZE, OP_EQUAL,
+                                  iter_opcode_results, splice_opcodes)
+from core.patience_algorithm import PatienceDiff, unique_anchors
+from core.histogram_algorithm import HistogramDiff
 
 
 @dataclass
@@ -41,12 +56,32 @@ class DiffEngine:
     for line-level, word-level, and character-level differences.
     """
 
-    def __init__(self, options: Optional[Dict[str, Any]] = None):
+    # Combined input size (in lines) above which line diffs are split at
+    # unique anchor lines and the segments diffed in worker processes
+    PARALLEL_THRESHOLD = 200000
+
+    # Segments per worker, so one slow segment does not idle the others
+    SEGMENTS_PER_WORKER = 4
+    
+    # Total variant lines above which compare_many() uses worker processes
+    MANY_PARALLEL_THRESHOLD = 50000
+
+    # Bump whenever a change to the line diff alters its output, so cached
+    # results from older versions are no longer used
+    VERSION = 3
+
+    # Options that change how a diff is computed but not what it means
+    EXECUTION_OPTIONS = ('parallel', 'max_workers')
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None,
+                 cache: Optional[DiffCache] = None):
         """
         Initialize the diff engine with options.
         
         Args:
             options: Dictionary of comparison options
+                - algorithm: str ('myers', 'greedy', 'linear', 'bitparallel',
+                  'patience', 'histogram')
                 - ignore_case: bool
                 - ignore_whitespace: bool
                 - ignore_blank_lines: bool
@@ -54,129 +89,522 @@ class DiffEngine:
                 - ignore_trailing_whitespace: bool
                 - ignore_comments: bool
                 - comment_patterns: List[str] (regex patterns)
+                - language: str (language of the files, e.g. 'python'; enables
+                  language-aware comment stripping, see core.comment_stripper)
                 - ignore_line_patterns: List[str] (regex patterns)
                 - fuzzy_matching: bool
+                - fuzzy_threshold: float (minimum similarity of paired lines)
+                - fuzzy_band: int (half-width of the line pairing band)
+                - fuzzy_max_lines: int (larger hunks are not paired)
                 - moving_block_detection: bool
+                - move_min_lines: int (shortest block reported as moved)
+                - inline_granularity: str ('word' or 'char', for inline_spans())
+                - parallel: bool (split large diffs across processes,
+                  default True above PARALLEL_THRESHOLD lines)
+                - max_workers: int (worker processes, default os.cpu_count())
+            cache: Optional on-disk cache of line diff results
         """
         self.options = options or {}
+        self.cache = cache
+        self.normalizer = LineNormalizer(self.options)
         
-    def compare_lines(self, lines_a: List[str], lines_b: List[str]) -> List[DiffResult]:
+    def compare_lines(self, lines_a: Sequence[str], lines_b: Sequence[str],
+                      token: Optional[CancellationToken] = None,
+                      content_hashes: Optional[Tuple[str, str]] = None) -> List[DiffResult]:
         """
         Compare two sequences of lines using Myers' algorithm.
         
         Args:
             lines_a: First sequence of lines
             lines_b: Second sequence of lines
+            token: Optional cancellation token; once its deadline passes the
+                diff finishes with a faster, non-minimal heuristic
+            content_hashes: Optional (hash_a, hash_b) identifying the two
+                inputs (see FileInfo.content_key); used to look the diff
+                up in, and store it to, the engine's cache
             
         Returns:
             List of DiffResult objects
+            
+        Raises:
+            OperationCancelled: If the token is cancelled
         """
-        # Apply preprocessing based on options
-        processed_a = self._preprocess_lines(lines_a)
-        processed_b = self._preprocess_lines(lines_b)
-        
-        # Perform Myers diff
-        differ = MyersDiff(
-            processed_a,
-            processed_b,
-            ignore_case=self.options.get('ignore_case', False),
-            ignore_whitespace=self.options.get('ignore_whitespace', False),
-            ignore_blank_lines=self.options.get('ignore_blank_lines', False)
-        )
+        ops = self._line_opcodes(lines_a, lines_b, token, content_hashes)
+        return self._build_results(ops, lines_a, lines_b)
+    
+    def _line_opcodes(self, lines_a: Sequence[str], lines_b: Sequence[str],
+                      token: Optional[CancellationToken] = None,
+                      content_hashes: Optional[Tuple[str, str]] = None) -> array:
+        """
+        Compute the edit script of a line diff, through the cache.
         
-        results = differ.compute()
+        Args:
+            lines_a: First sequence of lines
+            lines_b: Second sequence of lines
+            token: Optional cancellation token
+            content_hashes: Optional (hash_a, hash_b) for the cache
+            
+        Returns:
+            Packed opcodes in original line positions
+            
+        Raises:
+            OperationCancelled: If the token is cancelled
+        """
+        # Comparison keys, and the original line of each key if lines were
+        # dropped
+        hash_a, hash_b = content_hashes or (None, None)
+        processed_a, index_a = self.normalizer.normalize(lines_a, hash_a)
+        processed_b, index_b = self.normalizer.normalize(lines_b, hash_b)
         
-        # Apply post-processing
-        if self.options.get('fuzzy_matching', False):
-            results = self._apply_fuzzy_matching(results, lines_a, lines_b)
+        cache, cache_key = None, ''
+        if self.cache is not None and hash_a and hash_b:
+            cache = self.cache
+            cache_key = DiffCache.make_key(hash_a, hash_b, self._cache_options(), self.VERSION)
+        
+        ops = cache.get(cache_key) if cache is not None else None
+        # An entry that does not cover the keys (e.g. stored for content
+        # decoded differently) is a miss
+        if ops is not None and not _covers(ops, len(processed_a), len(processed_b)):
+            ops = None
+        if ops is None:
+            # Perform the line diff
+            differ = self._create_differ(processed_a, processed_b)
+            
+            if self._use_parallel(differ):
+                self._compute_parallel(differ, token)
+            ops = differ.compute_opcodes(token)
+            
+            # Heuristic results from an expired time budget are not minimal
+            if cache is not None and not differ.too_expensive:
+                cache.put(cache_key, ops)
+        
+        # Report the original lines at their original positions
+        return map_opcodes(ops, index_a, index_b)
+    
+    def _build_results(self, ops: array, lines_a: Sequence[str],
+                       lines_b: Sequence[str]) -> List[DiffResult]:
+        """
+        Turn an edit script over the original lines into post-processed results.
         
+        Args:
+            ops: Packed opcodes in original line positions
+            lines_a: Original lines from sequence A
+            lines_b: Original lines from sequence B
+            
+        Returns:
+            List of DiffResult objects
+        """
+        results = list(iter_opcode_results(ops, lines_a, lines_b))
+        
+        # Apply post-processing; moves are split out first so that fuzzy
+        # matching pairs the lines that remain
         if self.options.get('moving_block_detection', False):
             results = self._detect_moving_blocks(results, lines_a, lines_b)
         
+        if self.options.get('fuzzy_matching', False):
+            results = self._apply_fuzzy_matching(results, lines_a, lines_b)
+        
         return results
     
-    def _preprocess_lines(self, lines: List[str]) -> List[str]:
+    async def compare_lines_async(self, lines_a: List[str], lines_b: List[str],
+                                  token: Optional[CancellationToken] = None,
+                                  content_hashes: Optional[Tuple[str, str]] = None,
+                                  runner: Optional[AsyncRunner] = None) -> List[DiffResult]:
         """
-        Preprocess lines based on ignore options.
+        Compare two sequences of lines without blocking the event loop.
+        
+        The line diff runs in the runner's process pool and the results are
+        built in its thread pool (see core.async_runner).
         
         Args:
-            lines: Input lines
+            lines_a: First sequence of lines
+            lines_b: Second sequence of lines
+            token: Optional cancellation token; cancelled if the awaiting
+                task is cancelled, and its deadline applies in the worker
+            content_hashes: Optional (hash_a, hash_b) for the cache
+            runner: Executors to use (default: get_async_runner())
             
         Returns:
-            Preprocessed lines
+            List of DiffResult objects
+            
+        Raises:
+            OperationCancelled: If the token is cancelled
         """
-        processed = []
+        runner = runner or get_async_runner()
+        deadline = token.deadline if token is not None else None
+        ops = await runner.run_cpu(_async_line_opcodes, self.options, self.cache,
+                                   lines_a, lines_b, deadline, content_hashes, token=token)
+        if token is not None:
+            token.check()
+        return await runner.run_io(self._build_results, ops, lines_a, lines_b, token=token)
+    
+    async def compare_files_async(self, path_a: str, path_b: str,
+                                  token: Optional[CancellationToken] = None,
+                                  runner: Optional[AsyncRunner] = None,
+                                  file_handler: Optional[FileHandler] = None
+                                  ) -> List[DiffResult]:
+        """
+        Read and compare two files without blocking the event loop.
         
-        for line in lines:
-            # Skip blank lines if requested
-            if self.options.get('ignore_blank_lines', False) and not line.strip():
-                continue
+        Both files are read and hashed concurrently in the runner's thread
+        pool, then compared as in compare_lines_async().
+        
+        Args:
+            path_a: First file path
+            path_b: Second file path
+            token: Optional cancellation token
+            runner: Executors to use (default: get_async_runner())
+            file_handler: File handler to read with (default: FileHandler())
             
-            # Ignore leading whitespace
-            if self.options.get('ignore_leading_whitespace', False):
-                line = line.lstrip()
+        Returns:
+            List of DiffResult objects
             
-            # Ignore trailing whitespace
-            if self.options.get('ignore_trailing_whitespace', False):
-                line = line.rstrip()
+        Raises:
+            FileNotFoundError: If a file doesn't exist
+            OperationCancelled: If the token is cancelled or expires while
+                reading
+        """
+        runner = runner or get_async_runner()
+        file_handler = file_handler or FileHandler()
+        own_token = token is None
+        token = token or CancellationToken()
+        try:
+            (lines_a, info_a), (lines_b, info_b) = await asyncio.gather(
+                runner.run_io(file_handler.read_file, path_a, token, token=token),
+                runner.run_io(file_handler.read_file, path_b, token, token=token))
+        except Exception:
+            # Stop the other read if one of them failed
+            if own_token:
+                token.cancel()
+            raise
+        return await self.compare_lines_async(lines_a, lines_b, token,
+                                              (info_a.content_key, info_b.content_key), runner)
+    
+    def index_base(self, lines: Sequence[str],
+                   content_key: Optional[str] = None) -> BaseIndex:
+        """
+        Index a base file for comparison against many variants.
+        
+        Args:
+            lines: Lines of the base file
+            content_key: Optional hash of the base content
             
-            # Ignore comments
-            if self.options.get('ignore_comments', False):
-                line = self._remove_comments(line)
+        Returns:
+            BaseIndex built with this engine's options
+        """
+        return BaseIndex(lines, self.options, content_key)
+    
+    def compare_to_base(self, base_index: BaseIndex, lines: Sequence[str],
+                        token: Optional[CancellationToken] = None,
+                        content_key: Optional[str] = None) -> List[DiffResult]:
+        """
+        Compare a variant against an indexed base.
+        
+        Args:
+            base_index: Index of the base (see index_base())
+            lines: Lines of the variant
+            token: Optional cancellation token, as for compare_lines()
+            content_key: Optional hash of the variant content
             
-            # Ignore lines matching patterns
-            ignore_patterns = self.options.get('ignore_line_patterns', [])
-            if ignore_patterns and self._matches_any_pattern(line, ignore_patterns):
+        Returns:
+            List of DiffResult objects, base as sequence A
+            
+        Raises:
+            ValueError: If the index was built with different comparison options
+            OperationCancelled: If the token is cancelled
+        """
+        self._check_base_index(base_index)
+        ops = self._base_opcodes(base_index, lines, token, content_key)
+        return self._build_results(ops, base_index.lines, lines)
+    
+    def compare_many(self, base_index: BaseIndex, variants: Sequence[Sequence[str]],
+                     token: Optional[CancellationToken] = None) -> ManyResult:
+        """
+        Compare many variants against one indexed base.
+        
+        The variants are spread over a process pool when there are enough
+        lines to pay for it (see MANY_PARALLEL_THRESHOLD); every worker
+        receives the index once and only edit scripts are sent back.
+        
+        Args:
+            base_index: Index of the base (see index_base())
+            variants: Lines of every variant
+            token: Optional cancellation token, checked between variants
+            
+        Returns:
+            ManyResult with per-variant results and the drift summary
+            
+        Raises:
+            ValueError: If the index was built with different comparison options
+            OperationCancelled: If the token is cancelled
+        """
+        self._check_base_index(base_index)
+        workers = min(self.options.get('max_workers') or os.cpu_count() or 1, len(variants))
+        total = sum(len(lines) for lines in variants)
+        
+        if (workers > 1 and self.options.get('parallel', True) and
+                total >= self.MANY_PARALLEL_THRESHOLD):
+            chunksize = max(1, len(variants) // (workers * self.SEGMENTS_PER_WORKER))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_base_worker,
+                                     initargs=(self.options, base_index)) as executor:
+                all_ops = []
+                for ops in executor.map(_base_worker_opcodes, variants, chunksize=chunksize):
+                    if token is not None and token.cancelled:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        raise OperationCancelled("Diff cancelled")
+                    all_ops.append(ops)
+        else:
+            all_ops = []
+            for lines in variants:
+                if token is not None and token.cancelled:
+                    raise OperationCancelled("Diff cancelled")
+                all_ops.append(self._base_opcodes(base_index, lines, token))
+        
+        results = [self._build_results(ops, base_index.lines, lines)
+                   for ops, lines in zip(all_ops, variants)]
+        return ManyResult(len(base_index), results)
+    
+    def _check_base_index(self, base_index: BaseIndex) -> None:
+        """
+        Check that an index was built with this engine's comparison options.
+        
+        Args:
+            base_index: Index of the base
+            
+        Raises:
+            ValueError: If the options differ
+        """
+        if DiffEngine(base_index.options)._cache_options() != self._cache_options():
+            raise ValueError("Base index was built with different comparison options")
+    
+    def _base_opcodes(self, base_index: BaseIndex, lines: Sequence[str],
+                      token: Optional[CancellationToken] = None,
+                      content_key: Optional[str] = None) -> array:
+        """
+        Diff a variant against an indexed base.
+        
+        The base is only normalized and interned once, in the index. Large
+        inputs are also cut at the lines unique in both (see
+        BaseIndex.anchors()), and only the gaps between them are diffed.
+        
+        Args:
+            base_index: Index of the base
+            lines: Lines of the variant
+            token: Optional cancellation token
+            content_key: Optional hash of the variant content
+            
+        Returns:
+            Packed opcodes in original line positions
+        """
+        ids, index = base_index.encode(lines, content_key)
+        base_ids = base_index.ids
+        
+        if len(base_ids) + len(ids) <= MyersDiff.LINEAR_SPACE_THRESHOLD:
+            # Small enough that the differ's own head/tail trimming wins
+            ops = self._create_differ(base_ids, ids).compute_opcodes(token)
+            return map_opcodes(ops, base_index.index, index)
+        
+        segments = []
+        # Start of the run of anchors and empty gaps not yet emitted
+        x_eq = y_eq = 0
+        for x_lo, x_hi, y_lo, y_hi in anchor_gaps(base_index.anchors(ids),
+                                                  len(base_ids), len(ids)):
+            if x_eq < x_lo:
+                segments.append((x_eq, y_eq, array('l', (OP_EQUAL, 0, x_lo - x_eq,
+                                                         0, y_lo - y_eq))))
+            differ = self._create_differ(base_ids[x_lo:x_hi], ids[y_lo:y_hi])
+            segments.append((x_lo, y_lo, differ.compute_opcodes(token)))
+            x_eq, y_eq = x_hi, y_hi
+        if x_eq < len(base_ids):
+            segments.append((x_eq, y_eq, array('l', (OP_EQUAL, 0, len(base_ids) - x_eq,
+                                                     0, len(ids) - y_eq))))
+        
+        return map_opcodes(splice_opcodes(segments), base_index.index, index)
+    
+    def _create_differ(self, lines_a: Sequence[Hashable],
+                       lines_b: Sequence[Hashable]) -> MyersDiff:
+        """
+        Create the line differ selected by the 'algorithm' option.
+        
+        The lines must already be preprocessed by _preprocess_lines().
+        
+        'myers' lets MyersDiff pick its engine by input size, 'greedy',
+        'linear' and 'bitparallel' force one of its engines, while
+        'patience' and 'histogram' anchor on unique or rare lines before
+        falling back to Myers.
+        
+        Args:
+            lines_a: First sequence of keys (lines or interned line IDs)
+            lines_b: Second sequence of keys
+            
+        Returns:
+            MyersDiff (or subclass) instance
+            
+        Raises:
+            ValueError: If the algorithm name is not supported
+        """
+        algorithm = self.options.get('algorithm') or 'myers'
+        
+        differ_class: Type[MyersDiff]
+        if algorithm == 'patience':
+            differ_class = PatienceDiff
+            engine = None
+        elif algorithm == 'histogram':
+            differ_class = HistogramDiff
+            engine = None
+        elif algorithm == 'myers':
+            differ_class = MyersDiff
+            engine = None
+        elif algorithm in MyersDiff.ALGORITHMS:
+            differ_class = MyersDiff
+            engine = algorithm
+        else:
+            raise ValueError(f"Unknown diff algorithm: {algorithm}")
+        
+        # The lines are normalized keys already, so the differ compares them
+        # as they are
+        return differ_class(lines_a, lines_b, algorithm=engine)
+    
+    def _cache_options(self) -> Dict[str, Any]:
+        """
+        Get the options that identify a line diff result.
+        
+        Options left at their defaults are dropped, so that e.g. {} and
+        {'ignore_case': False} share cache entries.
+        
+        Returns:
+            Dictionary of the options that affect the result
+        """
+        options = {}
+        for key, value in self.options.items():
+            if key in self.EXECUTION_OPTIONS or value in (None, False, '', [], ()):
                 continue
+            if key == 'algorithm' and value == 'myers':
+                continue
+            if key == 'language' and not self.options.get('ignore_comments'):
+                continue
+            options[key] = value
+        return options
+    
+    def similarity(self, lines_a: List[str], lines_b: List[str],
+                   min_similarity: Optional[float] = None) -> float:
+        """
+        Score how similar two sequences of lines are, without diffing them.
+        
+        The score is 2 * LCS / (len_a + len_b), computed from the Myers edit
+        distance after the usual preprocessing. No edit script or results
+        are built.
+        
+        Args:
+            lines_a: First sequence of lines
+            lines_b: Second sequence of lines
+            min_similarity: Optional cutoff; the search stops as soon as the
+                score is known to be lower
             
-            processed.append(line)
+        Returns:
+            Similarity from 0.0 to 1.0, or 0.0 if below min_similarity
+        """
+        differ = self._create_differ(self._preprocess_lines(lines_a),
+                                     self._preprocess_lines(lines_b))
+        total = differ.n + differ.m
+        if not total:
+            return 1.0
         
-        return processed
+        max_distance = None
+        if min_similarity is not None:
+            max_distance = int((1.0 - min_similarity) * total + 1e-9)
+        
+        distance = differ.distance(max_distance)
+        if distance is None:
+            return 0.0
+        return 1.0 - distance / total
     
-    def _remove_comments(self, line: str) -> str:
+    def _use_parallel(self, differ: MyersDiff) -> bool:
         """
-        Remove comments from a line based on comment patterns.
+        Check whether a line diff should be split across worker processes.
         
         Args:
-            line: Input line
+            differ: Differ for the preprocessed lines
             
         Returns:
-            Line with comments removed
+            True if the parallel path is enabled and worth its overhead
         """
-        comment_patterns = self.options.get('comment_patterns', [
-            r'//.*$',      # C++ style
-            r'#.*$',       # Python style
-            r'/\*.*?\*/',  # C style
-        ])
+        if not self.options.get('parallel', True):
+            return False
+        if differ.n + differ.m < self.PARALLEL_THRESHOLD:
+            return False
+        return (self.options.get('max_workers') or os.cpu_count() or 1) > 1
+    
+    def _compute_parallel(self, differ: MyersDiff,
+                          token: Optional[CancellationToken] = None) -> None:
+        """
+        Diff independent segments in a process pool and stitch the results.
         
-        for pattern in comment_patterns:
-            line = re.sub(pattern, '', line)
+        Lines that occur exactly once on each side, in the same relative
+        order, must match in the patience alignment, so the edit graph is
+        cut at those anchors into boxes that can be diffed independently.
+        Workers receive the interned token arrays rather than the lines,
+        and the per-segment opcodes are stitched into the differ's cached
+        edit script. Without usable anchors the differ is left untouched
+        and compute() runs sequentially.
         
-        return line
+        Workers share the token's deadline (time.monotonic() is system-wide);
+        explicit cancellation is noticed once the pool has finished.
+        
+        Args:
+            differ: Differ for the preprocessed lines
+            token: Optional cancellation token
+            
+        Raises:
+            OperationCancelled: If the token is cancelled
+        """
+        workers = self.options.get('max_workers') or os.cpu_count() or 1
+        cuts = _segment_cuts(differ.ids_a, differ.ids_b,
+                             workers * self.SEGMENTS_PER_WORKER)
+        if len(cuts) < 3:
+            return
+        
+        # Only a forced Myers engine is passed on; otherwise each worker
+        # picks the engine for its own segment size
+        engine = self.options.get('algorithm')
+        if engine not in MyersDiff.ALGORITHMS:
+            engine = None
+        deadline = token.deadline if token is not None else None
+        tasks = [(type(differ), engine, deadline,
+                  differ.ids_a[x_lo:x_hi], differ.ids_b[y_lo:y_hi])
+                 for (x_lo, y_lo), (x_hi, y_hi) in zip(cuts, cuts[1:])]
+        
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            segments = list(executor.map(_diff_segment, tasks))
+        
+        if token is not None and token.cancelled:
+            raise OperationCancelled("Diff cancelled")
+        
+        differ.too_expensive = any(too_expensive for _, too_expensive in segments)
+        differ.stitch_opcodes((x_lo, y_lo, ops)
+                              for (x_lo, y_lo), (ops, _) in zip(cuts, segments))
     
-    def _matches_any_pattern(self, line: str, patterns: List[str]) -> bool:
+    def _preprocess_lines(self, lines: List[str]) -> List[str]:
         """
-        Check if line matches any of the given regex patterns.
+        Preprocess lines based on ignore options.
         
         Args:
-            line: Input line
-            patterns: List of regex patterns
+            lines: Input lines
             
         Returns:
-            True if line matches any pattern
+            Comparison keys of the lines that are not ignored
         """
-        for pattern in patterns:
-            if re.search(pattern, line):
-                return True
-        return False
+        return self.normalizer.normalize(lines)[0]
     
     def _apply_fuzzy_matching(self, results: List[DiffResult],
-                             lines_a: List[str], lines_b: List[str]) -> List[DiffResult]:
+                             lines_a: Sequence[str], lines_b: Sequence[str]) -> List[DiffResult]:
         """
         Apply fuzzy matching to align similar but not identical lines.
         
-        This uses the SequenceMatcher ratio to find lines that are similar
-        enough to be considered modifications rather than delete+insert.
+        The lines of every REPLACE hunk are paired by similarity (see
+        core.line_aligner) and the pairing is stored in its line_pairs.
+        Adjacent DELETE and INSERT results with similar lines are merged
+        into a REPLACE first.
         
         Args:
             results: Initial diff results
@@ -186,7 +614,11 @@ class DiffEngine:
         Returns:
             Modified diff results with fuzzy matching applied
         """
-        threshold = 0.6  # Similarity threshold (60%)
+        aligner = FuzzyLineAligner(
+            threshold=self.options.get('fuzzy_threshold', FuzzyLineAligner.DEFAULT_THRESHOLD),
+            band=self.options.get('fuzzy_band', FuzzyLineAligner.DEFAULT_BAND),
+            max_lines=self.options.get('fuzzy_max_lines', FuzzyLineAligner.DEFAULT_MAX_LINES)
+        )
         modified_results = []
         
         i = 0
@@ -199,15 +631,10 @@ class DiffEngine:
                 results[i + 1].type == DiffType.INSERT):
                 
                 next_result = results[i + 1]
-                
-                # Check if they're similar enough
-                old_text = '\n'.join(result.old_lines)
-                new_text = '\n'.join(next_result.new_lines)
-                
-                matcher = difflib.SequenceMatcher(None, old_text, new_text)
-                if matcher.ratio() >= threshold:
+                pairs = aligner.pair_lines(result.old_lines, next_result.new_lines)
+                if pairs:
                     # Merge into REPLACE
-                    modified_results.append(DiffResult(
+                    merged = DiffResult(
                         type=DiffType.REPLACE,
                         old_start=result.old_start,
                         old_count=result.old_count,
@@ -215,22 +642,27 @@ class DiffEngine:
                         new_count=next_result.new_count,
                         old_lines=result.old_lines,
                         new_lines=next_result.new_lines
-                    ))
+                    )
+                    merged.line_pairs = layout_pairs(pairs, merged.old_count, merged.new_count)
+                    modified_results.append(merged)
                     i += 2
                     continue
             
+            if result.type == DiffType.REPLACE:
+                result.line_pairs = aligner.align(result.old_lines, result.new_lines)
+            
             modified_results.append(result)
             i += 1
         
         return modified_results
     
     def _detect_moving_blocks(self, results: List[DiffResult],
-                             lines_a: List[str], lines_b: List[str]) -> List[DiffResult]:
+                             lines_a: Sequence[str], lines_b: Sequence[str]) -> List[DiffResult]:
         """
         Detect blocks of code that have been moved within the file.
         
-        This looks for DELETE and INSERT blocks that contain identical content
-        but appear in different locations.
+        Deleted and inserted blocks (or parts of them) with the same content
+        are tagged as MOVED, see core.move_detector.
         
         Args:
             results: Initial diff results
@@ -240,31 +672,8 @@ class DiffEngine:
         Returns:
             Modified diff results with moved blocks detected
         """
-        # Build a map of deleted and inserted blocks
-        deleted_blocks: List[Tuple[int, List[str]]] = []
-        inserted_blocks: List[Tuple[int, List[str]]] = []
-        
-        for result in results:
-            if result.type == DiffType.DELETE:
-                deleted_blocks.append((result.old_start, result.old_lines))
-            elif result.type == DiffType.INSERT:
-                inserted_blocks.append((result.new_start, result.new_lines))
-        
-        # Find matching blocks
-        moves: Dict[int, int] = {}  # Map from delete index to insert index
-        
-        for i, (del_pos, del_lines) in enumerate(deleted_blocks):
-            for j, (ins_pos, ins_lines) in enumerate(inserted_blocks):
-                if j in moves.values():
-                    continue  # Already matched
-                
-                if del_lines == ins_lines:
-                    moves[i] = j
-                    break
-        
-        # For now, just return original results
-        # Full implementation would modify result types to indicate moves
-        return results
+        detector = MoveDetector(self.options.get('move_min_lines', MoveDetector.DEFAULT_MIN_LINES))
+        return detector.apply(results)
     
     def compare_words(self, line_a: str, line_b: str) -> List[WordDiff]:
         """
@@ -278,17 +687,14 @@ class DiffEngine:
             List of WordDiff objects
         """
         # Split into words (including whitespace)
-        words_a = re.findall(r'\S+|\s+', line_a)
-        words_b = re.findall(r'\S+|\s+', line_b)
-        
-        # Use difflib for word-level diff
-        matcher = difflib.SequenceMatcher(None, words_a, words_b)
+        words_a = WORD_PATTERN.findall(line_a)
+        words_b = WORD_PATTERN.findall(line_b)
         
         word_diffs = []
         pos_a = 0
         pos_b = 0
         
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        for tag, i1, i2, j1, j2 in sequence_opcodes(words_a, words_b):
             if tag == 'equal':
                 for i in range(i1, i2):
                     word_diffs.append(WordDiff(
@@ -354,11 +760,9 @@ class DiffEngine:
         Returns:
             List of CharDiff objects
         """
-        matcher = difflib.SequenceMatcher(None, str_a, str_b)
-        
         char_diffs = []
         
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        for tag, i1, i2, j1, j2 in sequence_opcodes(str_a, str_b):
             if tag == 'equal':
                 for i in range(i1, i2):
                     char_diffs.append(CharDiff(
@@ -399,12 +803,41 @@ class DiffEngine:
         
         return char_diffs
     
+    def inline_spans(self, results: List[DiffResult],
+                     granularity: Optional[str] = None) -> List[LineSpans]:
+        """
+        Compute intra-line changes for every line pair of REPLACE results.
+        
+        Unlike compare_words() and compare_chars() this works on a whole
+        comparison at once, returns compact span arrays instead of one
+        object per word or character, and reuses results for line pairs
+        seen before (see core.inline_diff).
+        
+        Args:
+            results: Diff results
+            granularity: 'word' or 'char' (default: the inline_granularity
+                option, or 'word')
+            
+        Returns:
+            List of (old line, new line, old spans, new spans), where spans
+            are flat array('l') triples of (start, end, opcode type)
+            
+        Raises:
+            ValueError: If the granularity is not supported
+        """
+        if granularity is None:
+            granularity = self.options.get('inline_granularity', 'word')
+        return InlineDiffer(granularity).result_spans(results)
+    
     def three_way_merge(self, base_lines: List[str],
                        yours_lines: List[str],
                        theirs_lines: List[str]) -> Tuple[List[str], List[Dict[str, Any]]]:
         """
         Perform a three-way merge.
         
+        Changes are merged hunk by hunk as by diff3 (see core.merge); use
+        ThreeWayMerger.write() to stream large merges instead.
+        
         Args:
             base_lines: Base version lines
             yours_lines: Your version lines
@@ -412,101 +845,306 @@ class DiffEngine:
             
         Returns:
             Tuple of (merged_lines, conflicts)
-            - merged_lines: The merged result
+            - merged_lines: The merged result, conflicts with diff3 markers
             - conflicts: List of conflict information
         """
-        # Compare base with yours
-        yours_diff = self.compare_lines(base_lines, yours_lines)
-        
-        # Compare base with theirs
-        theirs_diff = self.compare_lines(base_lines, theirs_lines)
+        from core.merge import ThreeWayMerger
+        return ThreeWayMerger(self).merge(base_lines, yours_lines, theirs_lines)
+
+
+class DiffSession:
+    """
+    Line diff of two documents that is kept up to date as they are edited.
+    
+    The session keeps the packed edit script and the preprocessed lines of
+    both sides. After an edit only the region between the nearest unchanged
+    anchors, i.e. the closest points of the previous edit path outside the
+    edited lines, is diffed again, and the new runs are spliced into the
+    script. The result is always a valid diff but, like any local update,
+    is not guaranteed to stay minimal across the whole file.
+    
+    Options that drop lines before comparing (ignore_blank_lines,
+    ignore_line_patterns) are not supported, since edits are addressed by
+    line number. With language-aware ignore_comments the edited side is
+    stripped again as a whole, since a comment opened or closed by the
+    edit changes the lines after it.
+    """
+    
+    def __init__(self, lines_a: List[str], lines_b: List[str],
+                 options: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the session and compute the initial diff.
         
-        # Merge the changes
-        merged_lines = []
-        conflicts = []
+        Args:
+            lines_a: First sequence of lines (copied)
+            lines_b: Second sequence of lines (copied)
+            options: Comparison options, as for DiffEngine
+            
+        Raises:
+            ValueError: If an option that drops lines is enabled
+        """
+        self.engine = DiffEngine(options)
+        if (self.engine.options.get('ignore_blank_lines', False) or
+                self.engine.options.get('ignore_line_patterns')):
+            raise ValueError("DiffSession does not support options that drop lines")
         
-        # Build change maps
-        yours_changes = self._build_change_map(yours_diff)
-        theirs_changes = self._build_change_map(theirs_diff)
+        self.lines_a = list(lines_a)
+        self.lines_b = list(lines_b)
         
-        # Process each line from base
-        i = 0
-        while i < len(base_lines):
-            yours_change = yours_changes.get(i)
-            theirs_change = theirs_changes.get(i)
-            
-            if yours_change is None and theirs_change is None:
-                # No changes from either side
-                merged_lines.append(base_lines[i])
-                i += 1
-            
-            elif yours_change is not None and theirs_change is None:
-                # Only yours changed
-                merged_lines.extend(yours_change['new_lines'])
-                i += yours_change['old_count'] or 1
-            
-            elif yours_change is None and theirs_change is not None:
-                # Only theirs changed
-                merged_lines.extend(theirs_change['new_lines'])
-                i += theirs_change['old_count'] or 1
-            
-            else:
-                # Both changed - potential conflict
-                if yours_change['new_lines'] == theirs_change['new_lines']:
-                    # Same change on both sides
-                    merged_lines.extend(yours_change['new_lines'])
-                else:
-                    # Conflict!
-                    conflict = {
-                        'line': i,
-                        'base_lines': base_lines[i:i + max(yours_change['old_count'], theirs_change['old_count'])],
-                        'yours_lines': yours_change['new_lines'],
-                        'theirs_lines': theirs_change['new_lines']
-                    }
-                    conflicts.append(conflict)
-                    
-                    # Add conflict markers
-                    merged_lines.append("<<<<<<< YOURS")
-                    merged_lines.extend(yours_change['new_lines'])
-                    merged_lines.append("=======")
-                    merged_lines.extend(theirs_change['new_lines'])
-                    merged_lines.append(">>>>>>> THEIRS")
-                
-                i += max(yours_change.get('old_count', 1), theirs_change.get('old_count', 1))
+        # Preprocessed lines, updated alongside lines_a/lines_b
+        self._processed_a = self.engine._preprocess_lines(self.lines_a)
+        self._processed_b = self.engine._preprocess_lines(self.lines_b)
         
-        return merged_lines, conflicts
+        differ = self.engine._create_differ(self._processed_a, self._processed_b)
+        if self.engine._use_parallel(differ):
+            self.engine._compute_parallel(differ)
+        self._opcodes = differ.compute_opcodes()
     
-    def _build_change_map(self, diff_results: List[DiffResult]) -> Dict[int, Dict[str, Any]]:
+    @property
+    def results(self) -> List[DiffResult]:
+        """Current diff results, viewing into lines_a and lines_b."""
+        return list(iter_opcode_results(self._opcodes, self.lines_a, self.lines_b))
+    
+    def apply_edit(self, side: str, start: int, end: int, new_lines: List[str]) -> None:
         """
-        Build a map of line numbers to changes.
+        Replace lines[start:end] on one side and update the diff.
         
         Args:
-            diff_results: List of DiffResult objects
+            side: 'a' or 'b'
+            start: First replaced line
+            end: End of the replaced lines (exclusive); start == end inserts
+            new_lines: Lines to put in their place
             
-        Returns:
-            Dictionary mapping line numbers to change information
+        Raises:
+            ValueError: If the side or range is invalid
         """
-        change_map = {}
+        if side == 'a':
+            lines, processed = self.lines_a, self._processed_a
+            # Positions of (own start, own end, other start, other end) in a run
+            p1, p2, q1, q2 = 1, 2, 3, 4
+        elif side == 'b':
+            lines, processed = self.lines_b, self._processed_b
+            p1, p2, q1, q2 = 3, 4, 1, 2
+        else:
+            raise ValueError(f"Unknown side: {side}")
+        if not 0 <= start <= end <= len(lines):
+            raise ValueError(f"Invalid line range: {start}:{end}")
+        
+        if self.engine.normalizer.spans_lines:
+            # Opening or closing a block comment or string changes the keys
+            # of the lines after the edit, so the side is stripped again and
+            # the edit widened up to the last line whose key changed
+            edited = lines[:start] + new_lines + lines[end:]
+            keys = self.engine._preprocess_lines(edited)
+            same = 0
+            while (same < len(lines) - end and
+                   processed[len(processed) - 1 - same] == keys[len(keys) - 1 - same]):
+                same += 1
+            end = len(lines) - same
+            new_lines = edited[start:len(edited) - same]
+            new_keys = keys[start:len(keys) - same]
+        else:
+            new_keys = self.engine._preprocess_lines(new_lines)
         
-        for result in diff_results:
-            if result.type != DiffType.EQUAL:
-                change_map[result.old_start] = {
-                    'type': result.type,
-                    'old_count': result.old_count,
-                    'new_lines': result.new_lines
-                }
+        ops = self._opcodes
+        runs = len(ops) // OPCODE_SIZE
+        own_end = lambda r: ops[r * OPCODE_SIZE + p2]
         
-        return change_map
+        # Lower anchor: the last point of the path on or before `start`,
+        # taken inside an EQUAL run or at the start of an edit run
+        lo = bisect_left(range(runs), start, key=own_end)
+        lo_p, lo_q = 0, 0
+        if lo < runs:
+            base = lo * OPCODE_SIZE
+            lo_p, lo_q = ops[base + p1], ops[base + q1]
+            if ops[base] == OP_EQUAL:
+                lo_q += start - lo_p
+                lo_p = start
+        
+        # Upper anchor: the first point of the path on or after `end`
+        hi = bisect_left(range(lo, runs), end, key=own_end) + lo
+        hi_p, hi_q = len(lines), len(self.lines_b if side == 'a' else self.lines_a)
+        if hi < runs:
+            base = hi * OPCODE_SIZE
+            if ops[base] == OP_EQUAL:
+                hi_p = end
+                hi_q = ops[base + q1] + end - ops[base + p1]
+            else:
+                hi_p, hi_q = ops[base + p2], ops[base + q2]
+        
+        lines[start:end] = new_lines
+        processed[start:end] = new_keys
+        shift = len(new_lines) - (end - start)
+        
+        # Diff the region between the anchors again
+        if side == 'a':
+            x_lo, x_hi, y_lo, y_hi = lo_p, hi_p + shift, lo_q, hi_q
+            dx, dy = shift, 0
+        else:
+            x_lo, x_hi, y_lo, y_hi = lo_q, hi_q, lo_p, hi_p + shift
+            dx, dy = 0, shift
+        differ = self.engine._create_differ(self._processed_a[x_lo:x_hi],
+                                            self._processed_b[y_lo:y_hi])
+        
+        head = ops[:lo * OPCODE_SIZE]
+        tail = ops[(hi + 1) * OPCODE_SIZE:] if hi < runs else array('l')
+        partial_head = array('l')
+        partial_tail = array('l')
+        # EQUAL runs cut by an anchor keep their part outside the region
+        if lo < runs and ops[lo * OPCODE_SIZE] == OP_EQUAL:
+            base = lo * OPCODE_SIZE
+            if ops[base + 1] < x_lo:
+                partial_head.extend((OP_EQUAL, ops[base + 1], x_lo, ops[base + 3], y_lo))
+        if hi < runs and ops[hi * OPCODE_SIZE] == OP_EQUAL:
+            base = hi * OPCODE_SIZE
+            if x_hi < ops[base + 2] + dx:
+                partial_tail.extend((OP_EQUAL, x_hi, ops[base + 2] + dx,
+                                     y_hi, ops[base + 4] + dy))
+        
+        self._opcodes = splice_opcodes([
+            (0, 0, head),
+            (0, 0, partial_head),
+            (x_lo, y_lo, differ.compute_opcodes()),
+            (0, 0, partial_tail),
+            (dx, dy, tail),
+        ])
+
+
+def _covers(ops: 'array[int]', n: int, m: int) -> bool:
+    """
+    Check that an edit script ends at the ends of both sequences.
+    
+    Args:
+        ops: Packed opcodes
+        n: Length of sequence A
+        m: Length of sequence B
+        
+    Returns:
+        True if the last run ends at (n, m), or the script is empty and so
+        are both sequences
+    """
+    if not ops:
+        return n == 0 and m == 0
+    return ops[-3] == n and ops[-1] == m
+
+
+# Per-process state of compare_many() workers: (engine, base index)
+_base_worker_state: Optional[Tuple['DiffEngine', BaseIndex]] = None
+
+
+def _init_base_worker(options: Dict[str, Any], base_index: BaseIndex) -> None:
+    """
+    Receive the base index in a compare_many() worker process.
+    
+    Args:
+        options: Comparison options
+        base_index: Index of the base
+    """
+    global _base_worker_state
+    _base_worker_state = (DiffEngine(options), base_index)
+
+
+def _base_worker_opcodes(lines: Sequence[str]) -> array:
+    """
+    Diff one variant in a compare_many() worker process.
+    
+    Args:
+        lines: Lines of the variant
+        
+    Returns:
+        Packed opcodes in original line positions
+        
+    Raises:
+        RuntimeError: If the worker was not initialized by _init_base_worker
+    """
+    if _base_worker_state is None:
+        raise RuntimeError("compare_many() worker was not initialized")
+    engine, base_index = _base_worker_state
+    return engine._base_opcodes(base_index, lines)
+
+
+def _async_line_opcodes(options: Dict[str, Any], cache: Optional[DiffCache],
+                        lines_a: Sequence[str], lines_b: Sequence[str],
+                        deadline: Optional[float],
+                        content_hashes: Optional[Tuple[str, str]]) -> array:
+    """
+    Compute a line diff in a compare_lines_async() worker process.
+    
+    Args:
+        options: Comparison options
+        cache: Optional diff cache (safe to share between processes)
+        lines_a: First sequence of lines
+        lines_b: Second sequence of lines
+        deadline: Optional time.monotonic() deadline of the operation
+        content_hashes: Optional (hash_a, hash_b) for the cache
+        
+    Returns:
+        Packed opcodes in original line positions
+    """
+    token = CancellationToken(deadline=deadline) if deadline is not None else None
+    # The worker is one of a pool already; it does not start its own
+    engine = DiffEngine(dict(options, parallel=False), cache)
+    return engine._line_opcodes(lines_a, lines_b, token, content_hashes)
+
+
+def _segment_cuts(ids_a: Sequence[int], ids_b: Sequence[int],
+                  segments: int) -> List[Tuple[int, int]]:
+    """
+    Choose anchor points that split a line diff into similar-sized boxes.
+    
+    Args:
+        ids_a: Token array for sequence A
+        ids_b: Token array for sequence B
+        segments: Desired number of segments
+        
+    Returns:
+        Cut points from (0, 0) to (len(ids_a), len(ids_b)) inclusive
+    """
+    n, m = len(ids_a), len(ids_b)
+    target = max(1, (n + m) // max(segments, 1))
+    
+    cuts = [(0, 0)]
+    last = 0
+    for x, y in unique_anchors(ids_a, ids_b, 0, n, 0, m):
+        if x + y - last >= target:
+            cuts.append((x, y))
+            last = x + y
+    
+    # Fold a short trailing segment into the previous one
+    if len(cuts) > 1 and n + m - last < target // 2:
+        cuts.pop()
+    cuts.append((n, m))
+    return cuts
+
+
+def _diff_segment(task: Tuple[Type[MyersDiff], Optional[str], Optional[float],
+                              array, array]) -> Tuple[array, bool]:
+    """
+    Diff one segment in a worker process.
+    
+    Args:
+        task: Tuple of (differ class, Myers engine, deadline, tokens A, tokens B)
+        
+    Returns:
+        Tuple of (opcodes relative to the segment origin, too_expensive)
+    """
+    differ_class, engine, deadline, ids_a, ids_b = task
+    token = CancellationToken(deadline=deadline) if deadline is not None else None
+    # Tokens are already normalized, so they are diffed as plain lines
+    differ = differ_class(ids_a, ids_b, algorithm=engine)
+    return differ.compute_opcodes(token), differ.too_expensive
 
 
-def create_diff_engine(options: Optional[Dict[str, Any]] = None) -> DiffEngine:
+def create_diff_engine(options: Optional[Dict[str, Any]] = None,
+                       cache: Optional[DiffCache] = None) -> DiffEngine:
     """
     Factory function to create a DiffEngine instance.
     
     Args:
         options: Comparison options
+        cache: Optional on-disk cache of line diff results
         
     Returns:
         DiffEngine instance
     """
-    return DiffEngine(options)
+    return DiffEngine(options, cache)
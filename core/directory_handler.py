@@ -19,8 +19,11 @@ from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 import xml.etree.ElementTree as ET
+import asyncio
 import json
 
+from core.async_runner import AsyncRunner, get_async_runner
+from core.cancellation import CancellationToken, OperationCancelled
 from core.file_handler import FileHandler, FileInfo
 
 
@@ -119,7 +122,8 @@ class DirectoryHandler:
         self.file_handler = FileHandler()
     
     def compare_directories(self, left_dir: str, right_dir: str,
-                          progress_callback: Optional[Callable[[str], None]] = None) -> DirectoryComparisonResult:
+                          progress_callback: Optional[Callable[[str], None]] = None,
+                          token: Optional[CancellationToken] = None) -> DirectoryComparisonResult:
         """
         Compare two directories.
         
@@ -127,9 +131,13 @@ class DirectoryHandler:
             left_dir: Path to left directory
             right_dir: Path to right directory
             progress_callback: Optional callback for progress updates
+            token: Optional cancellation token, checked for every file
             
         Returns:
             DirectoryComparisonResult object
+            
+        Raises:
+            OperationCancelled: If the token is cancelled or expires
         """
         if not os.path.isdir(left_dir):
             raise NotADirectoryError(f"Not a directory: {left_dir}")
@@ -143,12 +151,12 @@ class DirectoryHandler:
         )
         
         # Build file trees
-        left_tree = self._build_file_tree(left_dir, progress_callback)
-        right_tree = self._build_file_tree(right_dir, progress_callback)
+        left_tree = self._build_file_tree(left_dir, progress_callback, token)
+        right_tree = self._build_file_tree(right_dir, progress_callback, token)
         
         # Compare trees
         entries = self._compare_trees(left_dir, right_dir, left_tree, right_tree, 
-                                     progress_callback)
+                                     progress_callback, token)
         
         result.entries = entries
         
@@ -157,14 +165,81 @@ class DirectoryHandler:
         
         return result
     
+    async def compare_directories_async(self, left_dir: str, right_dir: str,
+                                        progress_callback: Optional[Callable[[str], None]] = None,
+                                        token: Optional[CancellationToken] = None,
+                                        runner: Optional[AsyncRunner] = None
+                                        ) -> DirectoryComparisonResult:
+        """
+        Compare two directories without blocking the event loop.
+        
+        Both trees are scanned, and the file pairs compared and hashed,
+        concurrently in the runner's thread pool (see core.async_runner).
+        The progress callback is called from those threads.
+        
+        Args:
+            left_dir: Path to left directory
+            right_dir: Path to right directory
+            progress_callback: Optional callback for progress updates
+            token: Optional cancellation token; cancelled if the awaiting
+                task is cancelled
+            runner: Executors to use (default: get_async_runner())
+            
+        Returns:
+            DirectoryComparisonResult object, with entries in path order
+            
+        Raises:
+            OperationCancelled: If the token is cancelled or expires
+        """
+        if not os.path.isdir(left_dir):
+            raise NotADirectoryError(f"Not a directory: {left_dir}")
+        if not os.path.isdir(right_dir):
+            raise NotADirectoryError(f"Not a directory: {right_dir}")
+        
+        runner = runner or get_async_runner()
+        own_token = token is None
+        token = token or CancellationToken()
+        try:
+            left_tree, right_tree = await asyncio.gather(
+                runner.run_io(self._build_file_tree, left_dir, progress_callback, token,
+                              token=token),
+                runner.run_io(self._build_file_tree, right_dir, progress_callback, token,
+                              token=token))
+            
+            def compare_entry(rel_path: str) -> DirectoryEntry:
+                token.check()
+                if progress_callback:
+                    progress_callback(f"Comparing: {rel_path}")
+                return self._compare_entry(rel_path, left_tree.get(rel_path),
+                                           right_tree.get(rel_path), token)
+            
+            all_paths = sorted(set(left_tree.keys()) | set(right_tree.keys()))
+            entries = await asyncio.gather(*(runner.run_io(compare_entry, rel_path, token=token)
+                                             for rel_path in all_paths))
+        except Exception:
+            # Stop the remaining comparisons if one of them failed
+            if own_token:
+                token.cancel()
+            raise
+        
+        result = DirectoryComparisonResult(
+            left_root=left_dir,
+            right_root=right_dir,
+            entries=list(entries)
+        )
+        self._calculate_statistics(result)
+        return result
+    
     def _build_file_tree(self, root_dir: str, 
-                        progress_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+                        progress_callback: Optional[Callable[[str], None]] = None,
+                        token: Optional[CancellationToken] = None) -> Dict[str, Any]:
         """
         Build a tree structure of files and directories.
         
         Args:
             root_dir: Root directory path
             progress_callback: Optional progress callback
+            token: Optional cancellation token
             
         Returns:
             Dictionary representing the file tree
@@ -173,6 +248,9 @@ class DirectoryHandler:
         
         if self.recursive:
             for dirpath, dirnames, filenames in os.walk(root_dir):
+                if token is not None:
+                    token.check()
+                
                 # Filter hidden directories
                 if self.ignore_hidden:
                     dirnames[:] = [d for d in dirnames if not d.startswith('.')]
@@ -198,6 +276,8 @@ class DirectoryHandler:
             # Non-recursive: only top-level files
             try:
                 for entry in os.scandir(root_dir):
+                    if token is not None:
+                        token.check()
                     if entry.is_file():
                         if self.ignore_hidden and entry.name.startswith('.'):
                             continue
@@ -218,7 +298,8 @@ class DirectoryHandler:
     
     def _compare_trees(self, left_root: str, right_root: str,
                       left_tree: Dict[str, str], right_tree: Dict[str, str],
-                      progress_callback: Optional[Callable[[str], None]] = None) -> List[DirectoryEntry]:
+                      progress_callback: Optional[Callable[[str], None]] = None,
+                      token: Optional[CancellationToken] = None) -> List[DirectoryEntry]:
         """
         Compare two file trees.
         
@@ -228,6 +309,7 @@ class DirectoryHandler:
             left_tree: Left file tree
             right_tree: Right file tree
             progress_callback: Optional progress callback
+            token: Optional cancellation token
             
         Returns:
             List of DirectoryEntry objects
@@ -238,51 +320,72 @@ class DirectoryHandler:
         all_paths = sorted(set(left_tree.keys()) | set(right_tree.keys()))
         
         for rel_path in all_paths:
+            if token is not None:
+                token.check()
+            
             if progress_callback:
                 progress_callback(f"Comparing: {rel_path}")
             
-            left_path = left_tree.get(rel_path)
-            right_path = right_tree.get(rel_path)
-            
-            # Determine status
-            if left_path and right_path:
-                status = self._compare_files(left_path, right_path)
-                left_info = self.file_handler.get_file_info(left_path)
-                right_info = self.file_handler.get_file_info(right_path)
-            elif left_path:
-                status = FileStatus.LEFT_ONLY
-                left_info = self.file_handler.get_file_info(left_path)
-                right_info = None
-            else:
-                status = FileStatus.RIGHT_ONLY
-                left_info = None
-                right_info = self.file_handler.get_file_info(right_path)
-            
-            entry = DirectoryEntry(
-                name=os.path.basename(rel_path),
-                relative_path=rel_path,
-                is_dir=False,
-                status=status,
-                left_path=left_path,
-                right_path=right_path,
-                left_info=left_info,
-                right_info=right_info
-            )
-            
-            entries.append(entry)
+            entries.append(self._compare_entry(rel_path, left_tree.get(rel_path),
+                                               right_tree.get(rel_path), token))
         
         return entries
     
-    def _compare_files(self, left_path: str, right_path: str) -> FileStatus:
+    def _compare_entry(self, rel_path: str, left_path: Optional[str],
+                       right_path: Optional[str],
+                       token: Optional[CancellationToken] = None) -> DirectoryEntry:
+        """
+        Compare the files at one relative path.
+        
+        Args:
+            rel_path: Relative path of the files
+            left_path: Left file path, or None if only on the right
+            right_path: Right file path, or None if only on the left
+            token: Optional cancellation token
+            
+        Returns:
+            DirectoryEntry for the path
+        """
+        # Determine status
+        if left_path and right_path:
+            status = self._compare_files(left_path, right_path, token)
+            left_info = self.file_handler.get_file_info(left_path, token)
+            right_info = self.file_handler.get_file_info(right_path, token)
+        elif left_path:
+            status = FileStatus.LEFT_ONLY
+            left_info = self.file_handler.get_file_info(left_path, token)
+            right_info = None
+        else:
+            status = FileStatus.RIGHT_ONLY
+            left_info = None
+            right_info = self.file_handler.get_file_info(right_path, token)
+        
+        return DirectoryEntry(
+            name=os.path.basename(rel_path),
+            relative_path=rel_path,
+            is_dir=False,
+            status=status,
+            left_path=left_path,
+            right_path=right_path,
+            left_info=left_info,
+            right_info=right_info
+        )
+    
+    def _compare_files(self, left_path: str, right_path: str,
+                       token: Optional[CancellationToken] = None) -> FileStatus:
         """
         Compare two files based on the compare mode.
         
         Args:
             left_path: Left file path
             right_path: Right file path
+            token: Optional cancellation token, checked while hashing
             
         Returns:
             FileStatus indicating the comparison result
+            
+        Raises:
+            OperationCancelled: If the token is cancelled or expires
         """
         try:
             if self.compare_mode == CompareMode.SIZE:
@@ -317,8 +420,8 @@ class DirectoryHandler:
                     return FileStatus.NEWER_RIGHT
             
             elif self.compare_mode == CompareMode.HASH:
-                left_info = self.file_handler.get_file_info(left_path)
-                right_info = self.file_handler.get_file_info(right_path)
+                left_info = self.file_handler.get_file_info(left_path, token)
+                right_info = self.file_handler.get_file_info(right_path, token)
                 return FileStatus.IDENTICAL if left_info.hash_sha256 == right_info.hash_sha256 else FileStatus.DIFFERENT
             
             else:  # CONTENT or CONTENT_AND_SIZE
@@ -329,11 +432,13 @@ class DirectoryHandler:
                     return FileStatus.DIFFERENT
                 
                 # Then check content
-                if self.file_handler.are_files_identical(left_path, right_path):
+                if self.file_handler.are_files_identical(left_path, right_path, token):
                     return FileStatus.IDENTICAL
                 else:
                     return FileStatus.DIFFERENT
         
+        except OperationCancelled:
+            raise
         except Exception:
             return FileStatus.ERROR
     
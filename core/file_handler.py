@@ -19,6 +19,8 @@ from enum import Enum
 import chardet
 import hashlib
 
+from core.cancellation import CancellationToken, OperationCancelled
+
 
 class FileType(Enum):
     """Type of file."""
@@ -51,6 +53,13 @@ class FileInfo:
     hash_md5: str
     hash_sha256: str
     
+    @property
+    def content_key(self) -> str:
+        """Identify the decoded content, for caching comparison results."""
+        if not self.hash_sha256:
+            return ''
+        return f"{self.hash_sha256}:{self.encoding}:{self.file_type.value}"
+    
     def __repr__(self) -> str:
         return (f"FileInfo(path='{self.path}', size={self.size}, "
                 f"type={self.file_type.value}, encoding={self.encoding})")
@@ -79,6 +88,15 @@ class FileHandler:
         b'\x1F\x8B': 'application/gzip',
     }
     
+    # Document formats compared structurally (see core.structural_diff)
+    DOCUMENT_EXTENSIONS = {
+        '.json': 'json',
+        '.jsonl': 'jsonl',
+        '.ndjson': 'jsonl',
+        '.yaml': 'yaml',
+        '.yml': 'yaml',
+    }
+    
     def __init__(self, encoding: Optional[str] = None):
         """
         Initialize file handler.
@@ -88,12 +106,14 @@ class FileHandler:
         """
         self.forced_encoding = encoding
     
-    def read_file(self, filepath: str) -> Tuple[List[str], FileInfo]:
+    def read_file(self, filepath: str,
+                  token: Optional[CancellationToken] = None) -> Tuple[List[str], FileInfo]:
         """
         Read a file and return its lines and metadata.
         
         Args:
             filepath: Path to the file
+            token: Optional cancellation token, checked between chunks
             
         Returns:
             Tuple of (lines, file_info)
@@ -101,35 +121,89 @@ class FileHandler:
         Raises:
             FileNotFoundError: If file doesn't exist
             PermissionError: If file can't be read
+            OperationCancelled: If the token is cancelled or expires
         """
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"File not found: {filepath}")
         
         # Get file info
-        file_info = self.get_file_info(filepath)
+        file_info = self.get_file_info(filepath, token)
         
         # Determine if binary
         if file_info.file_type == FileType.BINARY:
             # For binary files, read as hex lines
-            lines = self._read_binary_as_hex(filepath)
+            lines = self._read_binary_as_hex(filepath, token=token)
         else:
-            # Read as text
+            # Read as text; the content key depends on the encoding used
             encoding = self.forced_encoding or file_info.encoding
+            file_info.encoding = encoding
             
             try:
                 if file_info.size > self.MAX_MEMORY_SIZE:
-                    lines = self._read_large_file(filepath, encoding)
+                    lines = self._read_large_file(filepath, encoding, token)
                 else:
                     with open(filepath, 'r', encoding=encoding, errors='replace') as f:
                         lines = f.read().splitlines()
+            except OperationCancelled:
+                raise
             except Exception as e:
                 # Fallback to binary mode
-                lines = self._read_binary_as_hex(filepath)
+                lines = self._read_binary_as_hex(filepath, token=token)
                 file_info.file_type = FileType.BINARY
         
         file_info.line_count = len(lines)
         return lines, file_info
     
+    def document_format(self, filepath: str) -> Optional[str]:
+        """
+        Get the structured document format of a file.
+        
+        Args:
+            filepath: Path to the file
+            
+        Returns:
+            'json', 'jsonl' or 'yaml', or None if the file is not a
+            structured document
+        """
+        return self.DOCUMENT_EXTENSIONS.get(Path(filepath).suffix.lower())
+    
+    def read_document(self, filepath: str,
+                      token: Optional[CancellationToken] = None) -> Tuple[Any, FileInfo]:
+        """
+        Parse a JSON or YAML file incrementally.
+        
+        Args:
+            filepath: Path to the file
+            token: Optional cancellation token, checked while parsing
+            
+        Returns:
+            Tuple of (parsed document, file_info)
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            ValueError: If the file is not a structured document or is
+                malformed
+            OperationCancelled: If the token is cancelled or expires
+        """
+        from core.structural_diff import load_document
+        
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+        
+        fmt = self.document_format(filepath)
+        if fmt is None:
+            raise ValueError(f"Not a JSON or YAML document: {filepath}")
+        
+        file_info = self.get_file_info(filepath, token)
+        if file_info.file_type != FileType.TEXT:
+            raise ValueError(f"Not a text file: {filepath}")
+        
+        encoding = self.forced_encoding or file_info.encoding
+        file_info.encoding = encoding
+        with open(filepath, 'r', encoding=encoding, errors='replace') as f:
+            document = load_document(f, fmt, token)
+        return document, file_info
+    
     def write_file(self, filepath: str, lines: List[str], 
                    encoding: str = 'utf-8') -> None:
         """
@@ -149,15 +223,20 @@ class FileHandler:
         with open(filepath, 'w', encoding=encoding, errors='replace') as f:
             f.write('\n'.join(lines))
     
-    def get_file_info(self, filepath: str) -> FileInfo:
+    def get_file_info(self, filepath: str,
+                      token: Optional[CancellationToken] = None) -> FileInfo:
         """
         Get detailed information about a file.
         
         Args:
             filepath: Path to the file
+            token: Optional cancellation token, checked while hashing
             
         Returns:
             FileInfo object
+            
+        Raises:
+            OperationCancelled: If the token is cancelled or expires
         """
         stat = os.stat(filepath)
         
@@ -165,7 +244,7 @@ class FileHandler:
         encoding, file_type = self._detect_encoding_and_type(filepath)
         
         # Calculate hashes
-        md5_hash, sha256_hash = self._calculate_hashes(filepath)
+        md5_hash, sha256_hash = self._calculate_hashes(filepath, token)
         
         return FileInfo(
             path=filepath,
@@ -226,13 +305,15 @@ class FileHandler:
         except Exception:
             return 'binary', FileType.UNKNOWN
     
-    def _read_large_file(self, filepath: str, encoding: str) -> List[str]:
+    def _read_large_file(self, filepath: str, encoding: str,
+                         token: Optional[CancellationToken] = None) -> List[str]:
         """
         Read a large file in chunks.
         
         Args:
             filepath: Path to the file
             encoding: File encoding
+            token: Optional cancellation token, checked between chunks
             
         Returns:
             List of lines
@@ -242,6 +323,8 @@ class FileHandler:
         with open(filepath, 'r', encoding=encoding, errors='replace') as f:
             buffer = ""
             while True:
+                if token is not None:
+                    token.check()
                 chunk = f.read(self.CHUNK_SIZE)
                 if not chunk:
                     if buffer:
@@ -258,22 +341,26 @@ class FileHandler:
         return lines
     
     def _read_binary_as_hex(self, filepath: str, 
-                           bytes_per_line: int = 16) -> List[str]:
+                           bytes_per_line: int = 16,
+                           token: Optional[CancellationToken] = None) -> List[str]:
         """
         Read binary file as hexadecimal lines.
         
         Args:
             filepath: Path to the file
             bytes_per_line: Number of bytes to show per line
+            token: Optional cancellation token, checked every 4096 lines
             
         Returns:
             List of hex dump lines
         """
-        lines = []
+        lines: List[str] = []
         
         with open(filepath, 'rb') as f:
             offset = 0
             while True:
+                if token is not None and len(lines) % 4096 == 0:
+                    token.check()
                 chunk = f.read(bytes_per_line)
                 if not chunk:
                     break
@@ -328,12 +415,14 @@ class FileHandler:
         
         return differences
     
-    def _calculate_hashes(self, filepath: str) -> Tuple[str, str]:
+    def _calculate_hashes(self, filepath: str,
+                          token: Optional[CancellationToken] = None) -> Tuple[str, str]:
         """
         Calculate MD5 and SHA256 hashes of a file.
         
         Args:
             filepath: Path to the file
+            token: Optional cancellation token, checked between chunks
             
         Returns:
             Tuple of (md5_hash, sha256_hash)
@@ -344,6 +433,8 @@ class FileHandler:
         try:
             with open(filepath, 'rb') as f:
                 while True:
+                    if token is not None:
+                        token.check()
                     chunk = f.read(self.CHUNK_SIZE)
                     if not chunk:
                         break
@@ -351,19 +442,26 @@ class FileHandler:
                     sha256.update(chunk)
             
             return md5.hexdigest(), sha256.hexdigest()
+        except OperationCancelled:
+            raise
         except Exception:
             return '', ''
     
-    def are_files_identical(self, filepath_a: str, filepath_b: str) -> bool:
+    def are_files_identical(self, filepath_a: str, filepath_b: str,
+                            token: Optional[CancellationToken] = None) -> bool:
         """
         Quick check if two files are identical using hashes.
         
         Args:
             filepath_a: First file path
             filepath_b: Second file path
+            token: Optional cancellation token, checked while hashing
             
         Returns:
             True if files are identical
+            
+        Raises:
+            OperationCancelled: If the token is cancelled or expires
         """
         # First check size
         size_a = os.path.getsize(filepath_a)
@@ -373,8 +471,8 @@ class FileHandler:
             return False
         
         # Then check hash
-        info_a = self.get_file_info(filepath_a)
-        info_b = self.get_file_info(filepath_b)
+        info_a = self.get_file_info(filepath_a, token)
+        info_b = self.get_file_info(filepath_b, token)
         
         return info_a.hash_sha256 == info_b.hash_sha256
 
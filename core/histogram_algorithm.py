@@ -0,0 +1,128 @@
+"""
+Histogram Diff Algorithm Implementation
+=======================================
+
+Histogram diff is the default-quality algorithm of `git diff --histogram`
+(originally from JGit). It extends patience diff to regions that have no
+lines unique to both sides: instead of requiring a count of exactly one, it
+anchors on the common run whose rarest line has the lowest occurrence count.
+
+Algorithm Overview:
+------------------
+1. Index the lines of the A side of a region in a hash table of
+   token -> occurrence positions (the "histogram").
+2. Scan the B side. For each line whose A occurrence count is no higher
+   than the best seen so far, extend every A occurrence into a maximal
+   matching run and score it by the lowest occurrence count inside it.
+3. Keep the run with the lowest count (longest on ties), split the region
+   around it and recurse on both sides.
+4. If a region has no common line that occurs at most MAX_CHAIN_LENGTH
+   times, it is handed to Myers' algorithm.
+
+On inputs with heavy repetition (generated SQL, boilerplate) the histogram
+avoids both the Myers search over long runs of identical lines and the
+patience fallback that occurs when nothing is unique.
+"""
+
+from typing import Any, List, Tuple, Dict
+
+from core.myers_algorithm import DiffResult
+from core.patience_algorithm import PatienceDiff
+
+
+class HistogramDiff(PatienceDiff):
+    """
+    Histogram diff built on the patience region recursion.
+    """
+
+    # Lines occurring more often than this in a region are never anchors
+    MAX_CHAIN_LENGTH = 64
+
+    def _find_anchors(self, x_lo: int, x_hi: int,
+                      y_lo: int, y_hi: int) -> List[Tuple[int, int, int]]:
+        """
+        Find the lowest-occurrence common run of a region.
+        
+        Args:
+            x_lo: First line of the region in sequence A
+            x_hi: End of the region in sequence A (exclusive)
+            y_lo: First line of the region in sequence B
+            y_hi: End of the region in sequence B (exclusive)
+            
+        Returns:
+            A single (x, y, length) run, or an empty list if the region has
+            no usable common line
+        """
+        a, b = self.ids_a, self.ids_b
+        
+        # Occurrence index of the A side of the region
+        occurrences: Dict[int, List[int]] = {}
+        for x in range(x_lo, x_hi):
+            token = a[x]
+            if token >= 0:
+                positions = occurrences.get(token)
+                if positions is None:
+                    occurrences[token] = [x]
+                else:
+                    positions.append(x)
+        
+        best: List[Tuple[int, int, int]] = []
+        best_length = 0
+        best_count = self.MAX_CHAIN_LENGTH
+        
+        y = y_lo
+        while y < y_hi:
+            next_y = y + 1
+            positions = occurrences.get(b[y])
+            if positions is None or len(positions) > best_count:
+                y = next_y
+                continue
+            
+            for x in positions:
+                if len(positions) > best_count:
+                    break
+                count = len(positions)
+                
+                # Extend the match in both directions, tracking the rarest line
+                start_x, start_y = x, y
+                while (start_x > x_lo and start_y > y_lo and
+                       a[start_x - 1] == b[start_y - 1]):
+                    start_x -= 1
+                    start_y -= 1
+                    if count > 1:
+                        count = min(count, len(occurrences[a[start_x]]))
+                end_x, end_y = x + 1, y + 1
+                while end_x < x_hi and end_y < y_hi and a[end_x] == b[end_y]:
+                    if count > 1:
+                        count = min(count, len(occurrences[a[end_x]]))
+                    end_x += 1
+                    end_y += 1
+                
+                if end_y > next_y:
+                    next_y = end_y
+                
+                length = end_x - start_x
+                if length > best_length or count < best_count:
+                    best = [(start_x, start_y, length)]
+                    best_length = length
+                    best_count = count
+            
+            y = next_y
+        
+        return best
+
+
+def histogram_diff(seq_a: List[str], seq_b: List[str], **options: Any) -> List[DiffResult]:
+    """
+    Convenience function to compute diff using the histogram algorithm.
+    
+    Args:
+        seq_a: First sequence
+        seq_b: Second sequence
+        **options: Additional options (ignore_case, ignore_whitespace, etc.)
+        
+    Returns:
+        List of DiffResult objects
+    """
+    differ = HistogramDiff(seq_a, seq_b, **options)
+    return differ.compute()
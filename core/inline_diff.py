@@ -0,0 +1,237 @@
+"""
+Inline Diff - Batched Word and Character Highlighting
+=====================================================
+
+This module computes which parts of changed lines differ, for intra-line
+highlighting of every REPLACE hunk of a comparison at once.
+
+Instead of one object per word or character, each line gets a compact
+span array: a flat array('l') of (start, end, type) triples, one per
+changed run of the line, where type is OP_DELETE or OP_REPLACE for the old
+line and OP_INSERT or OP_REPLACE for the new one. Unchanged text has no
+span.
+
+Edits repeat (a renamed identifier, a changed constant), within a file
+and across files, so results are kept in an LRU cache keyed by the line
+pair and shared by all differs. Lines are tokenized once, their common
+prefix and suffix are skipped, and only the middle is diffed, with the
+bit-parallel LCS kernel (core.bit_parallel).
+"""
+
+import difflib
+import re
+from array import array
+from collections import OrderedDict
+from itertools import accumulate
+from typing import Any, List, Sequence, Tuple
+
+from core.bit_parallel import BIT_PARALLEL_LIMIT, lcs_opcodes
+from core.myers_algorithm import OP_DELETE, OP_INSERT, OP_REPLACE, DiffResult, DiffType
+
+
+# Words and the whitespace between them, as tokenized by compare_words()
+WORD_PATTERN = re.compile(r'\S+|\s+')
+
+# Spans of one line pair: (old line, new line, old spans, new spans)
+LineSpans = Tuple[int, int, array, array]
+
+
+class InlineDiffer:
+    """
+    Computes intra-line change spans for changed line pairs.
+    """
+
+    # Supported granularities
+    GRANULARITIES = ('word', 'char')
+
+    # Number of line pairs kept in the shared cache
+    CACHE_SIZE = 16384
+
+    # Shared by all differs: (granularity, line A, line B) -> (old spans, new spans)
+    _cache: 'OrderedDict[Tuple[str, str, str], Tuple[array, array]]' = OrderedDict()
+
+    def __init__(self, granularity: str = 'word'):
+        """
+        Initialize the differ.
+
+        Args:
+            granularity: 'word' or 'char'
+
+        Raises:
+            ValueError: If the granularity is not supported
+        """
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        self.granularity = granularity
+
+    def line_spans(self, line_a: str, line_b: str) -> Tuple[array, array]:
+        """
+        Compute the change spans of a line pair.
+
+        The arrays are shared through the cache and must not be modified.
+
+        Args:
+            line_a: Old line
+            line_b: New line
+
+        Returns:
+            Tuple of (old spans, new spans), flat (start, end, type) triples
+            of character offsets into each line
+        """
+        cache = InlineDiffer._cache
+        key = (self.granularity, line_a, line_b)
+        spans = cache.get(key)
+        if spans is None:
+            spans = cache[key] = self._compute(line_a, line_b)
+            if len(cache) > self.CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return spans
+
+    def _compute(self, line_a: str, line_b: str) -> Tuple[array, array]:
+        """
+        Diff a line pair without the cache.
+
+        Args:
+            line_a: Old line
+            line_b: New line
+
+        Returns:
+            Tuple of (old spans, new spans)
+        """
+        old_spans, new_spans = array('l'), array('l')
+        if line_a == line_b:
+            return old_spans, new_spans
+
+        if self.granularity == 'char':
+            a: Sequence[str] = line_a
+            b: Sequence[str] = line_b
+        else:
+            a = WORD_PATTERN.findall(line_a)
+            b = WORD_PATTERN.findall(line_b)
+
+        # Common prefix and suffix tokens cannot be part of a change
+        n, m = len(a), len(b)
+        limit = min(n, m)
+        lo = 0
+        while lo < limit and a[lo] == b[lo]:
+            lo += 1
+        hi = 0
+        while hi < limit - lo and a[n - 1 - hi] == b[m - 1 - hi]:
+            hi += 1
+
+        if self.granularity == 'char':
+            offsets_a = offsets_b = None
+        else:
+            # Character offset of every token boundary
+            offsets_a = list(accumulate((len(token) for token in a), initial=0))
+            offsets_b = list(accumulate((len(token) for token in b), initial=0))
+
+        # Pure insertions and deletions, and single changed tokens, need no LCS
+        if n - hi == lo:
+            opcodes = [('insert', 0, 0, 0, m - hi - lo)]
+        elif m - hi == lo:
+            opcodes = [('delete', 0, n - hi - lo, 0, 0)]
+        elif n - hi - lo == 1 and m - hi - lo == 1:
+            opcodes = [('replace', 0, 1, 0, 1)]
+        else:
+            opcodes = sequence_opcodes(a[lo:n - hi], b[lo:m - hi])
+
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                continue
+            i1, i2, j1, j2 = i1 + lo, i2 + lo, j1 + lo, j2 + lo
+            if offsets_a is not None and offsets_b is not None:
+                i1, i2 = offsets_a[i1], offsets_a[i2]
+                j1, j2 = offsets_b[j1], offsets_b[j2]
+            if i1 < i2:
+                old_spans.extend((i1, i2, OP_DELETE if tag == 'delete' else OP_REPLACE))
+            if j1 < j2:
+                new_spans.extend((j1, j2, OP_INSERT if tag == 'insert' else OP_REPLACE))
+        return old_spans, new_spans
+
+    def hunk_spans(self, result: DiffResult) -> List[LineSpans]:
+        """
+        Compute the change spans of the line pairs of a REPLACE result.
+
+        Lines are paired by the result's line_pairs (see fuzzy matching)
+        when set, otherwise by position.
+
+        Args:
+            result: REPLACE diff result
+
+        Returns:
+            List of (old line, new line, old spans, new spans) per line pair,
+            with 0-based line numbers
+        """
+        old_lines, new_lines = result.old_lines, result.new_lines
+        if result.line_pairs is not None:
+            pairs = [(i, j) for i, j in result.line_pairs if i is not None and j is not None]
+        else:
+            pairs = [(i, i) for i in range(min(len(old_lines), len(new_lines)))]
+
+        line_spans = self.line_spans
+        spans: List[LineSpans] = []
+        for i, j in pairs:
+            old_spans, new_spans = line_spans(old_lines[i], new_lines[j])
+            spans.append((result.old_start + i, result.new_start + j, old_spans, new_spans))
+        return spans
+
+    def result_spans(self, results: Sequence[DiffResult]) -> List[LineSpans]:
+        """
+        Compute the change spans of every REPLACE result.
+
+        Args:
+            results: Diff results
+
+        Returns:
+            List of (old line, new line, old spans, new spans) in order
+        """
+        spans: List[LineSpans] = []
+        for result in results:
+            if result.type == DiffType.REPLACE:
+                spans.extend(self.hunk_spans(result))
+        return spans
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Remove all cached line pairs."""
+        cls._cache.clear()
+
+
+def sequence_opcodes(seq_a: Sequence[Any],
+                     seq_b: Sequence[Any]) -> List[Tuple[str, int, int, int, int]]:
+    """
+    Diff two short sequences of words or characters.
+
+    Sequences up to BIT_PARALLEL_LIMIT symbols go through the bit-parallel
+    LCS kernel, which is exact and unaffected by difflib's autojunk
+    heuristic; longer ones fall back to SequenceMatcher.
+
+    Args:
+        seq_a: First sequence
+        seq_b: Second sequence
+
+    Returns:
+        List of (tag, i1, i2, j1, j2) opcodes
+    """
+    if max(len(seq_a), len(seq_b)) <= BIT_PARALLEL_LIMIT:
+        return lcs_opcodes(seq_a, seq_b)
+    opcodes: List[Tuple[str, int, int, int, int]] = list(
+        difflib.SequenceMatcher(None, seq_a, seq_b).get_opcodes())
+    return opcodes
+
+
+def inline_spans(results: Sequence[DiffResult], granularity: str = 'word') -> List[LineSpans]:
+    """
+    Convenience function to compute intra-line spans of diff results.
+
+    Args:
+        results: Diff results
+        granularity: 'word' or 'char'
+
+    Returns:
+        List of (old line, new line, old spans, new spans) in order
+    """
+    return InlineDiffer(granularity).result_spans(results)
@@ -0,0 +1,270 @@
+"""
+Line Aligner - Fuzzy Pairing of Changed Lines
+=============================================
+
+This module pairs the old and new lines of a REPLACE hunk by similarity,
+so a modified line can be shown next to its new version (and diffed
+within the line) even when lines were added or removed around it.
+
+Algorithm Overview:
+------------------
+The similarity of two lines is 2 * LCS / (len_a + len_b) over their
+characters (leading and trailing whitespace ignored). The pairing is the
+order-preserving set of pairs with the largest total similarity, where
+only pairs at or above the threshold count, found by dynamic programming.
+
+To keep large hunks cheap:
+- The DP only visits a band of cells around the hunk's diagonal.
+- Before computing an LCS, two upper bounds on the similarity are checked:
+  the length ratio and the overlap of the character multisets (difflib's
+  real_quick_ratio and quick_ratio). A pair is skipped if a bound is below
+  the threshold, or if even a score equal to the bound could not improve
+  the cell. Most pairs are skipped this way.
+- The LCS itself uses the bit-parallel kernel (core.bit_parallel).
+- Hunks with more lines than the size cap on either side are not paired.
+
+Time Complexity: O(N * W) prefilter checks for a band of width W
+Space Complexity: O(N * W)
+"""
+
+from array import array
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from core.bit_parallel import lcs_length, lcs_length_masked, match_masks
+
+
+# A row of a pairing: (old index, new index), either may be None
+LinePair = Tuple[Optional[int], Optional[int]]
+
+# Traceback moves of the pairing DP
+_STOP, _UP, _LEFT, _PAIR = range(4)
+
+
+class FuzzyLineAligner:
+    """
+    Pairs similar lines between the two sides of a hunk.
+    """
+
+    # Default minimum similarity of paired lines
+    DEFAULT_THRESHOLD = 0.6
+
+    # Default half-width of the DP band, in lines
+    DEFAULT_BAND = 32
+
+    # Default size cap: hunks with more lines on either side are not paired
+    DEFAULT_MAX_LINES = 2000
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD,
+                 band: int = DEFAULT_BAND,
+                 max_lines: int = DEFAULT_MAX_LINES):
+        """
+        Initialize the aligner.
+
+        Args:
+            threshold: Minimum similarity (0.0 to 1.0) of paired lines
+            band: Half-width of the band of the DP around the diagonal
+            max_lines: Largest number of lines per side that is paired
+
+        Raises:
+            ValueError: If an argument is out of range
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"Threshold must be in (0, 1]: {threshold}")
+        if band < 0 or max_lines < 0:
+            raise ValueError("Band and size cap must not be negative")
+
+        self.threshold = threshold
+        self.band = band
+        self.max_lines = max_lines
+
+    def similarity(self, line_a: str, line_b: str) -> float:
+        """
+        Compute the similarity of two lines.
+
+        Args:
+            line_a: First line
+            line_b: Second line
+
+        Returns:
+            2 * LCS / total length, from 0.0 to 1.0
+        """
+        a, b = line_a.strip(), line_b.strip()
+        if not a and not b:
+            return 1.0
+        return 2.0 * lcs_length(a, b) / (len(a) + len(b))
+
+    def pair_lines(self, old_lines: Sequence[str],
+                   new_lines: Sequence[str]) -> List[Tuple[int, int]]:
+        """
+        Find the similar line pairs of a hunk.
+
+        Args:
+            old_lines: Lines removed by the hunk
+            new_lines: Lines added by the hunk
+
+        Returns:
+            (old index, new index) pairs in increasing order; empty if the
+            hunk exceeds the size cap
+        """
+        n, m = len(old_lines), len(new_lines)
+        if not n or not m or n > self.max_lines or m > self.max_lines:
+            return []
+
+        a = [line.strip() for line in old_lines]
+        b = [line.strip() for line in new_lines]
+        # Per-line character counts and match masks, built on first use
+        counts_b: List[Optional['Counter[str]']] = [None] * m
+        masks_b: List[Optional[Dict[Hashable, int]]] = [None] * m
+        threshold = self.threshold
+
+        # Band of columns visited in each row (1-based, inclusive)
+        band = self.band + abs(n - m) // 2
+        los = [0] * (n + 1)
+        his = [0] * (n + 1)
+        for i in range(1, n + 1):
+            center = (i * m + n // 2) // n
+            los[i] = max(1, center - band)
+            his[i] = min(m, center + band)
+
+        values: List['array[float]'] = [array('d')]
+        moves: List[array] = [array('b')]
+
+        def value(i: int, j: int) -> float:
+            # Out-of-band cells: to the right the row's last value carries
+            # over (skipping columns costs nothing), to the left 0.0 is a
+            # safe lower bound
+            if i == 0 or j < los[i]:
+                return 0.0
+            row = values[i]
+            return row[min(j, his[i]) - los[i]]
+
+        for i in range(1, n + 1):
+            lo, hi = los[i], his[i]
+            row_values = array('d', bytes(8 * (hi - lo + 1)))
+            row_moves = array('b', bytes(hi - lo + 1))
+            values.append(row_values)
+            moves.append(row_moves)
+
+            line_a = a[i - 1]
+            len_a = len(line_a)
+            counts_a = None
+            for j in range(lo, hi + 1):
+                best, move = 0.0, _STOP
+                up = value(i - 1, j)
+                if up > best:
+                    best, move = up, _UP
+                if j > lo and row_values[j - 1 - lo] > best:
+                    best, move = row_values[j - 1 - lo], _LEFT
+
+                line_b = b[j - 1]
+                total = len_a + len(line_b)
+                if total == 0:
+                    bound = 1.0
+                else:
+                    # Length bound
+                    bound = 2.0 * min(len_a, len(line_b)) / total
+                diagonal = value(i - 1, j - 1)
+                if bound < threshold or diagonal + bound <= best:
+                    row_values[j - lo] = best
+                    row_moves[j - lo] = move
+                    continue
+
+                if line_a == line_b:
+                    # Typical of reindented code
+                    score = 1.0
+                elif total:
+                    # Character multiset bound, then the exact score
+                    if counts_a is None:
+                        counts_a = Counter(line_a)
+                    counts, masks = counts_b[j - 1], masks_b[j - 1]
+                    if counts is None or masks is None:
+                        counts = counts_b[j - 1] = Counter(line_b)
+                        masks = masks_b[j - 1] = match_masks(line_b)
+                    bound = 2.0 * sum((counts_a & counts).values()) / total
+                    if bound >= threshold and diagonal + bound > best:
+                        score = 2.0 * lcs_length_masked(line_a, masks, len(line_b)) / total
+                    else:
+                        score = 0.0
+                if score >= threshold and diagonal + score > best:
+                    best, move = diagonal + score, _PAIR
+
+                row_values[j - lo] = best
+                row_moves[j - lo] = move
+
+        # Trace the pairs back from the bottom-right corner
+        pairs: List[Tuple[int, int]] = []
+        i, j = n, m
+        while i > 0 and j > 0:
+            j = min(j, his[i])
+            if j < los[i]:
+                break
+            move = moves[i][j - los[i]]
+            if move == _PAIR:
+                pairs.append((i - 1, j - 1))
+                i -= 1
+                j -= 1
+            elif move == _UP:
+                i -= 1
+            elif move == _LEFT:
+                j -= 1
+            else:
+                break
+
+        pairs.reverse()
+        return pairs
+
+    def align(self, old_lines: Sequence[str], new_lines: Sequence[str]) -> List[LinePair]:
+        """
+        Lay out a hunk as rows of paired and unpaired lines.
+
+        Args:
+            old_lines: Lines removed by the hunk
+            new_lines: Lines added by the hunk
+
+        Returns:
+            Rows of (old index, new index) in display order; unpaired lines
+            have None on the other side
+        """
+        return layout_pairs(self.pair_lines(old_lines, new_lines),
+                            len(old_lines), len(new_lines))
+
+
+def layout_pairs(pairs: Sequence[Tuple[int, int]], n: int, m: int) -> List[LinePair]:
+    """
+    Interleave line pairs with the unpaired lines around them.
+
+    Args:
+        pairs: (old index, new index) pairs in increasing order
+        n: Number of old lines
+        m: Number of new lines
+
+    Returns:
+        Rows of (old index, new index); unpaired old lines come before the
+        unpaired new lines of the same gap
+    """
+    rows: List[LinePair] = []
+    i = j = 0
+    for x, y in list(pairs) + [(n, m)]:
+        rows.extend((k, None) for k in range(i, x))
+        rows.extend((None, k) for k in range(j, y))
+        if x < n and y < m:
+            rows.append((x, y))
+        i, j = x + 1, y + 1
+    return rows
+
+
+def align_lines(old_lines: Sequence[str], new_lines: Sequence[str],
+                threshold: float = FuzzyLineAligner.DEFAULT_THRESHOLD) -> List[LinePair]:
+    """
+    Convenience function to pair the lines of a hunk.
+
+    Args:
+        old_lines: Lines removed by the hunk
+        new_lines: Lines added by the hunk
+        threshold: Minimum similarity of paired lines
+
+    Returns:
+        Rows of (old index, new index) in display order
+    """
+    return FuzzyLineAligner(threshold).align(old_lines, new_lines)
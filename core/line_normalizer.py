@@ -0,0 +1,280 @@
+"""
+Line Normalizer - Compiled Preprocessing of Compared Lines
+==========================================================
+
+This module turns lines into the keys the line diff compares, according to
+the ignore options of a comparison:
+
+- ignore_blank_lines / ignore_line_patterns drop lines entirely
+- ignore_leading_whitespace / ignore_trailing_whitespace strip the line
+- ignore_comments removes comments: with the language-aware scanner of
+  core.comment_stripper when the 'language' option names a supported
+  language (and comment_patterns is not set), else comment_patterns matches
+- ignore_whitespace collapses runs of whitespace
+- ignore_case lowercases the line
+
+The options are compiled once: all comment patterns are joined into one
+regex, and so are all ignore patterns, and only the enabled steps run. The
+keys are produced in a single pass together with an index array mapping
+every key back to its original line, so diffs of the keys can be reported
+in the original line numbers (see map_opcodes).
+"""
+
+import re
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Pattern, Sequence, Tuple, Union
+
+from core.comment_stripper import CommentStripper, resolve_language
+from core.myers_algorithm import OPCODE_SIZE, OP_EQUAL
+
+
+# Comment syntaxes removed by ignore_comments unless comment_patterns is set
+DEFAULT_COMMENT_PATTERNS = [
+    r'//.*$',      # C++ style
+    r'#.*$',       # Python style
+    r'/\*.*?\*/',  # C style
+]
+
+
+class LineNormalizer:
+    """
+    Compiled line preprocessing for one set of comparison options.
+    """
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        """
+        Compile the normalization steps.
+
+        Args:
+            options: Comparison options, as for DiffEngine
+
+        Raises:
+            re.error: If a comment or ignore pattern is not a valid regex
+        """
+        options = options or {}
+
+        self.drop_blank = bool(options.get('ignore_blank_lines', False))
+        ignore_patterns = options.get('ignore_line_patterns') or []
+        self._drop_regex = _compile_any(ignore_patterns) if ignore_patterns else None
+
+        # Steps before the ignore patterns are matched
+        steps: List[Callable[[str], str]] = []
+        collapse = options.get('ignore_whitespace', False)
+        # Collapsing whitespace strips both ends anyway
+        if options.get('ignore_leading_whitespace', False) and not collapse:
+            steps.append(str.lstrip)
+        if options.get('ignore_trailing_whitespace', False) and not collapse:
+            steps.append(str.rstrip)
+        # Comments are stripped from whole files when the language is known,
+        # since block comments and strings can span lines
+        self._stripper: Optional[CommentStripper] = None
+        if options.get('ignore_comments', False):
+            language = resolve_language(options.get('language'))
+            if language and 'comment_patterns' not in options:
+                self._stripper = CommentStripper(language)
+            else:
+                patterns = options.get('comment_patterns', DEFAULT_COMMENT_PATTERNS)
+                if patterns:
+                    steps.append(_compile_remover(patterns))
+        self._pre_steps = steps
+
+        # Steps on the final key
+        steps = []
+        if collapse:
+            steps.append(lambda line: ' '.join(line.split()))
+        if options.get('ignore_case', False):
+            steps.append(str.lower)
+        self._post_steps = steps
+
+    @property
+    def drops_lines(self) -> bool:
+        """Whether some lines may be left out of the keys."""
+        return self.drop_blank or self._drop_regex is not None
+
+    @property
+    def spans_lines(self) -> bool:
+        """Whether the key of a line can depend on the lines before it."""
+        return self._stripper is not None
+
+    @property
+    def is_identity(self) -> bool:
+        """Whether the keys are the lines themselves."""
+        return not (self.drops_lines or self._stripper or
+                    self._pre_steps or self._post_steps)
+
+    def normalize(self, lines: Sequence[str],
+                  content_key: Optional[str] = None) -> Tuple[List[str], Optional[array]]:
+        """
+        Compute the comparison keys of a sequence of lines.
+
+        Args:
+            lines: Input lines (a whole file)
+            content_key: Optional hash of the content, used to cache the
+                result of comment stripping
+
+        Returns:
+            Tuple of (keys, index) where index[k] is the position of the
+            line keys[k] was made from, or None if no line was dropped
+        """
+        if self.is_identity:
+            return list(lines), None
+        if self._stripper is not None:
+            lines = self._stripper.strip_cached(lines, content_key)
+
+        transform = self._compose(self._pre_steps + self._post_steps)
+        if not self.drops_lines:
+            return list(map(transform, lines)), None
+
+        pre = self._compose(self._pre_steps)
+        post = self._compose(self._post_steps)
+        drop_blank = self.drop_blank
+        search = self._drop_regex.search if self._drop_regex is not None else None
+
+        keys: List[str] = []
+        index = array('l')
+        for i, line in enumerate(lines):
+            line = pre(line)
+            # Lines left empty by comment removal count as blank
+            if drop_blank and not line.strip():
+                continue
+            if search is not None and search(line):
+                continue
+            keys.append(post(line))
+            index.append(i)
+
+        if len(index) == len(lines):
+            return keys, None
+        return keys, index
+
+    @staticmethod
+    def _compose(steps: List[Callable[[str], str]]) -> Callable[[str], str]:
+        """
+        Chain normalization steps into one function.
+
+        Args:
+            steps: Functions applied in order
+
+        Returns:
+            Function applying all steps
+        """
+        if not steps:
+            return lambda line: line
+        if len(steps) == 1:
+            return steps[0]
+        if len(steps) == 2:
+            first, second = steps
+            return lambda line: second(first(line))
+
+        def apply(line: str) -> str:
+            for step in steps:
+                line = step(line)
+            return line
+        return apply
+
+
+def _compile_any(patterns: Sequence[str]) -> Union[Pattern[str], '_AnyPattern']:
+    """
+    Compile patterns into one regex matching wherever any of them matches.
+
+    Args:
+        patterns: Regex patterns
+
+    Returns:
+        Compiled alternation of the patterns
+    """
+    if len(patterns) == 1:
+        return re.compile(patterns[0])
+    compiled = [re.compile(pattern) for pattern in patterns]
+    if any(regex.groups or regex.flags & ~re.UNICODE for regex in compiled):
+        # Group references and inline flags do not survive being joined,
+        # so match the patterns one by one
+        return _AnyPattern(compiled)
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+
+
+def _compile_remover(patterns: Sequence[str]) -> Callable[[str], str]:
+    """
+    Build a function that deletes every match of the given patterns.
+
+    Args:
+        patterns: Regex patterns
+
+    Returns:
+        Function from a line to the line without the matches
+    """
+    regex = _compile_any(patterns)
+    if isinstance(regex, _AnyPattern):
+        subs = [pattern.sub for pattern in regex.patterns]
+
+        def remove(line: str) -> str:
+            for sub in subs:
+                line = sub('', line)
+            return line
+        return remove
+
+    sub = regex.sub
+    return lambda line: sub('', line)
+
+
+class _AnyPattern:
+    """Fallback for patterns that cannot be joined into one regex."""
+
+    def __init__(self, patterns: List[Pattern[str]]) -> None:
+        self.patterns = patterns
+
+    def search(self, line: str) -> bool:
+        return any(pattern.search(line) for pattern in self.patterns)
+
+
+def map_opcodes(ops: array, index_a: Optional[array], index_b: Optional[array]) -> array:
+    """
+    Translate a packed edit script of keys into original line numbers.
+
+    Lines dropped by the normalizer belong to no run: EQUAL runs are split
+    around them, so every run still views a contiguous block of original
+    lines. Edit runs cover their lines and any dropped lines between them,
+    and empty sides start right after the preceding kept line.
+
+    Args:
+        ops: Packed opcodes over the keys
+        index_a: Original position of every key of A (None for identity)
+        index_b: Original position of every key of B (None for identity)
+
+    Returns:
+        Packed opcodes over the original lines
+    """
+    if index_a is None and index_b is None:
+        return ops
+
+    def start(index: Optional[array], k: int) -> int:
+        if index is None:
+            return k
+        return index[k - 1] + 1 if k else 0
+
+    def position(index: Optional[array], k: int) -> int:
+        return k if index is None else index[k]
+
+    mapped = array('l')
+    for r in range(0, len(ops), OPCODE_SIZE):
+        tag, i1, i2, j1, j2 = ops[r:r + OPCODE_SIZE]
+
+        if tag != OP_EQUAL:
+            x1 = position(index_a, i1) if i1 < i2 else start(index_a, i1)
+            x2 = position(index_a, i2 - 1) + 1 if i1 < i2 else x1
+            y1 = position(index_b, j1) if j1 < j2 else start(index_b, j1)
+            y2 = position(index_b, j2 - 1) + 1 if j1 < j2 else y1
+            mapped.extend((tag, x1, x2, y1, y2))
+            continue
+
+        # Split the EQUAL run wherever either side skips a dropped line
+        x = x1 = position(index_a, i1)
+        y = y1 = position(index_b, j1)
+        for k in range(1, i2 - i1):
+            next_x = position(index_a, i1 + k)
+            next_y = position(index_b, j1 + k)
+            if next_x != x + 1 or next_y != y + 1:
+                mapped.extend((OP_EQUAL, x1, x + 1, y1, y + 1))
+                x1, y1 = next_x, next_y
+            x, y = next_x, next_y
+        mapped.extend((OP_EQUAL, x1, x + 1, y1, y + 1))
+    return mapped
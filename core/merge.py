@@ -0,0 +1,296 @@
+"""
+Merge - Hunk-Aligned Three-Way Merge
+====================================
+
+This module merges two versions of a file that were both derived from a
+common base, in the manner of diff3.
+
+Algorithm Overview:
+------------------
+1. Diff base against each side; every non-equal result is a hunk that
+   replaces a base range with a range of that side.
+2. Walk both hunk lists in lockstep, in base order. Hunks that overlap or
+   touch, on either side, are grouped into one chunk; the base lines
+   between chunks are unchanged on both sides.
+3. For every chunk, the range of each side that corresponds to the
+   chunk's base range follows from the side's first and last hunk in the
+   chunk (or from the side's running line offset if it has none there).
+4. A chunk changed by one side takes that side's lines; one changed by
+   both takes them if both sides agree, and is a conflict otherwise.
+
+Chunks only hold line ranges and are produced one at a time, so the merged
+file is streamed to its writer without being built in memory.
+
+Time Complexity: O(N + H) after the two diffs, for N lines and H hunks
+Space Complexity: O(H)
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from core.cancellation import CancellationToken
+from core.diff_engine import DiffEngine
+from core.myers_algorithm import DiffResult, DiffType
+
+
+# Chunk kinds
+UNCHANGED = 'unchanged'
+YOURS = 'yours'
+THEIRS = 'theirs'
+BOTH = 'both'            # Both sides made the same change
+CONFLICT = 'conflict'
+
+# A change of one side: (base start, base end, side start, side end)
+Hunk = Tuple[int, int, int, int]
+
+
+@dataclass
+class MergeChunk:
+    """A run of base lines and the matching lines of both sides."""
+    kind: str
+    base_start: int
+    base_end: int
+    yours_start: int
+    yours_end: int
+    theirs_start: int
+    theirs_end: int
+
+
+class ThreeWayMerger:
+    """
+    Streams the diff3 merge of two versions of a base file.
+    """
+
+    # Engine options used by the merge. Lines are always compared exactly:
+    # an edit hidden by a normalizing option (case, whitespace, comments,
+    # ignored lines) would look unchanged and be lost from the merged file
+    KEPT_OPTIONS = ('algorithm', 'parallel', 'max_workers')
+
+    # Length of conflict markers
+    MARKER_SIZE = 7
+
+    def __init__(self, engine: Optional[DiffEngine] = None,
+                 labels: Tuple[str, str, str] = ('YOURS', 'BASE', 'THEIRS')):
+        """
+        Initialize the merger.
+
+        Args:
+            engine: Diff engine whose algorithm, execution options and cache
+                are used (its normalizing options are not)
+            labels: Names of (yours, base, theirs) shown on conflict markers
+        """
+        options = {}
+        if engine is not None:
+            options = {option: engine.options[option]
+                       for option in self.KEPT_OPTIONS if option in engine.options}
+        self.engine = DiffEngine(options, engine.cache if engine is not None else None)
+        self.labels = labels
+
+    def merge_chunks(self, base: Sequence[str], yours: Sequence[str],
+                     theirs: Sequence[str],
+                     token: Optional[CancellationToken] = None) -> Iterator[MergeChunk]:
+        """
+        Compute the chunks of the merge.
+
+        Args:
+            base: Base version lines
+            yours: Your version lines
+            theirs: Their version lines
+            token: Optional cancellation token for the diffs
+
+        Yields:
+            MergeChunk objects covering the base in order
+
+        Raises:
+            OperationCancelled: If the token is cancelled or expires
+        """
+        yours_hunks = _hunks(self.engine.compare_lines(base, yours, token))
+        theirs_hunks = _hunks(self.engine.compare_lines(base, theirs, token))
+
+        iy = it = 0
+        # Offset of each side's lines from base lines after the last chunk
+        dy = dt = 0
+        pos = 0
+        while iy < len(yours_hunks) or it < len(theirs_hunks):
+            # Start the chunk with the hunk that comes first in base order
+            if it == len(theirs_hunks) or (iy < len(yours_hunks) and
+                                           yours_hunks[iy][0] <= theirs_hunks[it][0]):
+                lo, hi = yours_hunks[iy][0], yours_hunks[iy][1]
+            else:
+                lo, hi = theirs_hunks[it][0], theirs_hunks[it][1]
+
+            # Take in every hunk that overlaps or touches the chunk so far
+            y_first, t_first = iy, it
+            while True:
+                if iy < len(yours_hunks) and yours_hunks[iy][0] <= hi:
+                    hi = max(hi, yours_hunks[iy][1])
+                    iy += 1
+                elif it < len(theirs_hunks) and theirs_hunks[it][0] <= hi:
+                    hi = max(hi, theirs_hunks[it][1])
+                    it += 1
+                else:
+                    break
+
+            if pos < lo:
+                yield MergeChunk(UNCHANGED, pos, lo, pos + dy, lo + dy, pos + dt, lo + dt)
+
+            ys, ye = _side_range(yours_hunks[y_first:iy], lo, hi, dy)
+            ts, te = _side_range(theirs_hunks[t_first:it], lo, hi, dt)
+            if t_first == it:
+                kind = YOURS
+            elif y_first == iy:
+                kind = THEIRS
+            elif yours[ys:ye] == theirs[ts:te]:
+                kind = BOTH
+            else:
+                kind = CONFLICT
+            yield MergeChunk(kind, lo, hi, ys, ye, ts, te)
+
+            dy, dt = ye - hi, te - hi
+            pos = hi
+
+        if pos < len(base):
+            yield MergeChunk(UNCHANGED, pos, len(base), pos + dy, len(base) + dy,
+                             pos + dt, len(base) + dt)
+
+    def iter_blocks(self, base: Sequence[str], yours: Sequence[str],
+                    theirs: Sequence[str],
+                    token: Optional[CancellationToken] = None
+                    ) -> Iterator[Tuple[MergeChunk, List[str]]]:
+        """
+        Produce the merged file block by block.
+
+        Args:
+            base: Base version lines
+            yours: Your version lines
+            theirs: Their version lines
+            token: Optional cancellation token for the diffs
+
+        Yields:
+            (chunk, merged lines of the chunk); conflicts are written as
+            diff3 conflict blocks with markers
+        """
+        yours_label, base_label, theirs_label = self.labels
+        size = self.MARKER_SIZE
+        for chunk in self.merge_chunks(base, yours, theirs, token):
+            if chunk.kind == UNCHANGED:
+                lines = base[chunk.base_start:chunk.base_end]
+            elif chunk.kind == THEIRS:
+                lines = theirs[chunk.theirs_start:chunk.theirs_end]
+            elif chunk.kind != CONFLICT:
+                lines = yours[chunk.yours_start:chunk.yours_end]
+            else:
+                lines = [f"{'<' * size} {yours_label}"]
+                lines.extend(yours[chunk.yours_start:chunk.yours_end])
+                lines.append(f"{'|' * size} {base_label}")
+                lines.extend(base[chunk.base_start:chunk.base_end])
+                lines.append('=' * size)
+                lines.extend(theirs[chunk.theirs_start:chunk.theirs_end])
+                lines.append(f"{'>' * size} {theirs_label}")
+            yield chunk, list(lines)
+
+    def write(self, base: Sequence[str], yours: Sequence[str], theirs: Sequence[str],
+              stream: TextIO, token: Optional[CancellationToken] = None) -> List[MergeChunk]:
+        """
+        Write the merged file to a stream.
+
+        Args:
+            base: Base version lines
+            yours: Your version lines
+            theirs: Their version lines
+            stream: Text stream to write to (one '\\n' after every line)
+            token: Optional cancellation token for the diffs
+
+        Returns:
+            List of conflict chunks
+        """
+        conflicts = []
+        for chunk, lines in self.iter_blocks(base, yours, theirs, token):
+            if chunk.kind == CONFLICT:
+                conflicts.append(chunk)
+            if lines:
+                stream.write('\n'.join(lines))
+                stream.write('\n')
+        return conflicts
+
+    def merge(self, base: Sequence[str], yours: Sequence[str], theirs: Sequence[str],
+              token: Optional[CancellationToken] = None
+              ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Merge into a list of lines.
+
+        Args:
+            base: Base version lines
+            yours: Your version lines
+            theirs: Their version lines
+            token: Optional cancellation token for the diffs
+
+        Returns:
+            Tuple of (merged_lines, conflicts), where each conflict is a dict
+            with 'line' (base line), 'base_lines', 'yours_lines' and
+            'theirs_lines'
+        """
+        merged_lines: List[str] = []
+        conflicts: List[Dict[str, Any]] = []
+        for chunk, lines in self.iter_blocks(base, yours, theirs, token):
+            if chunk.kind == CONFLICT:
+                conflicts.append({
+                    'line': chunk.base_start,
+                    'base_lines': list(base[chunk.base_start:chunk.base_end]),
+                    'yours_lines': list(yours[chunk.yours_start:chunk.yours_end]),
+                    'theirs_lines': list(theirs[chunk.theirs_start:chunk.theirs_end]),
+                })
+            merged_lines.extend(lines)
+        return merged_lines, conflicts
+
+
+def _hunks(results: Sequence[DiffResult]) -> List[Hunk]:
+    """
+    Extract the changes of a diff.
+
+    Args:
+        results: Diff results of base against one side
+
+    Returns:
+        (base start, base end, side start, side end) of every change
+    """
+    return [(r.old_start, r.old_start + r.old_count, r.new_start, r.new_start + r.new_count)
+            for r in results if r.type != DiffType.EQUAL]
+
+
+def _side_range(hunks: Sequence[Hunk], lo: int, hi: int, offset: int) -> Tuple[int, int]:
+    """
+    Find the lines of a side that correspond to a base range.
+
+    Args:
+        hunks: The side's hunks within the range, in order
+        lo: Start of the base range
+        hi: End of the base range
+        offset: Side line minus base line before the range
+
+    Returns:
+        (start, end) of the side's lines
+    """
+    if not hunks:
+        return lo + offset, hi + offset
+    first, last = hunks[0], hunks[-1]
+    return first[2] - (first[0] - lo), last[3] + (hi - last[1])
+
+
+def merge_files(base: Sequence[str], yours: Sequence[str], theirs: Sequence[str],
+                stream: TextIO,
+                labels: Tuple[str, str, str] = ('YOURS', 'BASE', 'THEIRS')) -> int:
+    """
+    Convenience function to write a three-way merge to a stream.
+
+    Args:
+        base: Base version lines
+        yours: Your version lines
+        theirs: Their version lines
+        stream: Text stream to write to
+        labels: Names of (yours, base, theirs) shown on conflict markers
+
+    Returns:
+        Number of conflicts
+    """
+    return len(ThreeWayMerger(labels=labels).write(base, yours, theirs, stream))
@@ -0,0 +1,310 @@
+"""
+Move Detector - Moved Block Detection
+=====================================
+
+This module finds blocks of lines that were deleted in one place and
+inserted in another, and marks them as MOVED instead of as unrelated
+deletions and insertions.
+
+Algorithm Overview:
+------------------
+1. Collect the deleted lines (DELETE results and the old side of REPLACE
+   results) and the inserted lines (INSERT and the new side of REPLACE),
+   comparing lines without their leading and trailing whitespace, so that
+   re-indented blocks are found too.
+2. Index every window of min_lines consecutive deleted lines by a
+   polynomial rolling hash.
+3. Slide a window over each run of inserted lines, rolling its hash along.
+   On a hit the candidates are verified and extended line by line; the
+   longest one becomes a move, its deleted lines are taken so they cannot
+   be moved twice, and the scan continues after it.
+
+Windows made up only of lines without letters or digits (blank lines,
+braces) never start a move, and blocks replaced in place (both copies in
+the same REPLACE result) are not moves.
+
+Time Complexity: O(N + M) expected, for N deleted and M inserted lines
+Space Complexity: O(N)
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.myers_algorithm import DiffResult, DiffType
+
+
+class MoveDetector:
+    """
+    Finds moved blocks in diff results and tags them as MOVED.
+    """
+
+    # Default length of the shortest block reported as a move
+    DEFAULT_MIN_LINES = 3
+
+    # Candidates verified per hash hit, to bound the cost of common blocks
+    MAX_CANDIDATES = 8
+
+    # Rolling hash base and modulus (a Mersenne prime)
+    HASH_BASE = 1000003
+    HASH_MOD = (1 << 61) - 1
+
+    def __init__(self, min_lines: int = DEFAULT_MIN_LINES):
+        """
+        Initialize the detector.
+
+        Args:
+            min_lines: Length of the shortest block reported as a move
+
+        Raises:
+            ValueError: If min_lines is less than 1
+        """
+        if min_lines < 1:
+            raise ValueError(f"min_lines must be at least 1: {min_lines}")
+        self.min_lines = min_lines
+
+    def find_moves(self, results: Sequence[DiffResult]) -> List[Tuple[int, int, int]]:
+        """
+        Find moved blocks.
+
+        Args:
+            results: Diff results in order
+
+        Returns:
+            List of (old_start, new_start, count) moves, in the order of
+            their new position
+        """
+        k = self.min_lines
+        ids: Dict[str, int] = {}
+        # Line IDs that can start a move (the line has letters or digits)
+        significant: List[bool] = []
+
+        def intern(lines: Sequence[str]) -> List[int]:
+            run = []
+            for line in lines:
+                key = line.strip()
+                line_id = ids.get(key)
+                if line_id is None:
+                    line_id = ids[key] = len(ids)
+                    significant.append(any(c.isalnum() for c in key))
+                run.append(line_id)
+            return run
+
+        # Runs of deleted and inserted lines: (result index, start, line IDs)
+        deleted: List[Tuple[int, int, List[int]]] = []
+        inserted: List[Tuple[int, int, List[int]]] = []
+        for position, result in enumerate(results):
+            if result.type in (DiffType.DELETE, DiffType.REPLACE) and result.old_count >= k:
+                deleted.append((position, result.old_start, intern(result.old_lines)))
+            if result.type in (DiffType.INSERT, DiffType.REPLACE) and result.new_count >= k:
+                inserted.append((position, result.new_start, intern(result.new_lines)))
+        if not deleted or not inserted:
+            return []
+
+        base, mod = self.HASH_BASE, self.HASH_MOD
+        top = pow(base, k - 1, mod)
+
+        # Index of deleted windows: hash -> [(run, offset)]
+        index: Dict[int, List[Tuple[int, int]]] = {}
+        for r, (_, _, run) in enumerate(deleted):
+            for offset, window_hash in self._window_hashes(run, significant):
+                index.setdefault(window_hash, []).append((r, offset))
+        used = [bytearray(len(run)) for _, _, run in deleted]
+
+        moves: List[Tuple[int, int, int]] = []
+        for result_index, new_start, run in inserted:
+            p = 0
+            h: Optional[int] = None
+            while p + k <= len(run):
+                if h is None:
+                    h = 0
+                    for line_id in run[p:p + k]:
+                        h = (h * base + line_id + 1) % mod
+
+                best_length, best = 0, (0, 0)
+                if any(significant[line_id] for line_id in run[p:p + k]):
+                    for r, offset in index.get(h, ())[:self.MAX_CANDIDATES]:
+                        if deleted[r][0] == result_index:
+                            continue
+                        length = self._match_length(deleted[r][2], offset, used[r], run, p)
+                        if length > best_length:
+                            best_length, best = length, (r, offset)
+
+                if best_length >= k:
+                    r, offset = best
+                    used[r][offset:offset + best_length] = b'\x01' * best_length
+                    moves.append((deleted[r][1] + offset, new_start + p, best_length))
+                    p += best_length
+                    h = None
+                else:
+                    if p + k < len(run):
+                        h = ((h - (run[p] + 1) * top) * base + run[p + k] + 1) % mod
+                    p += 1
+
+        return moves
+
+    def _window_hashes(self, run: List[int],
+                       significant: List[bool]) -> Iterator[Tuple[int, int]]:
+        """
+        Yield the rolling hash of every window of a run.
+
+        Windows without a significant line are skipped.
+
+        Args:
+            run: Line IDs
+            significant: Whether each line ID can start a move
+
+        Yields:
+            (offset, hash) for every window
+        """
+        k = self.min_lines
+        base, mod = self.HASH_BASE, self.HASH_MOD
+        top = pow(base, k - 1, mod)
+
+        h = 0
+        # Number of significant lines in the current window
+        count = 0
+        for i, line_id in enumerate(run):
+            h = (h * base + line_id + 1) % mod
+            count += significant[line_id]
+            if i >= k:
+                old = run[i - k]
+                h = (h - (old + 1) * top * base) % mod
+                count -= significant[old]
+            if i >= k - 1 and count:
+                yield i - k + 1, h
+
+    @staticmethod
+    def _match_length(source: List[int], offset: int, used: bytearray,
+                      target: List[int], p: int) -> int:
+        """
+        Count the equal, unused lines of two runs from the given offsets.
+
+        Args:
+            source: Deleted line IDs
+            offset: Start in the deleted run
+            used: Deleted lines that already belong to a move
+            target: Inserted line IDs
+            p: Start in the inserted run
+
+        Returns:
+            Length of the match
+        """
+        length = 0
+        limit = min(len(source) - offset, len(target) - p)
+        while (length < limit and not used[offset + length] and
+               source[offset + length] == target[p + length]):
+            length += 1
+        return length
+
+    def apply(self, results: List[DiffResult]) -> List[DiffResult]:
+        """
+        Tag moved blocks in diff results.
+
+        Results containing moved lines are split: their lines in A become
+        DELETE and MOVED (moved away) results, their lines in B INSERT and
+        MOVED (moved here) results, and the last DELETE is joined with the
+        first INSERT into a REPLACE. Each MOVED result's move_link holds the
+        start line of the block's other copy.
+
+        Args:
+            results: Diff results in order
+
+        Returns:
+            New list of results
+        """
+        moves = self.find_moves(results)
+        if not moves:
+            return results
+
+        # Moved ranges by start line: A start -> (count, B start) and back
+        moved_out = {old: (count, new) for old, new, count in moves}
+        moved_in = {new: (count, old) for old, new, count in moves}
+
+        tagged: List[DiffResult] = []
+        for result in results:
+            if result.type == DiffType.EQUAL:
+                tagged.append(result)
+                continue
+
+            old_pieces = _split(result.old_start, result.old_count, moved_out)
+            new_pieces = _split(result.new_start, result.new_count, moved_in)
+            if all(link is None for _, _, link in old_pieces + new_pieces):
+                tagged.append(result)
+                continue
+
+            old_end = result.old_start + result.old_count
+            pieces: List[DiffResult] = []
+            for start, end, link in old_pieces:
+                lines = result.old_lines[start - result.old_start:end - result.old_start]
+                piece = DiffResult(DiffType.DELETE if link is None else DiffType.MOVED,
+                                   start, end - start, result.new_start, 0,
+                                   old_lines=lines, new_lines=[])
+                piece.move_link = link
+                pieces.append(piece)
+
+            for start, end, link in new_pieces:
+                lines = result.new_lines[start - result.new_start:end - result.new_start]
+                if (link is None and pieces and pieces[-1].type == DiffType.DELETE and
+                        pieces[-1].old_start + pieces[-1].old_count == old_end):
+                    # Unmoved lines on both sides still form a replacement
+                    deleted = pieces.pop()
+                    piece = DiffResult(DiffType.REPLACE, deleted.old_start, deleted.old_count,
+                                       start, end - start,
+                                       old_lines=deleted.old_lines, new_lines=lines)
+                else:
+                    piece = DiffResult(DiffType.INSERT if link is None else DiffType.MOVED,
+                                       old_end, 0, start, end - start,
+                                       old_lines=[], new_lines=lines)
+                    piece.move_link = link
+                pieces.append(piece)
+
+            tagged.extend(pieces)
+
+        return tagged
+
+
+def _split(start: int, count: int,
+           moved: Dict[int, Tuple[int, int]]) -> List[Tuple[int, int, Optional[int]]]:
+    """
+    Cut one side of a result at the boundaries of moved blocks.
+
+    Args:
+        start: First line of the side
+        count: Number of lines on the side
+        moved: Moved blocks on this side: start -> (count, other side start)
+
+    Returns:
+        (start, end, link) pieces; link is the other copy's start line for
+        moved pieces and None for the rest
+    """
+    pieces: List[Tuple[int, int, Optional[int]]] = []
+    end = start + count
+    piece_start = position = start
+    while position < end:
+        block = moved.get(position)
+        if block is None:
+            position += 1
+            continue
+        if piece_start < position:
+            pieces.append((piece_start, position, None))
+        block_count, link = block
+        pieces.append((position, position + block_count, link))
+        position += block_count
+        piece_start = position
+    if piece_start < end:
+        pieces.append((piece_start, end, None))
+    return pieces
+
+
+def detect_moves(results: List[DiffResult],
+                 min_lines: int = MoveDetector.DEFAULT_MIN_LINES) -> List[DiffResult]:
+    """
+    Convenience function to tag moved blocks in diff results.
+
+    Args:
+        results: Diff results in order
+        min_lines: Length of the shortest block reported as a move
+
+    Returns:
+        New list of results with moves tagged
+    """
+    return MoveDetector(min_lines).apply(results)
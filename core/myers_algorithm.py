@@ -24,14 +24,28 @@ where:
 The algorithm explores the edit graph in increasing "edit distance" (D) until
 it finds a path from (0,0) to (N,M) where N and M are the lengths of the sequences.
 
+Two engines are provided:
+- "greedy": the basic forward search, which keeps a trace of every V vector
+  for backtracking (O(D^2) extra space).
+- "linear": the divide-and-conquer refinement that bisects each box at its
+  "middle snake" (section 4b of the paper), using O(N+M) space.
+
+Small inputs are handed to the bit-parallel LCS kernel ("bitparallel", see
+core.bit_parallel) instead, whose cost does not grow with D.
+
 Time Complexity: O((N+M)D) where D is the edit distance
-Space Complexity: O(N+M)
+Space Complexity: O(D^2) for "greedy", O(N+M) for "linear"
 """
 
-from typing import List, Tuple, Optional, Dict, Any
-from dataclasses import dataclass
+from array import array
+from collections import Counter
+from typing import (List, Tuple, Optional, Dict, Any, Hashable, Iterable, Iterator, Sequence,
+                    TextIO, Union, cast, overload)
 from enum import Enum
 
+from core.bit_parallel import BIT_PARALLEL_LIMIT, lcs_length, lcs_path
+from core.cancellation import CancellationToken, OperationCancelled
+
 
 class DiffType(Enum):
     """Type of difference between two sequences."""
@@ -39,29 +53,171 @@ class DiffType(Enum):
     INSERT = "insert"    # Line exists only in sequence B
     DELETE = "delete"    # Line exists only in sequence A
     REPLACE = "replace"  # Line was modified
+    MOVED = "moved"      # Lines were moved (only in A: moved away, only in B: moved here)
+
+
+# Packed opcodes store the type as an index into this tuple
+OPCODE_TYPES = (DiffType.EQUAL, DiffType.INSERT, DiffType.DELETE, DiffType.REPLACE)
+OP_EQUAL, OP_INSERT, OP_DELETE, OP_REPLACE = range(4)
+
+# Number of integers per packed opcode: (type, i1, i2, j1, j2)
+OPCODE_SIZE = 5
+
+
+class LineView(Sequence[str]):
+    """
+    Read-only view of a contiguous run of lines in a larger sequence.
+    
+    Diff results hand these out instead of copied slices, so unchanged
+    regions do not keep a second copy of the compared files alive. Slicing
+    a view returns a plain list.
+    """
+    __slots__ = ('_lines', '_start', '_stop')
+
+    def __init__(self, lines: Sequence[str], start: int, stop: int):
+        """
+        Initialize the view.
+        
+        Args:
+            lines: Underlying sequence of lines
+            start: First line of the view
+            stop: End of the view (exclusive)
+        """
+        self._lines = lines
+        self._start = start
+        self._stop = max(start, min(stop, len(lines)))
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self._lines[i] for i in range(self._start, self._stop)[index]]
+        length = self._stop - self._start
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("LineView index out of range")
+        return self._lines[self._start + index]
+
+    def __iter__(self) -> Iterator[str]:
+        lines = self._lines
+        for i in range(self._start, self._stop):
+            yield lines[i]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (LineView, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(x == y for x, y in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(list(self))
 
 
-@dataclass
 class DiffResult:
     """
     Represents a single difference operation.
     
+    Results produced by the diff engines keep a reference to the compared
+    sequences and expose their lines as lazy LineView objects. Lines passed
+    in explicitly are stored and returned as given.
+    
     Attributes:
-        type: Type of operation (EQUAL, INSERT, DELETE, REPLACE)
+        type: Type of operation (EQUAL, INSERT, DELETE, REPLACE, MOVED)
         old_start: Starting line number in sequence A (0-indexed)
         old_count: Number of lines affected in sequence A
         new_start: Starting line number in sequence B (0-indexed)
         new_count: Number of lines affected in sequence B
         old_lines: Lines from sequence A
         new_lines: Lines from sequence B
+        line_pairs: For REPLACE results aligned by fuzzy matching, rows of
+            (old index, new index) into old_lines/new_lines in display
+            order, with None for unpaired lines; None if not aligned
+        move_link: For MOVED results, the start line of the block's other
+            copy (in B if the block was moved away, in A if moved here)
     """
-    type: DiffType
-    old_start: int
-    old_count: int
-    new_start: int
-    new_count: int
-    old_lines: List[str]
-    new_lines: List[str]
+    __slots__ = ('type', 'old_start', 'old_count', 'new_start', 'new_count',
+                 '_old_lines', '_new_lines', '_source_a', '_source_b', 'line_pairs',
+                 'move_link')
+
+    def __init__(self, type: DiffType, old_start: int, old_count: int,
+                 new_start: int, new_count: int,
+                 old_lines: Optional[Sequence[str]] = None,
+                 new_lines: Optional[Sequence[str]] = None,
+                 source_a: Optional[Sequence[str]] = None,
+                 source_b: Optional[Sequence[str]] = None):
+        """
+        Initialize the result.
+        
+        Args:
+            type: Type of operation
+            old_start: Starting line number in sequence A
+            old_count: Number of lines affected in sequence A
+            new_start: Starting line number in sequence B
+            new_count: Number of lines affected in sequence B
+            old_lines: Explicit lines from sequence A
+            new_lines: Explicit lines from sequence B
+            source_a: Full sequence A to view into when old_lines is None
+            source_b: Full sequence B to view into when new_lines is None
+        """
+        self.type = type
+        self.old_start = old_start
+        self.old_count = old_count
+        self.new_start = new_start
+        self.new_count = new_count
+        self._old_lines = old_lines
+        self._new_lines = new_lines
+        self._source_a = source_a
+        self._source_b = source_b
+        self.line_pairs: Optional[List[Tuple[Optional[int], Optional[int]]]] = None
+        self.move_link: Optional[int] = None
+
+    @property
+    def old_lines(self) -> Sequence[str]:
+        """Lines from sequence A."""
+        if self._old_lines is not None:
+            return self._old_lines
+        if self._source_a is None:
+            return []
+        return LineView(self._source_a, self.old_start, self.old_start + self.old_count)
+
+    @old_lines.setter
+    def old_lines(self, lines: Sequence[str]) -> None:
+        self._old_lines = lines
+
+    @property
+    def new_lines(self) -> Sequence[str]:
+        """Lines from sequence B."""
+        if self._new_lines is not None:
+            return self._new_lines
+        if self._source_b is None:
+            return []
+        return LineView(self._source_b, self.new_start, self.new_start + self.new_count)
+
+    @new_lines.setter
+    def new_lines(self, lines: Sequence[str]) -> None:
+        self._new_lines = lines
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DiffResult):
+            return NotImplemented
+        return (self.type == other.type and
+                self.old_start == other.old_start and
+                self.old_count == other.old_count and
+                self.new_start == other.new_start and
+                self.new_count == other.new_count and
+                list(self.old_lines) == list(other.old_lines) and
+                list(self.new_lines) == list(other.new_lines))
+
+    __hash__ = None  # type: ignore[assignment]
 
     def __repr__(self) -> str:
         return (f"DiffResult(type={self.type.value}, "
@@ -77,20 +233,44 @@ class MyersDiff:
     using the Myers' O(ND) algorithm.
     """
 
-    def __init__(self, seq_a: List[str], seq_b: List[str],
+    # Supported search engines
+    ALGORITHMS = ('greedy', 'linear', 'bitparallel')
+
+    # Combined input size (in lines) above which the linear-space engine is
+    # used when no algorithm is requested explicitly
+    LINEAR_SPACE_THRESHOLD = 20000
+
+    # Edit cost after which a search polls its cancellation token, and the
+    # cost at which the linear engine settles for a heuristic split once the
+    # deadline has passed (GNU diff's "too expensive" cutoff)
+    TOO_EXPENSIVE_COST = 64
+
+    def __init__(self, seq_a: Sequence[Hashable], seq_b: Sequence[Hashable],
                  ignore_case: bool = False,
                  ignore_whitespace: bool = False,
-                 ignore_blank_lines: bool = False):
+                 ignore_blank_lines: bool = False,
+                 algorithm: Optional[str] = None):
         """
         Initialize the Myers diff calculator.
         
         Args:
-            seq_a: First sequence (list of lines)
-            seq_b: Second sequence (list of lines)
+            seq_a: First sequence (list of lines, or of any hashable
+                tokens if no ignore option is set and compute() is not used)
+            seq_b: Second sequence (likewise)
             ignore_case: Whether to ignore case when comparing
             ignore_whitespace: Whether to ignore whitespace differences
             ignore_blank_lines: Whether to ignore blank lines
+            algorithm: Search engine, "greedy", "linear" or "bitparallel"
+                (None picks "bitparallel" when neither side is longer than
+                BIT_PARALLEL_LIMIT lines, and "linear" above
+                LINEAR_SPACE_THRESHOLD lines)
+            
+        Raises:
+            ValueError: If the algorithm name is not supported
         """
+        if algorithm is not None and algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unknown diff algorithm: {algorithm}")
+        
         self.seq_a = seq_a
         self.seq_b = seq_b
         self.ignore_case = ignore_case
@@ -103,19 +283,43 @@ class MyersDiff:
         
         self.n = len(self.processed_a)
         self.m = len(self.processed_b)
+        
+        # Integer token for every processed line; the search loops compare
+        # these instead of strings
+        self.ids_a, self.ids_b = self._intern_lines()
+        
+        # Packed edit script, filled in by compute_opcodes()
+        self._opcodes: Optional[array] = None
+        
+        # Token polled by the searches while compute_opcodes() runs
+        self._token: Optional[CancellationToken] = None
+        # Set once the token's deadline has passed during a search
+        self.too_expensive = False
+        
+        if algorithm is None:
+            if max(self.n, self.m) <= BIT_PARALLEL_LIMIT:
+                algorithm = 'bitparallel'
+            elif self.n + self.m > self.LINEAR_SPACE_THRESHOLD:
+                algorithm = 'linear'
+            else:
+                algorithm = 'greedy'
+        self.algorithm = algorithm
 
-    def _preprocess_sequence(self, seq: List[str]) -> List[str]:
+    def _preprocess_sequence(self, seq: Sequence[Hashable]) -> List[Hashable]:
         """
         Preprocess sequence based on ignore options.
         
         Args:
-            seq: Input sequence
+            seq: Input sequence (lines if an ignore option is set)
             
         Returns:
             Processed sequence
         """
-        processed = []
-        for line in seq:
+        if not (self.ignore_blank_lines or self.ignore_whitespace or self.ignore_case):
+            return list(seq)
+        
+        processed: List[Hashable] = []
+        for line in cast(Sequence[str], seq):
             # Skip blank lines if requested
             if self.ignore_blank_lines and not line.strip():
                 continue
@@ -131,74 +335,541 @@ class MyersDiff:
         
         return processed
 
-    def compute(self) -> List[DiffResult]:
+    def _intern_lines(self) -> Tuple['array[int]', 'array[int]']:
+        """
+        Map each distinct processed line to a compact integer ID.
+        
+        Lines that occur in only one of the sequences can never be part of a
+        match, so they get a per-side sentinel (-2 in A, -1 in B) that never
+        compares equal to anything on the other side.
+        
+        Returns:
+            Tuple of (ids_a, ids_b) token arrays
+        """
+        table: Dict[Hashable, int] = {}
+        for line in self.processed_a:
+            if line not in table:
+                table[line] = len(table)
+        
+        ids_b = array('i', [table.get(line, -1) for line in self.processed_b])
+        in_b = set(ids_b)
+        ids_a = array('i', [i if i in in_b else -2
+                            for i in map(table.__getitem__, self.processed_a)])
+        return ids_a, ids_b
+
+    def compute(self, token: Optional[CancellationToken] = None) -> List[DiffResult]:
         """
         Compute the differences between the two sequences.
         
+        Args:
+            token: Optional cancellation token (see compute_opcodes)
+        
         Returns:
             List of DiffResult objects representing the differences
+            
+        Raises:
+            OperationCancelled: If the token is cancelled
         """
-        # Find the shortest edit script using Myers' algorithm
-        edit_path = self._find_shortest_edit_script()
+        return list(self.iter_results(token))
+
+    def iter_results(self, token: Optional[CancellationToken] = None) -> Iterator[DiffResult]:
+        """
+        Yield DiffResult objects one opcode at a time.
+        
+        Args:
+            token: Optional cancellation token (see compute_opcodes)
+        
+        Yields:
+            DiffResult for each run of the edit script
+        """
+        # Results view into the sequences, which are lines here
+        return iter_opcode_results(self.compute_opcodes(token), cast(Sequence[str], self.seq_a),
+                                   cast(Sequence[str], self.seq_b))
+
+    def get_opcodes(self) -> List[Tuple[str, int, int, int, int]]:
+        """
+        Return the edit script in difflib's get_opcodes() format.
+        
+        Returns:
+            List of (tag, i1, i2, j1, j2) tuples where tag is one of
+            'equal', 'insert', 'delete' or 'replace'
+        """
+        ops = self.compute_opcodes()
+        return [(OPCODE_TYPES[ops[i]].value, ops[i + 1], ops[i + 2], ops[i + 3], ops[i + 4])
+                for i in range(0, len(ops), OPCODE_SIZE)]
+
+    def distance(self, max_distance: Optional[int] = None) -> Optional[int]:
+        """
+        Compute the edit distance without building an edit script.
+
+        Short sequences use the bit-parallel LCS length; otherwise only the
+        current frontier of the forward search is kept: there is no trace, no
+        path and no DiffResult allocation, and the search stops as soon as
+        the distance is known to exceed max_distance.
+
+        Args:
+            max_distance: Optional upper bound on the distance of interest
+
+        Returns:
+            Number of inserted plus deleted lines, or None if it is greater
+            than max_distance
+        """
+        if self._opcodes is not None:
+            ops = self._opcodes
+            d = sum(ops[i + 2] - ops[i + 1] + ops[i + 4] - ops[i + 3]
+                    for i in range(0, len(ops), OPCODE_SIZE) if ops[i] != OP_EQUAL)
+            return d if max_distance is None or d <= max_distance else None
+
+        n, m = self.n, self.m
+        a, b = self.ids_a, self.ids_b
+        if n == m and a == b:
+            return 0
+
+        prefix = _common_prefix_length(a, b)
+        suffix = _common_suffix_length(a, b, min(n, m) - prefix)
+        a = a[prefix:n - suffix]
+        b = b[prefix:m - suffix]
+        n, m = len(a), len(b)
+
+        limit = n + m if max_distance is None else min(max_distance, n + m)
+        # Every path needs at least |n - m| edits
+        if abs(n - m) > limit:
+            return None
+        # Lines missing from the other side must all be edited
+        overlap = _multiset_overlap(a, b)
+        if n + m - 2 * overlap > limit:
+            return None
+        if overlap == 0:
+            return n + m
+        if max(n, m) <= BIT_PARALLEL_LIMIT:
+            # Row-parallel LCS costs O(n * m / w) however large D is
+            d = n + m - 2 * lcs_length(a, b)
+            return d if d <= limit else None
+
+        offset = limit + 1
+        v = array('l', [0]) * (2 * limit + 3)
+        for d in range(limit + 1):
+            for k in range(-d, d + 1, 2):
+                i = k + offset
+                if k == -d or (k != d and v[i - 1] < v[i + 1]):
+                    x = v[i + 1]
+                else:
+                    x = v[i - 1] + 1
+                y = x - k
+                while x < n and y < m and a[x] == b[y]:
+                    x += 1
+                    y += 1
+                if x >= n and y >= m:
+                    return d
+                v[i] = x
+
+        return None
+
+    def compute_opcodes(self, token: Optional[CancellationToken] = None) -> array:
+        """
+        Compute the run-length encoded edit script.
+        
+        Consecutive matching lines form one EQUAL run, and every gap between
+        two EQUAL runs becomes a single INSERT, DELETE or REPLACE run. The
+        common head and tail are matched with bulk slice comparisons first,
+        so the edit graph search only covers the region in between. The
+        script is computed once and cached.
+        
+        If the token's deadline passes, the remaining search switches to a
+        heuristic that still returns a valid, but no longer minimal, script
+        and too_expensive is set.
+        
+        Args:
+            token: Optional cancellation token polled during the search
+        
+        Returns:
+            Flat array of OPCODE_SIZE integers per run: (type, i1, i2, j1, j2)
+            
+        Raises:
+            OperationCancelled: If the token is cancelled
+        """
+        if self._opcodes is not None:
+            return self._opcodes
+        
+        self._token = token
+        try:
+            self._opcodes = self._compute_opcodes()
+        finally:
+            self._token = None
+        return self._opcodes
+
+    def _compute_opcodes(self) -> array:
+        """
+        Compute the packed edit script (see compute_opcodes).
+        
+        Returns:
+            Flat array of OPCODE_SIZE integers per run
+        """
+        n, m = self.n, self.m
+        a, b = self.ids_a, self.ids_b
+        ops = array('l')
+        
+        # Identical inputs need no search at all
+        if n == m and a == b:
+            if n:
+                ops.extend((OP_EQUAL, 0, n, 0, m))
+            return ops
+        
+        prefix = _common_prefix_length(a, b)
+        suffix = _common_suffix_length(a, b, min(n, m) - prefix)
+        x_hi = n - suffix
+        y_hi = m - suffix
         
-        # Convert the edit path to diff results
-        diff_results = self._build_diff_results(edit_path)
+        if prefix:
+            _add_opcode(ops, True, 0, prefix, 0, prefix)
+        self._append_path_opcodes(self._find_edit_path(prefix, x_hi, prefix, y_hi), ops)
+        if suffix:
+            _add_opcode(ops, True, x_hi, n, y_hi, m)
         
-        return diff_results
+        return ops
 
-    def _find_shortest_edit_script(self) -> List[Tuple[int, int]]:
+    def stitch_opcodes(self, segments: Iterable[Tuple[int, int, array]]) -> array:
+        """
+        Build the cached edit script from independently diffed segments.
+        
+        Args:
+            segments: Iterable of (x_offset, y_offset, opcodes) tuples
+                (see splice_opcodes)
+            
+        Returns:
+            Flat array of OPCODE_SIZE integers per run: (type, i1, i2, j1, j2)
+        """
+        self._opcodes = splice_opcodes(segments)
+        return self._opcodes
+
+    def _find_edit_path(self, x_lo: int, x_hi: int,
+                        y_lo: int, y_hi: int) -> List[Tuple[int, int]]:
+        """
+        Find an edit path through one box of the edit graph.
+        
+        This is the extension point for alternative diff algorithms, which
+        can override it and fall back to the Myers engines for sub-boxes.
+        
+        Args:
+            x_lo: First line of the box in sequence A
+            x_hi: End of the box in sequence A (exclusive)
+            y_lo: First line of the box in sequence B
+            y_hi: End of the box in sequence B (exclusive)
+            
+        Returns:
+            List of (x, y) coordinates from (x_lo, y_lo) to (x_hi, y_hi)
+        """
+        if self.algorithm == 'bitparallel':
+            # The kernel's cost is bounded, so only explicit cancellation
+            # needs checking
+            if self._token is not None and self._token.cancelled:
+                raise OperationCancelled("Diff cancelled")
+            path = lcs_path(self.ids_a[x_lo:x_hi], self.ids_b[y_lo:y_hi])
+            return [(x + x_lo, y + y_lo) for x, y in path]
+        
+        # Find the shortest edit script using Myers' algorithm
+        if self.algorithm == 'linear':
+            return self._find_linear_edit_script(x_lo, x_hi, y_lo, y_hi)
+        return self._find_shortest_edit_script(x_lo, x_hi, y_lo, y_hi)
+
+    def _find_shortest_edit_script(self, x_lo: int = 0, x_hi: Optional[int] = None,
+                                   y_lo: int = 0, y_hi: Optional[int] = None
+                                   ) -> List[Tuple[int, int]]:
         """
         Find the shortest edit script using Myers' algorithm.
         
         This is the core of the algorithm. It explores the edit graph in
         increasing edit distance until it finds a path from start to end.
         
+        Args:
+            x_lo: First line of the box in sequence A
+            x_hi: End of the box in sequence A (None for the end)
+            y_lo: First line of the box in sequence B
+            y_hi: End of the box in sequence B (None for the end)
+        
         Returns:
             List of (x, y) coordinates representing the path through the edit graph
         """
-        n, m = self.n, self.m
+        x_hi = self.n if x_hi is None else x_hi
+        y_hi = self.m if y_hi is None else y_hi
+        n, m = x_hi - x_lo, y_hi - y_lo
+        a, b = self.ids_a[x_lo:x_hi], self.ids_b[y_lo:y_hi]
         max_d = n + m  # Maximum possible edit distance
         
         # V stores the furthest reaching x-coordinate for each k-diagonal
         # k = x - y (diagonal number in the edit graph)
-        # We use offset to handle negative indices: V[k] is stored at v[k + max_d]
-        v = {1: 0}
+        # We use offset to handle negative indices: V[k] is stored at v[k + offset]
+        offset = max_d + 1
+        v = array('l', [0]) * (2 * max_d + 3)
         
-        # Store the path for backtracking
-        trace: List[Dict[int, int]] = []
+        # Store the path for backtracking. Before step d only diagonals
+        # -(d-1)..(d-1) are live, so each snapshot is that packed slice of V
+        # appended to one flat array (snapshot d starts at (d-1)**2).
+        trace = array('l')
         
         # Iterate through increasing edit distances
         for d in range(max_d + 1):
-            trace.append(v.copy())
+            if d >= self.TOO_EXPENSIVE_COST and self._over_budget():
+                # Out of time: finish the box with the heuristic bisection
+                return self._find_linear_edit_script(x_lo, x_hi, y_lo, y_hi)
+            
+            trace.extend(v[offset - d + 1:offset + d])
             
             # Explore all possible k-diagonals for this edit distance
             # k ranges from -d to d in steps of 2
             for k in range(-d, d + 1, 2):
+                i = k + offset
                 # Determine whether to move down or right
                 # Move down if we're at the top edge OR if moving down gives us
                 # a further x-coordinate than moving right
-                if k == -d or (k != d and v.get(k - 1, -1) < v.get(k + 1, -1)):
+                if k == -d or (k != d and v[i - 1] < v[i + 1]):
                     # Move down (delete from A)
-                    x = v.get(k + 1, 0)
+                    x = v[i + 1]
                 else:
                     # Move right (insert from B)
-                    x = v.get(k - 1, 0) + 1
+                    x = v[i - 1] + 1
                 
                 y = x - k
                 
                 # Follow diagonal as far as possible (matching elements)
-                while x < n and y < m and self._lines_equal(x, y):
+                while x < n and y < m and a[x] == b[y]:
                     x += 1
                     y += 1
                 
-                v[k] = x
+                v[i] = x
                 
                 # Check if we've reached the end
                 if x >= n and y >= m:
-                    return self._backtrack(trace, d)
+                    path = self._backtrack(trace, d, n, m)
+                    return [(px + x_lo, py + y_lo) for px, py in path]
         
         # Should never reach here if inputs are valid
-        return [(0, 0), (n, m)]
+        return [(x_lo, y_lo), (x_hi, y_hi)]
+
+    def _find_linear_edit_script(self, x_lo: int = 0, x_hi: Optional[int] = None,
+                                 y_lo: int = 0, y_hi: Optional[int] = None
+                                 ) -> List[Tuple[int, int]]:
+        """
+        Find a shortest edit script in linear space.
+        
+        Each box of the edit graph is trimmed of its common prefix and suffix
+        and then split at its middle snake; the two boxes on either side of
+        the split are solved independently. Boxes are kept on an explicit
+        stack (pushed right to left) so the path comes out in order and deep
+        recursion is never needed.
+        
+        Args:
+            x_lo: First line of the box in sequence A
+            x_hi: End of the box in sequence A (None for the end)
+            y_lo: First line of the box in sequence B
+            y_hi: End of the box in sequence B (None for the end)
+        
+        Returns:
+            List of (x, y) coordinates representing the path through the edit graph
+        """
+        x_hi = self.n if x_hi is None else x_hi
+        y_hi = self.m if y_hi is None else y_hi
+        a, b = self.ids_a, self.ids_b
+        path: List[Tuple[int, int]] = [(x_lo, y_lo)]
+        
+        # Entries are (x_lo, x_hi, y_lo, y_hi, is_snake). A snake entry is a
+        # run of matching lines that only needs to be appended to the path.
+        stack = [(x_lo, x_hi, y_lo, y_hi, False)]
+        
+        while stack:
+            x_lo, x_hi, y_lo, y_hi, is_snake = stack.pop()
+            
+            if is_snake:
+                for i in range(1, x_hi - x_lo + 1):
+                    path.append((x_lo + i, y_lo + i))
+                continue
+            
+            # Common prefix
+            while x_lo < x_hi and y_lo < y_hi and a[x_lo] == b[y_lo]:
+                x_lo += 1
+                y_lo += 1
+                path.append((x_lo, y_lo))
+            
+            # Common suffix, emitted after everything else in this box
+            x_end, y_end = x_hi, y_hi
+            while x_lo < x_hi and y_lo < y_hi and a[x_hi - 1] == b[y_hi - 1]:
+                x_hi -= 1
+                y_hi -= 1
+            if x_hi < x_end:
+                stack.append((x_hi, x_end, y_hi, y_end, True))
+            
+            split = None
+            if x_lo < x_hi and y_lo < y_hi:
+                split = self._middle_snake(x_lo, x_hi, y_lo, y_hi)
+            
+            if split is None:
+                # Nothing in common: delete everything, then insert everything
+                for x in range(x_lo + 1, x_hi + 1):
+                    path.append((x, y_lo))
+                for y in range(y_lo + 1, y_hi + 1):
+                    path.append((x_hi, y))
+            else:
+                x, y = split
+                stack.append((x, x_hi, y, y_hi, False))
+                stack.append((x_lo, x, y_lo, y, False))
+        
+        return path
+
+    def _middle_snake(self, x_lo: int, x_hi: int,
+                      y_lo: int, y_hi: int) -> Optional[Tuple[int, int]]:
+        """
+        Find the point where a box of the edit graph should be split.
+        
+        The greedy search is run forwards from (x_lo, y_lo) and backwards from
+        (x_hi, y_hi) at the same time until the two frontiers overlap on the
+        middle snake, which lies on an optimal path. Diagonals that leave the
+        box are dropped from the search. The box must have its common prefix
+        and suffix removed, which guarantees the split point is interior.
+        
+        Args:
+            x_lo: First line of the box in sequence A
+            x_hi: End of the box in sequence A (exclusive)
+            y_lo: First line of the box in sequence B
+            y_hi: End of the box in sequence B (exclusive)
+            
+        Returns:
+            Absolute (x, y) split point, or None if the box has no common lines
+        """
+        a, b = self.ids_a, self.ids_b
+        n = x_hi - x_lo
+        m = y_hi - y_lo
+        max_d = (n + m + 1) // 2
+        offset = max_d
+        if self.too_expensive:
+            # The search will stop at TOO_EXPENSIVE_COST, so size V for that
+            offset = min(max_d, self.TOO_EXPENSIVE_COST + 1)
+        
+        # Forward V is indexed by diagonal k = x - y, backward V by the same
+        # diagonal measured from the bottom-right corner. Both store the
+        # distance travelled along x, with -1 meaning "not reached".
+        vf = [-1] * (2 * offset + 2)
+        vb = [-1] * (2 * offset + 2)
+        vf[offset + 1] = 0
+        vb[offset + 1] = 0
+        
+        delta = n - m
+        # With an odd delta the frontiers can only meet on a forward step
+        front = delta % 2 != 0
+        
+        # Diagonals that ran off the edge of the box are trimmed from the range
+        kf_start = kf_end = kb_start = kb_end = 0
+        
+        for d in range(max_d):
+            if d >= self.TOO_EXPENSIVE_COST and self._over_budget():
+                return self._heuristic_split(vf, vb, offset, d, x_lo, x_hi, y_lo, y_hi)
+            
+            # Forward search
+            for k in range(-d + kf_start, d + 1 - kf_end, 2):
+                i = offset + k
+                if k == -d or (k != d and vf[i - 1] < vf[i + 1]):
+                    x = vf[i + 1]
+                else:
+                    x = vf[i - 1] + 1
+                y = x - k
+                while x < n and y < m and a[x_lo + x] == b[y_lo + y]:
+                    x += 1
+                    y += 1
+                vf[i] = x
+                
+                if x > n:
+                    kf_end += 2
+                elif y > m:
+                    kf_start += 2
+                elif front:
+                    j = offset + delta - k
+                    if 0 <= j < len(vb) and vb[j] != -1 and x >= n - vb[j]:
+                        return x_lo + x, y_lo + y
+            
+            # Backward search
+            for k in range(-d + kb_start, d + 1 - kb_end, 2):
+                i = offset + k
+                if k == -d or (k != d and vb[i - 1] < vb[i + 1]):
+                    x = vb[i + 1]
+                else:
+                    x = vb[i - 1] + 1
+                y = x - k
+                while (x < n and y < m and
+                       a[x_hi - x - 1] == b[y_hi - y - 1]):
+                    x += 1
+                    y += 1
+                vb[i] = x
+                
+                if x > n:
+                    kb_end += 2
+                elif y > m:
+                    kb_start += 2
+                elif not front:
+                    j = offset + delta - k
+                    if 0 <= j < len(vf) and vf[j] != -1:
+                        fx = vf[j]
+                        fy = fx - (j - offset)
+                        if fx >= n - x:
+                            return x_lo + fx, y_lo + fy
+        
+        return None
+
+    def _heuristic_split(self, vf: List[int], vb: List[int], offset: int, d: int,
+                         x_lo: int, x_hi: int,
+                         y_lo: int, y_hi: int) -> Optional[Tuple[int, int]]:
+        """
+        Pick a split point when the middle snake search is too expensive.
+        
+        Like GNU diff, the furthest point reached by either search frontier
+        is used. Any interior point gives a valid edit script; it is just no
+        longer guaranteed to be minimal.
+        
+        Args:
+            vf: Forward V vector of the abandoned search
+            vb: Backward V vector of the abandoned search
+            offset: Index of diagonal 0 in both vectors
+            d: Edit cost the search had reached
+            x_lo: First line of the box in sequence A
+            x_hi: End of the box in sequence A (exclusive)
+            y_lo: First line of the box in sequence B
+            y_hi: End of the box in sequence B (exclusive)
+            
+        Returns:
+            Absolute (x, y) split point, or None to replace the whole box
+        """
+        n = x_hi - x_lo
+        m = y_hi - y_lo
+        best = 0
+        split = None
+        for i in range(max(0, offset - d), min(len(vf), offset + d + 1)):
+            for v, backward in ((vf[i], False), (vb[i], True)):
+                y = v - (i - offset)
+                if v < 0 or v > n or y < 0 or y > m or v + y <= best:
+                    continue
+                best = v + y
+                split = (n - v, m - y) if backward else (v, y)
+        
+        if split is None or split == (n, m) or split == (0, 0):
+            return None
+        return x_lo + split[0], y_lo + split[1]
+
+    def _over_budget(self) -> bool:
+        """
+        Poll the cancellation token from inside a search.
+        
+        Returns:
+            True once the token's deadline has passed
+            
+        Raises:
+            OperationCancelled: If the token was cancelled
+        """
+        token = self._token
+        if token is None:
+            return False
+        if token.cancelled:
+            raise OperationCancelled("Diff cancelled")
+        if not self.too_expensive and token.expired:
+            self.too_expensive = True
+        return self.too_expensive
 
     def _lines_equal(self, x: int, y: int) -> bool:
         """
@@ -211,34 +882,39 @@ class MyersDiff:
         Returns:
             True if lines are equal, False otherwise
         """
-        return self.processed_a[x] == self.processed_b[y]
+        return self.ids_a[x] == self.ids_b[y]
 
-    def _backtrack(self, trace: List[Dict[int, int]], d: int) -> List[Tuple[int, int]]:
+    def _backtrack(self, trace: array, d: int,
+                   n: int, m: int) -> List[Tuple[int, int]]:
         """
         Backtrack through the trace to find the actual path.
         
         Args:
-            trace: The trace of V values at each edit distance
+            trace: Packed V snapshots; snapshot `depth` holds diagonals
+                -(depth-1)..(depth-1) starting at index (depth-1)**2
             d: The final edit distance
+            n: Length of the searched box in sequence A
+            m: Length of the searched box in sequence B
             
         Returns:
-            List of (x, y) coordinates representing the path
+            List of (x, y) coordinates relative to the box
         """
-        x, y = self.n, self.m
+        x, y = n, m
         path = [(x, y)]
         
         # Work backwards from d to 0
         for depth in range(d, 0, -1):
-            v = trace[depth]
+            # Index of diagonal 0 in this depth's snapshot
+            base = (depth - 1) * (depth - 1) + depth - 1
             k = x - y
             
             # Determine if we came from k-1 (right move) or k+1 (down move)
-            if k == -depth or (k != depth and v.get(k - 1, -1) < v.get(k + 1, -1)):
+            if k == -depth or (k != depth and trace[base + k - 1] < trace[base + k + 1]):
                 prev_k = k + 1
             else:
                 prev_k = k - 1
             
-            prev_x = v[prev_k]
+            prev_x = trace[base + prev_k]
             prev_y = prev_x - prev_k
             
             # Follow diagonal back
@@ -265,130 +941,206 @@ class MyersDiff:
         # diff builder can emit an empty result set for equal inputs.
         if not path or path[0] != (0, 0):
             path.insert(0, (0, 0))
-        if path[-1] != (self.n, self.m):
-            path.append((self.n, self.m))
+        if path[-1] != (n, m):
+            path.append((n, m))
         return path
 
-    def _build_diff_results(self, path: List[Tuple[int, int]]) -> List[DiffResult]:
+    def _append_path_opcodes(self, path: List[Tuple[int, int]], ops: array) -> None:
         """
-        Build DiffResult objects from the edit path.
+        Run-length encode an edit path into packed opcodes.
         
         Args:
             path: List of (x, y) coordinates through the edit graph
-            
-        Returns:
-            List of DiffResult objects
+            ops: Packed opcode array to append to
         """
-        results: List[DiffResult] = []
+        if len(path) < 2:
+            return
         
-        i = 0
-        while i < len(path) - 1:
-            x1, y1 = path[i]
-            x2, y2 = path[i + 1]
-            
-            # Diagonal move (equal lines)
-            if x2 > x1 and y2 > y1:
-                # Start of equal block
-                equal_start_x = x1
-                equal_start_y = y1
-                
-                # Find end of equal block
-                j = i + 1
-                while j < len(path) - 1:
-                    x_next, y_next = path[j]
-                    x_after, y_after = path[j + 1]
-                    if x_after == x_next + 1 and y_after == y_next + 1:
-                        j += 1
-                    else:
-                        break
-                
-                equal_end_x = path[j][0]
-                equal_end_y = path[j][1]
-                
-                results.append(DiffResult(
-                    type=DiffType.EQUAL,
-                    old_start=equal_start_x,
-                    old_count=equal_end_x - equal_start_x,
-                    new_start=equal_start_y,
-                    new_count=equal_end_y - equal_start_y,
-                    old_lines=self.seq_a[equal_start_x:equal_end_x],
-                    new_lines=self.seq_b[equal_start_y:equal_end_y]
-                ))
-                
-                i = j
-            
-            # Right move (insert)
-            elif x2 == x1 and y2 > y1:
-                results.append(DiffResult(
-                    type=DiffType.INSERT,
-                    old_start=x1,
-                    old_count=0,
-                    new_start=y1,
-                    new_count=1,
-                    old_lines=[],
-                    new_lines=self.seq_b[y1:y2]
-                ))
-                i += 1
-            
-            # Down move (delete)
-            elif x2 > x1 and y2 == y1:
-                results.append(DiffResult(
-                    type=DiffType.DELETE,
-                    old_start=x1,
-                    old_count=1,
-                    new_start=y1,
-                    new_count=0,
-                    old_lines=self.seq_a[x1:x2],
-                    new_lines=[]
-                ))
-                i += 1
-            
-            else:
-                i += 1
+        run_x, run_y = prev_x, prev_y = path[0]
+        run_equal = path[1][0] - run_x == 1 and path[1][1] - run_y == 1
+        for i in range(1, len(path)):
+            x, y = path[i]
+            # Diagonal move (equal lines); anything else is an edit
+            is_equal = x - prev_x == 1 and y - prev_y == 1
+            if is_equal is not run_equal:
+                _add_opcode(ops, run_equal, run_x, prev_x, run_y, prev_y)
+                run_x, run_y = prev_x, prev_y
+            run_equal = is_equal
+            prev_x, prev_y = x, y
         
-        # Merge consecutive inserts and deletes into replaces
-        return self._merge_replace_operations(results)
+        _add_opcode(ops, run_equal, run_x, prev_x, run_y, prev_y)
 
-    def _merge_replace_operations(self, results: List[DiffResult]) -> List[DiffResult]:
-        """
-        Merge consecutive DELETE and INSERT operations into REPLACE operations.
+
+def iter_opcode_results(ops: array, seq_a: Sequence[str],
+                        seq_b: Sequence[str]) -> Iterator[DiffResult]:
+    """
+    Yield a DiffResult for every run of a packed edit script.
+    
+    Args:
+        ops: Packed opcodes
+        seq_a: Sequence A the opcodes refer to
+        seq_b: Sequence B the opcodes refer to
         
-        Args:
-            results: List of DiffResult objects
-            
-        Returns:
-            List of DiffResult objects with merged REPLACE operations
-        """
-        merged: List[DiffResult] = []
-        i = 0
+    Yields:
+        DiffResult viewing into seq_a and seq_b
+    """
+    for i in range(0, len(ops), OPCODE_SIZE):
+        i1, i2, j1, j2 = ops[i + 1], ops[i + 2], ops[i + 3], ops[i + 4]
+        yield DiffResult(
+            type=OPCODE_TYPES[ops[i]],
+            old_start=i1,
+            old_count=i2 - i1,
+            new_start=j1,
+            new_count=j2 - j1,
+            source_a=seq_a,
+            source_b=seq_b
+        )
+
+
+def splice_opcodes(segments: Iterable[Tuple[int, int, array]]) -> array:
+    """
+    Join independently computed packed edit scripts into one.
+    
+    Each segment holds the packed opcodes of one sub-box of the edit graph,
+    relative to that box's origin. The segments must tile both sequences in
+    order; runs that meet at a segment boundary are coalesced as if the
+    script had been computed in one pass.
+    
+    Args:
+        segments: Iterable of (x_offset, y_offset, opcodes) tuples
         
-        while i < len(results):
-            if i < len(results) - 1:
-                current = results[i]
-                next_result = results[i + 1]
-                
-                # Check if current is DELETE and next is INSERT
-                if current.type == DiffType.DELETE and next_result.type == DiffType.INSERT:
-                    # Merge into REPLACE
-                    merged.append(DiffResult(
-                        type=DiffType.REPLACE,
-                        old_start=current.old_start,
-                        old_count=current.old_count,
-                        new_start=next_result.new_start,
-                        new_count=next_result.new_count,
-                        old_lines=current.old_lines,
-                        new_lines=next_result.new_lines
-                    ))
-                    i += 2
-                    continue
-            
-            merged.append(results[i])
-            i += 1
+    Returns:
+        Flat array of OPCODE_SIZE integers per run: (type, i1, i2, j1, j2)
+    """
+    ops = array('l')
+    for x_off, y_off, seg_ops in segments:
+        for i in range(0, len(seg_ops), OPCODE_SIZE):
+            _add_opcode(ops, seg_ops[i] == OP_EQUAL,
+                        seg_ops[i + 1] + x_off, seg_ops[i + 2] + x_off,
+                        seg_ops[i + 3] + y_off, seg_ops[i + 4] + y_off)
+    return ops
+
+
+def _add_opcode(ops: array, is_equal: bool, i1: int, i2: int, j1: int, j2: int) -> None:
+    """
+    Append a run to a packed opcode array, coalescing it with the last run.
+    
+    Adjacent EQUAL runs are joined, and adjacent edits are joined into a
+    single INSERT, DELETE or REPLACE depending on which sides they touch.
+    
+    Args:
+        ops: Packed opcode array
+        is_equal: Whether the run consists of matching lines
+        i1: Start of the run in sequence A
+        i2: End of the run in sequence A
+        j1: Start of the run in sequence B
+        j2: End of the run in sequence B
+    """
+    if ops and (ops[-OPCODE_SIZE] == OP_EQUAL) == is_equal:
+        i1 = ops[-4]
+        j1 = ops[-2]
+        del ops[-OPCODE_SIZE:]
+    
+    if is_equal:
+        tag = OP_EQUAL
+    elif i1 == i2:
+        tag = OP_INSERT
+    elif j1 == j2:
+        tag = OP_DELETE
+    else:
+        tag = OP_REPLACE
+    ops.extend((tag, i1, i2, j1, j2))
+
+
+def _multiset_overlap(a: array, b: array) -> int:
+    """
+    Count the lines two token arrays have in common, ignoring order.
+    
+    This bounds the longest common subsequence from above, so
+    len(a) + len(b) - 2 * overlap is a lower bound on the edit distance.
+    
+    Args:
+        a: Token array for sequence A
+        b: Token array for sequence B
         
-        return merged
+    Returns:
+        Size of the multiset intersection
+    """
+    counts = Counter(a)
+    overlap = 0
+    for token in b:
+        if counts[token] > 0:
+            counts[token] -= 1
+            overlap += 1
+    return overlap
+
+
+def _common_prefix_length(a: array, b: array) -> int:
+    """
+    Length of the common prefix of two token arrays.
+    
+    Slices are compared in galloping chunks and the first mismatch is then
+    located by bisection, so long matching runs are compared in C.
+    
+    Args:
+        a: First token array
+        b: Second token array
+        
+    Returns:
+        Number of leading tokens that are equal
+    """
+    limit = min(len(a), len(b))
+    lo = 0
+    step = 64
+    while lo < limit:
+        hi = min(lo + step, limit)
+        if a[lo:hi] == b[lo:hi]:
+            lo = hi
+            step *= 2
+            continue
+        # The first mismatch lies in [lo, hi)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if a[lo:mid] == b[lo:mid]:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+    return lo
+
+
+def _common_suffix_length(a: array, b: array, limit: int) -> int:
+    """
+    Length of the common suffix of two token arrays.
+    
+    Args:
+        a: First token array
+        b: Second token array
+        limit: Maximum suffix length to consider (keeps it clear of the prefix)
+        
+    Returns:
+        Number of trailing tokens that are equal
+    """
+    n, m = len(a), len(b)
+    lo = 0
+    step = 64
+    while lo < limit:
+        hi = min(lo + step, limit)
+        if a[n - hi:n - lo] == b[m - hi:m - lo]:
+            lo = hi
+            step *= 2
+            continue
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if a[n - mid:n - lo] == b[m - mid:m - lo]:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+    return lo
 
 
-def myers_diff(seq_a: List[str], seq_b: List[str], **options) -> List[DiffResult]:
+def myers_diff(seq_a: List[str], seq_b: List[str], **options: Any) -> List[DiffResult]:
     """
     Convenience function to compute diff using Myers' algorithm.
     
@@ -420,26 +1172,212 @@ def format_diff_unified(results: List[DiffResult],
     Returns:
         Unified diff format string
     """
-    output = []
-    output.append(f"--- {filename_a}")
-    output.append(f"+++ {filename_b}")
+    return "\n".join(iter_unified_diff(results, filename_a, filename_b, context_lines))
+
+
+def write_unified_diff(results: Iterable[DiffResult], stream: TextIO,
+                       filename_a: str = "a",
+                       filename_b: str = "b",
+                       context_lines: int = 3) -> None:
+    """
+    Write diff results to a text stream in unified diff format.
+    
+    Lines are written as they are produced, so only the current hunk is
+    held in memory.
+    
+    Args:
+        results: DiffResult objects in order (a list or a generator)
+        stream: File object or sys.stdout
+        filename_a: Name of first file
+        filename_b: Name of second file
+        context_lines: Number of context lines to show
+    """
+    for line in iter_unified_diff(results, filename_a, filename_b, context_lines):
+        stream.write(line)
+        stream.write("\n")
+
+
+def iter_unified_diff(results: Iterable[DiffResult],
+                      filename_a: str = "a",
+                      filename_b: str = "b",
+                      context_lines: int = 3) -> Iterator[str]:
+    """
+    Generate unified diff lines (without line terminators).
+    
+    Changes closer together than 2 * context_lines are grouped into one
+    @@ hunk, and every hunk is surrounded by up to context_lines unchanged
+    lines, so the output can be applied with `patch` or `git apply`.
+    
+    Lines dropped by ignore options (e.g. ignore_blank_lines) are taken
+    from the compared sequences, like `diff -B` does: hunks show them as
+    context where both sides agree and as changes where they differ, but
+    differences in dropped lines alone produce no hunk.
+    
+    Args:
+        results: DiffResult objects in order (a list or a generator)
+        filename_a: Name of first file
+        filename_b: Name of second file
+        context_lines: Number of context lines to show
+        
+    Yields:
+        Lines of the unified diff
+    """
+    context = max(context_lines, 0)
+    header_done = False
+    
+    for hunk in _group_hunks(_fill_dropped_lines(results), context):
+        if not header_done:
+            yield f"--- {filename_a}"
+            yield f"+++ {filename_b}"
+            header_done = True
+        
+        old_start, new_start = hunk[0][1], hunk[0][3]
+        old_range = _format_unified_range(
+            old_start, old_start + sum(i2 - i1 for _, i1, i2, _, _ in hunk))
+        new_range = _format_unified_range(
+            new_start, new_start + sum(j2 - j1 for _, _, _, j1, j2 in hunk))
+        yield f"@@ -{old_range} +{new_range} @@"
+        
+        for result, i1, i2, j1, j2 in hunk:
+            if result.type == DiffType.EQUAL:
+                lines = result.old_lines
+                for i in range(i1 - result.old_start, i2 - result.old_start):
+                    yield f" {lines[i]}"
+                continue
+            # Patches cannot express moves; MOVED lines are removed from one
+            # place and added in the other
+            if result.type in (DiffType.DELETE, DiffType.REPLACE, DiffType.MOVED):
+                for line in result.old_lines:
+                    yield f"-{line}"
+            if result.type in (DiffType.INSERT, DiffType.REPLACE, DiffType.MOVED):
+                for line in result.new_lines:
+                    yield f"+{line}"
+    
+    if not header_done:
+        yield f"--- {filename_a}"
+        yield f"+++ {filename_b}"
+
+
+def _fill_dropped_lines(results: Iterable[DiffResult]) -> Iterator[Tuple[DiffResult, bool]]:
+    """
+    Cover the lines that lie between consecutive diff results.
+    
+    Results of comparisons that drop lines skip them, which would leave
+    holes in a patch. Every gap is filled from the results' source
+    sequences: with an EQUAL result if both sides hold the same lines,
+    else with an ignored change.
+    
+    Args:
+        results: DiffResult objects in order
+        
+    Yields:
+        Tuples of (result, ignored), where ignored marks changes that only
+        involve dropped lines
+    """
+    next_a = next_b = 0
+    source_a: Optional[Sequence[str]] = None
+    source_b: Optional[Sequence[str]] = None
+    
+    def gap(end_a: int, end_b: int) -> Iterator[Tuple[DiffResult, bool]]:
+        if source_a is None or source_b is None:
+            return
+        count_a, count_b = max(end_a - next_a, 0), max(end_b - next_b, 0)
+        if not count_a and not count_b:
+            return
+        if LineView(source_a, next_a, end_a) == LineView(source_b, next_b, end_b):
+            yield DiffResult(DiffType.EQUAL, next_a, count_a, next_b, count_b,
+                             source_a=source_a, source_b=source_b), False
+            return
+        if not count_b:
+            diff_type = DiffType.DELETE
+        elif not count_a:
+            diff_type = DiffType.INSERT
+        else:
+            diff_type = DiffType.REPLACE
+        yield DiffResult(diff_type, next_a, count_a, next_b, count_b,
+                         source_a=source_a, source_b=source_b), True
     
     for result in results:
-        if result.type == DiffType.EQUAL:
-            continue
+        source_a, source_b = result._source_a, result._source_b
+        yield from gap(result.old_start, result.new_start)
+        yield result, False
+        next_a = max(next_a, result.old_start + result.old_count)
+        next_b = max(next_b, result.new_start + result.new_count)
+    
+    if source_a is not None and source_b is not None:
+        yield from gap(len(source_a), len(source_b))
+
+
+def _group_hunks(results: Iterable[Tuple[DiffResult, bool]],
+                 context: int) -> Iterator[List[Tuple[DiffResult, int, int, int, int]]]:
+    """
+    Group diff results into unified diff hunks.
+    
+    Works like difflib's get_grouped_opcodes but consumes the results as a
+    stream, looking ahead by a single result.
+    
+    Args:
+        results: Tuples of (result, ignored) in order, see
+            _fill_dropped_lines
+        context: Number of context lines around each change
         
-        # Create hunk header
-        old_start = result.old_start + 1  # 1-indexed
-        new_start = result.new_start + 1  # 1-indexed
-        output.append(f"@@ -{old_start},{result.old_count} +{new_start},{result.new_count} @@")
+    Yields:
+        Lists of (result, i1, i2, j1, j2) where the ranges select the part
+        of the result that belongs to the hunk
+    """
+    group: List[Tuple[DiffResult, int, int, int, int]] = []
+    # Whether the group contains a change that is not ignored; EQUAL runs
+    # and ignored changes alone are never yielded
+    has_change = False
+    iterator = iter(results)
+    current, ignored = next(iterator, (None, False))
+    is_first = True
+    
+    while current is not None:
+        following, following_ignored = next(iterator, (None, False))
+        i1, i2 = current.old_start, current.old_start + current.old_count
+        j1, j2 = current.new_start, current.new_start + current.new_count
         
-        # Add lines
-        if result.type == DiffType.DELETE or result.type == DiffType.REPLACE:
-            for line in result.old_lines:
-                output.append(f"-{line}")
+        if current.type == DiffType.EQUAL:
+            # Leading context is the tail of the first block, trailing
+            # context the head of the last one
+            if is_first:
+                i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+            if following is None:
+                i2, j2 = min(i2, i1 + context), min(j2, j1 + context)
+            elif i2 - i1 > 2 * context:
+                if has_change:
+                    group.append((current, i1, i1 + context, j1, j1 + context))
+                    yield group
+                group = []
+                has_change = False
+                i1, j1 = i2 - context, j2 - context
+        elif not ignored:
+            has_change = True
         
-        if result.type == DiffType.INSERT or result.type == DiffType.REPLACE:
-            for line in result.new_lines:
-                output.append(f"+{line}")
+        group.append((current, i1, i2, j1, j2))
+        is_first = False
+        current, ignored = following, following_ignored
+    
+    if has_change:
+        yield group
+
+
+def _format_unified_range(start: int, stop: int) -> str:
+    """
+    Format a hunk range the way GNU diff does.
     
-    return "\n".join(output)
+    Args:
+        start: First line (0-indexed)
+        stop: End of the range (exclusive)
+        
+    Returns:
+        "start,length" with 1-indexed start, shortened for 0 and 1 lines
+    """
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
@@ -0,0 +1,209 @@
+"""
+Patience Diff Algorithm Implementation
+======================================
+
+Patience diff (Bram Cohen) aligns two sequences on lines that occur exactly
+once in each of them. Those unique lines are usually the meaningful ones
+(function signatures, distinctive statements), so anchoring on them keeps
+hunks from being stitched together out of `}` and blank lines.
+
+Algorithm Overview:
+------------------
+1. Match the common head and tail of the region.
+2. Collect the lines that are unique in both sides of the region.
+3. Keep the longest subsequence of them that appears in the same order on
+   both sides (found with a patience sort, O(K log K)).
+4. Recurse into the gaps between consecutive anchors.
+5. Regions without any unique common line are handed to Myers' algorithm.
+
+Because the Myers search only ever runs on the small gaps between anchors,
+large refactors are typically much cheaper to diff than with plain Myers.
+"""
+
+from bisect import bisect_left
+from typing import Any, List, Tuple, Dict, Sequence
+
+from core.myers_algorithm import MyersDiff, DiffResult
+
+
+def unique_anchors(ids_a: Sequence[int], ids_b: Sequence[int],
+                   x_lo: int, x_hi: int,
+                   y_lo: int, y_hi: int) -> List[Tuple[int, int]]:
+    """
+    Find the patience anchors of a region.
+    
+    Anchors are tokens that occur exactly once in ids_a[x_lo:x_hi] and
+    exactly once in ids_b[y_lo:y_hi], reduced to the longest chain that is
+    increasing on both sides.
+    
+    Args:
+        ids_a: Token array for sequence A (negative tokens never match)
+        ids_b: Token array for sequence B
+        x_lo: First line of the region in sequence A
+        x_hi: End of the region in sequence A (exclusive)
+        y_lo: First line of the region in sequence B
+        y_hi: End of the region in sequence B (exclusive)
+        
+    Returns:
+        List of (x, y) anchor positions in increasing order
+    """
+    # token -> position, or -1 once the token has been seen twice
+    seen_a: Dict[int, int] = {}
+    for x in range(x_lo, x_hi):
+        token = ids_a[x]
+        if token >= 0:
+            seen_a[token] = -1 if token in seen_a else x
+    
+    seen_b: Dict[int, int] = {}
+    for y in range(y_lo, y_hi):
+        token = ids_b[y]
+        if token in seen_a:
+            seen_b[token] = -1 if token in seen_b else y
+    
+    # Candidates ordered by their position in A
+    candidates = sorted((x, seen_b[token]) for token, x in seen_a.items()
+                        if x >= 0 and seen_b.get(token, -1) >= 0)
+    return longest_chain(candidates)
+
+
+def longest_chain(candidates: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Find the longest chain of points increasing on both sides.
+    
+    Args:
+        candidates: (x, y) points ordered by x, with distinct x and y
+        
+    Returns:
+        Longest subsequence whose y positions increase, in order
+    """
+    if not candidates:
+        return []
+    
+    # Patience sort on the B positions: tops[p] is the candidate index on top
+    # of pile p, and back[i] links each card to the top of the pile to its left
+    top_ys: List[int] = []
+    tops: List[int] = []
+    back: List[int] = [-1] * len(candidates)
+    for i, (_, y) in enumerate(candidates):
+        p = bisect_left(top_ys, y)
+        if p:
+            back[i] = tops[p - 1]
+        if p == len(top_ys):
+            top_ys.append(y)
+            tops.append(i)
+        else:
+            top_ys[p] = y
+            tops[p] = i
+    
+    anchors: List[Tuple[int, int]] = []
+    i = tops[-1]
+    while i != -1:
+        anchors.append(candidates[i])
+        i = back[i]
+    anchors.reverse()
+    return anchors
+
+
+class PatienceDiff(MyersDiff):
+    """
+    Patience diff built on top of the Myers engines.
+    
+    Preprocessing, line interning, prefix/suffix trimming and result
+    building are shared with MyersDiff; only the search of the region
+    between the common head and tail is replaced.
+    """
+
+    def _find_anchors(self, x_lo: int, x_hi: int,
+                      y_lo: int, y_hi: int) -> List[Tuple[int, int, int]]:
+        """
+        Find the matching runs a region is split on.
+        
+        Args:
+            x_lo: First line of the region in sequence A
+            x_hi: End of the region in sequence A (exclusive)
+            y_lo: First line of the region in sequence B
+            y_hi: End of the region in sequence B (exclusive)
+            
+        Returns:
+            List of (x, y, length) runs, increasing on both sides
+        """
+        return [(x, y, 1) for x, y in
+                unique_anchors(self.ids_a, self.ids_b, x_lo, x_hi, y_lo, y_hi)]
+
+    def _find_edit_path(self, x_lo: int, x_hi: int,
+                        y_lo: int, y_hi: int) -> List[Tuple[int, int]]:
+        """
+        Find an edit path by recursing between anchors.
+        
+        Args:
+            x_lo: First line of the box in sequence A
+            x_hi: End of the box in sequence A (exclusive)
+            y_lo: First line of the box in sequence B
+            y_hi: End of the box in sequence B (exclusive)
+            
+        Returns:
+            List of (x, y) coordinates from (x_lo, y_lo) to (x_hi, y_hi)
+        """
+        a, b = self.ids_a, self.ids_b
+        path: List[Tuple[int, int]] = [(x_lo, y_lo)]
+        
+        # Entries are (x_lo, x_hi, y_lo, y_hi, is_snake), pushed right to
+        # left so the path is emitted in order
+        stack = [(x_lo, x_hi, y_lo, y_hi, False)]
+        
+        while stack:
+            x_lo, x_hi, y_lo, y_hi, is_snake = stack.pop()
+            
+            if is_snake:
+                for i in range(1, x_hi - x_lo + 1):
+                    path.append((x_lo + i, y_lo + i))
+                continue
+            
+            # Common head
+            while x_lo < x_hi and y_lo < y_hi and a[x_lo] == b[y_lo]:
+                x_lo += 1
+                y_lo += 1
+                path.append((x_lo, y_lo))
+            
+            # Common tail, emitted after the rest of the region
+            x_end, y_end = x_hi, y_hi
+            while x_lo < x_hi and y_lo < y_hi and a[x_hi - 1] == b[y_hi - 1]:
+                x_hi -= 1
+                y_hi -= 1
+            if x_hi < x_end:
+                stack.append((x_hi, x_end, y_hi, y_end, True))
+            
+            anchors: List[Tuple[int, int, int]] = []
+            if x_lo < x_hi and y_lo < y_hi:
+                anchors = self._find_anchors(x_lo, x_hi, y_lo, y_hi)
+            
+            if not anchors:
+                # Nothing to anchor on: let Myers handle the region
+                path.extend(super()._find_edit_path(x_lo, x_hi, y_lo, y_hi)[1:])
+                continue
+            
+            # Gap after the last anchor, then each anchor preceded by its gap
+            prev_x, prev_y = x_hi, y_hi
+            for x, y, length in reversed(anchors):
+                stack.append((x + length, prev_x, y + length, prev_y, False))
+                stack.append((x, x + length, y, y + length, True))
+                prev_x, prev_y = x, y
+            stack.append((x_lo, prev_x, y_lo, prev_y, False))
+        
+        return path
+
+
+def patience_diff(seq_a: List[str], seq_b: List[str], **options: Any) -> List[DiffResult]:
+    """
+    Convenience function to compute diff using the patience algorithm.
+    
+    Args:
+        seq_a: First sequence
+        seq_b: Second sequence
+        **options: Additional options (ignore_case, ignore_whitespace, etc.)
+        
+    Returns:
+        List of DiffResult objects
+    """
+    differ = PatienceDiff(seq_a, seq_b, **options)
+    return differ.compute()
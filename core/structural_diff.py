@@ -0,0 +1,439 @@
+"""
+Structural Diff - Path-Addressed Comparison of JSON and YAML Documents
+======================================================================
+
+This module compares two JSON or YAML documents as data instead of text,
+so reformatting, reindentation and reordered object keys are not changes,
+and every change is reported at the path of the value that changed, e.g.
+$.users[id=42].email.
+
+Algorithm Overview:
+------------------
+1. Every object and array gets a digest of its subtree (blake2b of its
+   repr, which is built in C). Digests are memoized by node.
+2. Two subtrees with equal digests are equal and are skipped without
+   walking them. Objects whose keys were only reordered get different
+   digests, and are walked without finding changes.
+3. Objects are aligned by key: keys of only one document were removed or
+   added, shared keys are compared recursively.
+4. Arrays of objects that all carry the identity field (e.g. "id") are
+   aligned by its value. Other arrays are aligned by diffing their
+   sequences of element digests with the Myers algorithm; elements of
+   replaced runs are compared pairwise.
+
+Documents are parsed incrementally: a top-level JSON array is decoded
+element by element from the file (as are JSON Lines files and YAML
+document streams), so the raw text is never held in memory as a whole.
+
+Time Complexity: O(N * D) to hash both documents, for depth D of the
+changes (each level of a changed path is hashed once), plus the Myers diff
+of changed arrays
+Space Complexity: O(N) for the parsed documents and their digests
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Any, Dict, List, Optional, TextIO
+
+import yaml
+
+from core.cancellation import CancellationToken
+from core.myers_algorithm import OP_DELETE, OP_EQUAL, OP_INSERT, OPCODE_SIZE, DiffType, MyersDiff
+
+
+# The C loader is much faster, when PyYAML was built with libyaml
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Whitespace between JSON tokens
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Supported document formats
+DOCUMENT_FORMATS = ('json', 'jsonl', 'yaml')
+
+# Number of characters read from a file at a time
+CHUNK_SIZE = 1024 * 1024
+
+# Number of array elements parsed or compared between token checks
+CHECK_INTERVAL = 1024
+
+# Object keys that can be written as .key in a path
+_PLAIN_KEY = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+@dataclass
+class StructuralChange:
+    """
+    A change at one path of a document.
+
+    type is INSERT for added values (old_value is None), DELETE for removed
+    ones (new_value is None), and REPLACE for changed ones.
+    """
+    type: DiffType
+    path: str
+    old_value: Any = None
+    new_value: Any = None
+
+
+class StructuralDiffer:
+    """
+    Compares parsed JSON or YAML documents.
+    """
+
+    def __init__(self, id_field: Optional[str] = None):
+        """
+        Initialize the differ.
+
+        Args:
+            id_field: Field that identifies the objects of an array (e.g.
+                "id"); arrays whose elements all have it are aligned by its
+                value instead of by position
+        """
+        self.id_field = id_field
+        # id() of an object or array -> digest of its subtree
+        self._digests: Dict[int, str] = {}
+        self._token: Optional[CancellationToken] = None
+
+    def compare(self, doc_a: Any, doc_b: Any,
+                token: Optional[CancellationToken] = None) -> List[StructuralChange]:
+        """
+        Compare two parsed documents.
+
+        Array elements are addressed by their index in the old document,
+        except for added elements, which use their index in the new one.
+
+        Args:
+            doc_a: Old document
+            doc_b: New document
+            token: Optional cancellation token, checked while walking arrays
+
+        Returns:
+            Changes in document order
+
+        Raises:
+            OperationCancelled: If the token is cancelled or expires
+        """
+        changes: List[StructuralChange] = []
+        self._digests = {}
+        self._token = token
+        try:
+            self._compare(doc_a, doc_b, '$', changes)
+        finally:
+            self._digests = {}
+            self._token = None
+        return changes
+
+    def _compare(self, a: Any, b: Any, path: str, changes: List[StructuralChange]) -> None:
+        """
+        Compare two values at a path.
+
+        Args:
+            a: Old value
+            b: New value
+            path: Path of both values
+            changes: List the changes are appended to
+        """
+        if isinstance(a, dict) and isinstance(b, dict):
+            if self._digest(a) == self._digest(b):
+                return
+            for key, value in a.items():
+                if key in b:
+                    self._compare(value, b[key], _key_path(path, key), changes)
+                else:
+                    changes.append(StructuralChange(DiffType.DELETE, _key_path(path, key),
+                                                    old_value=value))
+            for key, value in b.items():
+                if key not in a:
+                    changes.append(StructuralChange(DiffType.INSERT, _key_path(path, key),
+                                                    new_value=value))
+        elif isinstance(a, list) and isinstance(b, list):
+            # Arrays are aligned by their element digests, so hashing the
+            # array as a whole would only repeat that work
+            self._compare_arrays(a, b, path, changes)
+        elif type(a) is not type(b) or a != b:
+            changes.append(StructuralChange(DiffType.REPLACE, path, a, b))
+
+    def _compare_arrays(self, a: List[Any], b: List[Any], path: str,
+                        changes: List[StructuralChange]) -> None:
+        """
+        Align two arrays and compare their elements.
+
+        Args:
+            a: Old array
+            b: New array
+            path: Path of both arrays
+            changes: List the changes are appended to
+        """
+        token = self._token
+        by_id_a = self._identities(a)
+        by_id_b = self._identities(b) if by_id_a is not None else None
+        if by_id_a is not None and by_id_b is not None:
+            for count, (identity, element) in enumerate(by_id_a.items()):
+                if token is not None and count % CHECK_INTERVAL == 0:
+                    token.check()
+                element_path = f"{path}[{self.id_field}={_dump_key(identity)}]"
+                if identity in by_id_b:
+                    self._compare(element, by_id_b[identity], element_path, changes)
+                else:
+                    changes.append(StructuralChange(DiffType.DELETE, element_path,
+                                                    old_value=element))
+            for identity, element in by_id_b.items():
+                if identity not in by_id_a:
+                    changes.append(StructuralChange(
+                        DiffType.INSERT, f"{path}[{self.id_field}={_dump_key(identity)}]",
+                        new_value=element))
+            return
+
+        digest = self._digest
+        differ = MyersDiff([digest(element) for element in a],
+                           [digest(element) for element in b])
+        ops = differ.compute_opcodes(token)
+        for k in range(0, len(ops), OPCODE_SIZE):
+            op, i1, i2, j1, j2 = ops[k:k + OPCODE_SIZE]
+            if op == OP_EQUAL:
+                continue
+            if token is not None:
+                token.check()
+            if op != OP_INSERT:
+                # Changed elements pairwise, then the surplus of either side
+                paired = 0 if op == OP_DELETE else min(i2 - i1, j2 - j1)
+                for i, j in zip(range(i1, i1 + paired), range(j1, j1 + paired)):
+                    self._compare(a[i], b[j], f"{path}[{i}]", changes)
+                for i in range(i1 + paired, i2):
+                    changes.append(StructuralChange(DiffType.DELETE, f"{path}[{i}]",
+                                                    old_value=a[i]))
+                j1 += paired
+            for j in range(j1, j2):
+                changes.append(StructuralChange(DiffType.INSERT, f"{path}[{j}]",
+                                                new_value=b[j]))
+
+    def _identities(self, array: List[Any]) -> Optional[Dict[Any, Any]]:
+        """
+        Index the objects of an array by the identity field.
+
+        Args:
+            array: Array to index
+
+        Returns:
+            Dictionary mapping identity values to elements, in array order,
+            or None if some element lacks a unique scalar identity
+        """
+        field = self.id_field
+        if field is None:
+            return None
+        elements: Dict[Any, Any] = {}
+        for element in array:
+            if not isinstance(element, dict):
+                return None
+            identity = element.get(field)
+            if isinstance(identity, (dict, list)) or identity is None or identity in elements:
+                return None
+            elements[identity] = element
+        return elements
+
+    def _digest(self, value: Any) -> str:
+        """
+        Hash a subtree.
+
+        The hash covers the subtree's repr, which Python builds in C and
+        which tells 1, 1.0, true and "1" apart. It depends on key order, so
+        objects with reordered keys get different digests and are compared
+        key by key instead, which finds no changes.
+
+        Args:
+            value: Parsed value
+
+        Returns:
+            Digest that is equal for equal values
+        """
+        if not isinstance(value, (dict, list)):
+            return repr(value)
+        digest = self._digests.get(id(value))
+        if digest is None:
+            text = repr(value).encode('utf-8', 'surrogatepass')
+            # No scalar repr starts with '#'
+            digest = '#' + blake2b(text, digest_size=16).hexdigest()
+            self._digests[id(value)] = digest
+        return digest
+
+
+class _JsonReader:
+    """
+    Decodes a JSON document from a text stream, one top-level array element
+    at a time.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int):
+        """
+        Initialize the reader.
+
+        Args:
+            stream: Text stream to read from
+            chunk_size: Number of characters to read at a time
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def document(self, token: Optional[CancellationToken], interval: int) -> Any:
+        """
+        Decode the whole document.
+
+        Args:
+            token: Optional cancellation token
+            interval: Number of array elements decoded between token checks
+
+        Returns:
+            The decoded document
+
+        Raises:
+            ValueError: If the document is malformed
+            OperationCancelled: If the token is cancelled or expires
+        """
+        if self._peek() != '[':
+            document = self._value()
+        else:
+            self.pos += 1
+            document = []
+            if self._peek() == ']':
+                self.pos += 1
+            else:
+                while True:
+                    if token is not None and len(document) % interval == 0:
+                        token.check()
+                    document.append(self._value())
+                    separator = self._peek()
+                    self.pos += 1
+                    if separator == ']':
+                        break
+                    if separator != ',':
+                        raise ValueError(f"Expected ',' or ']' in JSON array "
+                                         f"(element {len(document)})")
+
+        if self._peek():
+            raise ValueError("Extra data after JSON document")
+        return document
+
+    def _fill(self, size: int) -> None:
+        """Drop the consumed text and read more."""
+        chunk = self.stream.read(size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character ('' at the end)."""
+        while True:
+            whitespace = _JSON_WHITESPACE.match(self.buffer, self.pos)
+            if whitespace is not None:
+                self.pos = whitespace.end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self._fill(self.chunk_size)
+
+    def _value(self) -> Any:
+        """Decode the value at the next non-whitespace position."""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number that ends the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Read at least as much as is pending, so a large value is
+            # re-decoded only a logarithmic number of times
+            self._fill(max(self.chunk_size, len(self.buffer) - self.pos))
+
+
+def load_document(stream: TextIO, fmt: str = 'json',
+                  token: Optional[CancellationToken] = None) -> Any:
+    """
+    Parse a document from a text stream.
+
+    Args:
+        stream: Text stream positioned at the start of the document
+        fmt: 'json', 'jsonl' (one JSON value per line) or 'yaml'
+        token: Optional cancellation token, checked between array
+            elements, lines or YAML documents
+
+    Returns:
+        The parsed document; JSON Lines files and YAML streams with
+        several documents are returned as a list of them
+
+    Raises:
+        ValueError: If the format is not supported or the document is
+            malformed
+        OperationCancelled: If the token is cancelled or expires
+    """
+    if fmt not in DOCUMENT_FORMATS:
+        raise ValueError(f"Unknown document format: {fmt}")
+
+    if fmt == 'yaml':
+        documents = []
+        try:
+            for document in yaml.load_all(stream, Loader=_YAML_LOADER):
+                if token is not None:
+                    token.check()
+                documents.append(document)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML: {e}") from e
+        if len(documents) == 1:
+            return documents[0]
+        return documents or None
+
+    if fmt == 'jsonl':
+        values = []
+        for number, line in enumerate(stream):
+            if token is not None and number % CHECK_INTERVAL == 0:
+                token.check()
+            if line.strip():
+                values.append(json.loads(line))
+        return values
+
+    return _JsonReader(stream, CHUNK_SIZE).document(token, CHECK_INTERVAL)
+
+
+def _key_path(path: str, key: Any) -> str:
+    """Extend a path by an object key."""
+    if isinstance(key, str) and _PLAIN_KEY.match(key):
+        return f"{path}.{key}"
+    return f"{path}[{_dump_key(key)}]"
+
+
+def _dump_key(key: Any) -> str:
+    """Format a key or identity value for a path."""
+    return json.dumps(key, ensure_ascii=False, default=str)
+
+
+def compare_documents(path_a: str, path_b: str, fmt: str = 'json',
+                      id_field: Optional[str] = None,
+                      encoding: str = 'utf-8') -> List[StructuralChange]:
+    """
+    Convenience function to compare two JSON or YAML files.
+
+    Args:
+        path_a: Old file path
+        path_b: New file path
+        fmt: 'json', 'jsonl' or 'yaml'
+        id_field: Field that identifies the objects of arrays
+        encoding: Encoding of both files
+
+    Returns:
+        Changes in document order
+    """
+    with open(path_a, 'r', encoding=encoding) as f:
+        doc_a = load_document(f, fmt)
+    with open(path_b, 'r', encoding=encoding) as f:
+        doc_b = load_document(f, fmt)
+    return StructuralDiffer(id_field).compare(doc_a, doc_b)
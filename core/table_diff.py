@@ -0,0 +1,431 @@
+"""
+Table Diff - Keyed Comparison of CSV Files
+==========================================
+
+This module compares two CSV files whose row order carries no meaning,
+such as daily database extracts. Rows are matched by the values of one
+or more key columns, and the comparison reports rows that were added,
+removed or changed, and for changed rows the old and new value of every
+changed column. Columns are matched by header name.
+
+Algorithm Overview:
+------------------
+1. Stream the old file into a hash table from key to row.
+2. If the table outgrows the memory budget, switch to a partitioned hash
+   join: the rows loaded so far and the rest of the old file, then the new
+   file, are written to spill files by hash(key) % P, with P chosen so that
+   one partition fits in the budget.
+3. Join every partition (or the single in-memory table) by streaming the
+   new file's rows against the old file's table: a matching row is compared
+   column by column, an unmatched new row was added, and the old rows left
+   in the table were removed.
+
+Time Complexity: O(N + M) for N and M rows (plus one spill write and read
+of both files when partitioned)
+Space Complexity: O(memory budget) plus the reported changes
+"""
+
+import csv
+import math
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from core.cancellation import CancellationToken
+from core.myers_algorithm import DiffResult, DiffType
+
+
+# Key values of a row
+RowKey = Tuple[str, ...]
+
+
+@dataclass
+class RowChange:
+    """
+    A row that was added, removed or changed.
+
+    Row numbers are 0-based line numbers in their file (the header is line
+    0) and are None for the file the row is missing from.
+    """
+    type: DiffType
+    key: RowKey
+    old_row: Optional[int] = None
+    new_row: Optional[int] = None
+    # Values of an added or removed row, by column name
+    values: Dict[str, str] = field(default_factory=dict)
+    # Changed columns of a changed row: column name -> (old value, new value)
+    columns: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+
+
+@dataclass
+class TableResult:
+    """Result of a keyed table comparison."""
+    key_columns: List[str]
+    # Compared columns, in the old file's order
+    columns: List[str]
+    # Columns of only one of the files
+    added_columns: List[str]
+    removed_columns: List[str]
+    added: List[RowChange]
+    removed: List[RowChange]
+    changed: List[RowChange]
+    rows_a: int
+    rows_b: int
+    # Number of spill partitions (0 if the join ran in memory)
+    partitions: int = 0
+
+    def diff_results(self) -> List[DiffResult]:
+        """
+        Convert the row changes into diff results, for reports.
+
+        Every change becomes one result over its row's line; added rows are
+        placed after the last line of the old file, and removed rows after
+        the last line of the new one.
+
+        Returns:
+            DELETE, INSERT and REPLACE results, ordered by old and new line
+        """
+        results = []
+        for change in self.changed:
+            old_line = ','.join(change.key) + ': ' + ', '.join(
+                f"{name}={old}" for name, (old, _) in change.columns.items())
+            new_line = ','.join(change.key) + ': ' + ', '.join(
+                f"{name}={new}" for name, (_, new) in change.columns.items())
+            results.append(DiffResult(DiffType.REPLACE, _line(change.old_row), 1,
+                                      _line(change.new_row), 1, [old_line], [new_line]))
+        for change in self.removed:
+            results.append(DiffResult(DiffType.DELETE, _line(change.old_row), 1,
+                                      self.rows_b + 1, 0, [_format_values(change.values)], []))
+        for change in self.added:
+            results.append(DiffResult(DiffType.INSERT, self.rows_a + 1, 0,
+                                      _line(change.new_row), 1, [], [_format_values(change.values)]))
+        results.sort(key=lambda r: (r.old_start, r.new_start))
+        return results
+
+    def format_summary(self) -> str:
+        """
+        Format the counts of changes as text.
+
+        Returns:
+            One-line summary
+        """
+        summary = (f"{len(self.added)} row(s) added, {len(self.removed)} removed, "
+                   f"{len(self.changed)} changed ({self.rows_a} vs {self.rows_b} rows)")
+        if self.added_columns or self.removed_columns:
+            summary += (f"; columns added: {', '.join(self.added_columns) or '-'}, "
+                        f"removed: {', '.join(self.removed_columns) or '-'}")
+        return summary
+
+
+class TableDiffer:
+    """
+    Compares CSV files by key with a bounded-memory hash join.
+    """
+
+    # Default memory budget for the in-memory table (256 MB)
+    MEMORY_BUDGET = 256 * 1024 * 1024
+
+    # Estimated bytes of a row in the hash table, beyond its field text
+    ROW_OVERHEAD = 160
+    FIELD_OVERHEAD = 57
+
+    # Number of rows read between token checks
+    CHECK_INTERVAL = 4096
+
+    def __init__(self, key_columns: Sequence[str], memory_budget: Optional[int] = None,
+                 encoding: str = 'utf-8', delimiter: str = ','):
+        """
+        Initialize the differ.
+
+        Args:
+            key_columns: Names of the columns that identify a row
+            memory_budget: Approximate bytes the hash table may use before
+                the join is partitioned through spill files
+            encoding: Encoding of both files
+            delimiter: Field delimiter
+
+        Raises:
+            ValueError: If no key column is given
+        """
+        if not key_columns:
+            raise ValueError("At least one key column is required")
+        self.key_columns = list(key_columns)
+        self.memory_budget = memory_budget or self.MEMORY_BUDGET
+        self.encoding = encoding
+        self.delimiter = delimiter
+
+    def compare_files(self, path_a: str, path_b: str,
+                      token: Optional[CancellationToken] = None) -> TableResult:
+        """
+        Compare two CSV files.
+
+        Args:
+            path_a: Old file path
+            path_b: New file path
+            token: Optional cancellation token, checked while reading rows
+
+        Returns:
+            TableResult with the added, removed and changed rows
+
+        Raises:
+            ValueError: If a file has no header, lacks a key column or
+                repeats a key
+            OperationCancelled: If the token is cancelled or expires
+        """
+        with open(path_a, 'r', encoding=self.encoding, errors='replace', newline='') as file_a, \
+                open(path_b, 'r', encoding=self.encoding, errors='replace', newline='') as file_b:
+            reader_a = csv.reader(file_a, delimiter=self.delimiter)
+            reader_b = csv.reader(file_b, delimiter=self.delimiter)
+            header_a = self._header(reader_a, path_a)
+            header_b = self._header(reader_b, path_b)
+
+            columns = [name for name in header_a if name in header_b]
+            result = TableResult(
+                key_columns=self.key_columns,
+                columns=columns,
+                added_columns=[name for name in header_b if name not in header_a],
+                removed_columns=[name for name in header_a if name not in header_b],
+                added=[], removed=[], changed=[], rows_a=0, rows_b=0)
+            join = _Join(self, header_a, header_b, result)
+
+            # Load the old file until it is read or over budget
+            table: Dict[RowKey, Tuple[int, List[str]]] = {}
+            rows_a = self._rows(reader_a, header_a, token)
+            used = text = 0
+            for line, key, row in rows_a:
+                if key in table:
+                    raise ValueError(f"Duplicate key {key} in {path_a}")
+                table[key] = (line, row)
+                row_text = sum(map(len, row))
+                text += row_text + len(row)
+                used += self.ROW_OVERHEAD + self.FIELD_OVERHEAD * len(row) + row_text
+                if used > self.memory_budget:
+                    break
+            else:
+                join.run(table, self._rows(reader_b, header_b, token), path_b)
+                return _sorted(result)
+
+            # Partition so that one partition of the old file fits in the budget
+            size = os.path.getsize(path_a)
+            partitions = max(2, math.ceil(size * (used / max(text, 1)) / self.memory_budget) + 1)
+            result.partitions = partitions
+            with tempfile.TemporaryDirectory(prefix='table-diff-') as spill_dir:
+                spill_a = _Spill(spill_dir, 'a', partitions, self.delimiter)
+                spill_b = _Spill(spill_dir, 'b', partitions, self.delimiter)
+                try:
+                    for key, (line, row) in table.items():
+                        spill_a.write(key, line, row)
+                    table.clear()
+                    for line, key, row in rows_a:
+                        spill_a.write(key, line, row)
+                    for line, key, row in self._rows(reader_b, header_b, token):
+                        spill_b.write(key, line, row)
+                finally:
+                    spill_a.close()
+                    spill_b.close()
+
+                for part in range(partitions):
+                    table = {}
+                    for line, key, row in spill_a.read(part, token, self.CHECK_INTERVAL):
+                        if key in table:
+                            raise ValueError(f"Duplicate key {key} in {path_a}")
+                        table[key] = (line, row)
+                    join.run(table, spill_b.read(part, token, self.CHECK_INTERVAL), path_b)
+            return _sorted(result)
+
+    def _header(self, reader: Any, path: str) -> List[str]:
+        """
+        Read the header row and check for the key columns.
+
+        Args:
+            reader: CSV reader at the start of the file
+            path: File path, for errors
+
+        Returns:
+            Column names
+
+        Raises:
+            ValueError: If the file is empty or lacks a key column
+        """
+        header: Optional[List[str]] = next(reader, None)
+        if header is None:
+            raise ValueError(f"No header row in {path}")
+        missing = [name for name in self.key_columns if name not in header]
+        if missing:
+            raise ValueError(f"Key column(s) {', '.join(missing)} not found in {path}")
+        return header
+
+    def _rows(self, reader: Any, header: List[str],
+              token: Optional[CancellationToken]) -> Iterator[Tuple[int, RowKey, List[str]]]:
+        """
+        Stream the data rows of a file.
+
+        Args:
+            reader: CSV reader after the header row
+            header: Column names
+            token: Optional cancellation token
+
+        Yields:
+            (line number, key, values padded to the header's width)
+        """
+        key_indices = [header.index(name) for name in self.key_columns]
+        width = len(header)
+        for count, row in enumerate(reader):
+            if token is not None and count % self.CHECK_INTERVAL == 0:
+                token.check()
+            if not row:
+                continue
+            if len(row) < width:
+                row.extend([''] * (width - len(row)))
+            yield reader.line_num - 1, tuple(row[i] for i in key_indices), row
+
+
+class _Join:
+    """
+    Joins partitions of the new file against hash tables of the old one.
+    """
+
+    def __init__(self, differ: TableDiffer, header_a: List[str], header_b: List[str],
+                 result: TableResult):
+        """
+        Initialize the join.
+
+        Args:
+            differ: Differ whose key columns are used
+            header_a: Column names of the old file
+            header_b: Column names of the new file
+            result: Result the changes and row counts are added to
+        """
+        self.header_a = header_a
+        self.header_b = header_b
+        self.result = result
+        # (name, old index, new index) of the compared non-key columns
+        self.compared = [(name, header_a.index(name), header_b.index(name))
+                         for name in result.columns if name not in differ.key_columns]
+
+    def run(self, table: Dict[RowKey, Tuple[int, List[str]]],
+            rows_b: Iterator[Tuple[int, RowKey, List[str]]], path_b: str) -> None:
+        """
+        Join the new rows of one partition against the old rows.
+
+        Args:
+            table: Old rows by key; emptied by the join
+            rows_b: New rows of the same partition
+            path_b: New file path, for errors
+
+        Raises:
+            ValueError: If the new rows repeat a key
+        """
+        result = self.result
+        result.rows_a += len(table)
+        seen = set()
+        for line, key, row in rows_b:
+            if key in seen:
+                raise ValueError(f"Duplicate key {key} in {path_b}")
+            seen.add(key)
+            result.rows_b += 1
+
+            old = table.pop(key, None)
+            if old is None:
+                result.added.append(RowChange(DiffType.INSERT, key, new_row=line,
+                                              values=dict(zip(self.header_b, row))))
+                continue
+            old_line, old_row = old
+            columns = {name: (old_row[i], row[j])
+                       for name, i, j in self.compared if old_row[i] != row[j]}
+            if columns:
+                result.changed.append(RowChange(DiffType.REPLACE, key, old_line, line,
+                                                columns=columns))
+
+        for key, (line, row) in table.items():
+            result.removed.append(RowChange(DiffType.DELETE, key, old_row=line,
+                                            values=dict(zip(self.header_a, row))))
+        table.clear()
+
+
+class _Spill:
+    """
+    Hash-partitioned spill files of one side of the join.
+    """
+
+    def __init__(self, directory: str, prefix: str, partitions: int, delimiter: str):
+        """
+        Create the partition files.
+
+        Args:
+            directory: Directory for the files
+            prefix: File name prefix
+            partitions: Number of partitions
+            delimiter: Field delimiter
+        """
+        self.paths = [os.path.join(directory, f"{prefix}{part}.csv")
+                      for part in range(partitions)]
+        self.files: List[TextIO] = [open(path, 'w', encoding='utf-8', newline='')
+                                    for path in self.paths]
+        self.writers = [csv.writer(f, delimiter=delimiter) for f in self.files]
+        self.delimiter = delimiter
+
+    def write(self, key: RowKey, line: int, row: List[str]) -> None:
+        """Append a row, with its line number, to its key's partition."""
+        self.writers[hash(key) % len(self.writers)].writerow([line, len(key), *key, *row])
+
+    def close(self) -> None:
+        """Close the partition files."""
+        for f in self.files:
+            f.close()
+
+    def read(self, part: int, token: Optional[CancellationToken],
+             interval: int) -> Iterator[Tuple[int, RowKey, List[str]]]:
+        """
+        Stream the rows of one partition.
+
+        Args:
+            part: Partition number
+            token: Optional cancellation token
+            interval: Number of rows read between token checks
+
+        Yields:
+            (line number, key, values) as written
+        """
+        with open(self.paths[part], 'r', encoding='utf-8', newline='') as f:
+            for count, record in enumerate(csv.reader(f, delimiter=self.delimiter)):
+                if token is not None and count % interval == 0:
+                    token.check()
+                key_size = int(record[1])
+                yield int(record[0]), tuple(record[2:2 + key_size]), record[2 + key_size:]
+
+
+def _sorted(result: TableResult) -> TableResult:
+    """Order the changes of a result by line number."""
+    result.added.sort(key=lambda change: _line(change.new_row))
+    result.removed.sort(key=lambda change: _line(change.old_row))
+    result.changed.sort(key=lambda change: _line(change.old_row))
+    return result
+
+
+def _line(row: Optional[int]) -> int:
+    """Line number of a row that is in its file (-1 if it is not)."""
+    return -1 if row is None else row
+
+
+def _format_values(values: Dict[str, str]) -> str:
+    """Format the values of a row for display."""
+    return ', '.join(f"{name}={value}" for name, value in values.items())
+
+
+def compare_tables(path_a: str, path_b: str, key_columns: Sequence[str],
+                   encoding: str = 'utf-8') -> TableResult:
+    """
+    Convenience function to compare two CSV files by key.
+
+    Args:
+        path_a: Old file path
+        path_b: New file path
+        key_columns: Names of the columns that identify a row
+        encoding: Encoding of both files
+
+    Returns:
+        TableResult with the added, removed and changed rows
+    """
+    return TableDiffer(key_columns, encoding=encoding).compare_files(path_a, path_b)
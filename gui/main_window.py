@@ -8,6 +8,7 @@ The main application window with menu bar, toolbar, and tabbed interface.
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from typing import Optional, List, Tuple
+import multiprocessing
 import os
 
 try:
@@ -18,6 +19,7 @@ except ImportError:
     import tkinter.ttk as ttk
 
 from config import get_config_manager
+from core.comment_stripper import detect_language
 from core.diff_engine import create_diff_engine
 from core.file_handler import FileHandler
 from core.directory_handler import DirectoryHandler
@@ -361,9 +363,14 @@ class MainWindow(ctk.CTk if CTK_AVAILABLE else tk.Tk):
                 'ignore_case': self.config_manager.get('ignore_case', False),
                 'ignore_whitespace': self.config_manager.get('ignore_whitespace', False),
                 'ignore_blank_lines': self.config_manager.get('ignore_blank_lines', False),
-            })
+                'ignore_comments': self.config_manager.get('ignore_comments', False),
+                'fuzzy_matching': self.config_manager.get('fuzzy_matching', False),
+                'moving_block_detection': self.config_manager.get('moving_block_detection', False),
+                'language': detect_language(file1),
+            }, self.config_manager.get_diff_cache())
             
-            results = diff_engine.compare_lines(lines1, lines2)
+            results = diff_engine.compare_lines(lines1, lines2,
+                                                content_hashes=(info1.content_key, info2.content_key))
             
             # Create comparison tab
             self._create_comparison_tab(file1, file2, lines1, lines2, results)
@@ -514,12 +521,14 @@ class MainWindow(ctk.CTk if CTK_AVAILABLE else tk.Tk):
         left_text.tag_config("changed", background="#FFD700")
         left_text.tag_config("blank_added", background="#E8F5E9")  # Light green for blank lines
         left_text.tag_config("blank_deleted", background="#FCE4EC")  # Light red for blank lines
+        left_text.tag_config("moved", background="#ADD8E6")  # Light blue for moved blocks
         
         right_text.tag_config("added", background="#90EE90")
         right_text.tag_config("deleted", background="#FFB6C1")
         right_text.tag_config("changed", background="#FFD700")
         right_text.tag_config("blank_added", background="#E8F5E9")  # Light green for blank lines
         right_text.tag_config("blank_deleted", background="#FCE4EC")  # Light red for blank lines
+        right_text.tag_config("moved", background="#ADD8E6")  # Light blue for moved blocks
         
         # Store references for theme updates
         self.left_text = left_text
@@ -534,13 +543,15 @@ class MainWindow(ctk.CTk if CTK_AVAILABLE else tk.Tk):
                     left_text.insert(tk.END, line + "\n")
                     right_text.insert(tk.END, line + "\n")
             
-            elif result.type.value == 'delete':
-                # Add deleted lines on left, blank lines on right (with light red highlighting)
+            elif result.type.value == 'delete' or (result.type.value == 'moved' and result.old_count):
+                # Add deleted lines on left, blank lines on right (with light red highlighting);
+                # blocks moved away are shown the same way in light blue
+                tag = "moved" if result.type.value == 'moved' else "deleted"
                 for line in result.old_lines:
                     line_start = left_text.index("end-1c")
                     left_text.insert(tk.END, line + "\n")
                     line_end = left_text.index("end-1c")
-                    left_text.tag_add("deleted", line_start, line_end)
+                    left_text.tag_add(tag, line_start, line_end)
                     
                     # Add blank line on right with light red highlighting
                     blank_start = right_text.index("end-1c")
@@ -548,8 +559,10 @@ class MainWindow(ctk.CTk if CTK_AVAILABLE else tk.Tk):
                     blank_end = right_text.index("end-1c")
                     right_text.tag_add("blank_deleted", blank_start, blank_end)
             
-            elif result.type.value == 'insert':
-                # Add inserted lines on right, blank lines on left (with light green highlighting)
+            elif result.type.value in ('insert', 'moved'):
+                # Add inserted lines on right, blank lines on left (with light green highlighting);
+                # blocks moved here are shown the same way in light blue
+                tag = "moved" if result.type.value == 'moved' else "added"
                 for line in result.new_lines:
                     # Add blank line on left with light green highlighting
                     blank_start = left_text.index("end-1c")
@@ -560,17 +573,24 @@ class MainWindow(ctk.CTk if CTK_AVAILABLE else tk.Tk):
                     line_start = right_text.index("end-1c")
                     right_text.insert(tk.END, line + "\n")
                     line_end = right_text.index("end-1c")
-                    right_text.tag_add("added", line_start, line_end)
+                    right_text.tag_add(tag, line_start, line_end)
             
             elif result.type.value == 'replace':
-                # Add changed lines, padding with blank lines to keep alignment
-                max_lines = max(len(result.old_lines), len(result.new_lines))
+                # Add changed lines, padding with blank lines to keep alignment.
+                # Rows follow the fuzzy line pairing when there is one, so
+                # similar lines end up side by side
+                rows = result.line_pairs
+                if rows is None:
+                    max_lines = max(len(result.old_lines), len(result.new_lines))
+                    rows = [(i if i < len(result.old_lines) else None,
+                             i if i < len(result.new_lines) else None)
+                            for i in range(max_lines)]
                 
                 # Add old lines (changed)
-                for i in range(max_lines):
-                    if i < len(result.old_lines):
+                for old_index, new_index in rows:
+                    if old_index is not None:
                         line_start = left_text.index("end-1c")
-                        left_text.insert(tk.END, result.old_lines[i] + "\n")
+                        left_text.insert(tk.END, result.old_lines[old_index] + "\n")
                         line_end = left_text.index("end-1c")
                         left_text.tag_add("changed", line_start, line_end)
                     else:
@@ -579,9 +599,9 @@ class MainWindow(ctk.CTk if CTK_AVAILABLE else tk.Tk):
                         blank_end = left_text.index("end-1c")
                         left_text.tag_add("blank_deleted", blank_start, blank_end)
                     
-                    if i < len(result.new_lines):
+                    if new_index is not None:
                         line_start = right_text.index("end-1c")
-                        right_text.insert(tk.END, result.new_lines[i] + "\n")
+                        right_text.insert(tk.END, result.new_lines[new_index] + "\n")
                         line_end = right_text.index("end-1c")
                         right_text.tag_add("changed", line_start, line_end)
                     else:
@@ -813,5 +833,7 @@ Built with Python and CustomTkinter
 
 
 if __name__ == '__main__':
+    # Worker processes of frozen (PyInstaller) builds re-run this script
+    multiprocessing.freeze_support()
     app = MainWindow()
     app.mainloop()
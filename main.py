@@ -9,14 +9,16 @@ import sys
 import os
 import argparse
 import logging
+import multiprocessing
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 # Add project root to path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from config import get_config_manager
+from core.cancellation import CancellationToken
 from core.diff_engine import create_diff_engine
 from core.file_handler import FileHandler
 from core.directory_handler import DirectoryHandler
@@ -35,7 +37,8 @@ def setup_logging():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
             logging.FileHandler(log_file),
-            logging.StreamHandler(sys.stdout)
+            # stderr keeps stdout clean for diff output (--unified without -o)
+            logging.StreamHandler(sys.stderr)
         ]
     )
     
@@ -55,9 +58,18 @@ Examples:
   # Compare two files
   python main.py file1.txt file2.txt
   
+  # Write a unified diff (patch) to stdout
+  python main.py --unified file1.txt file2.txt > changes.patch
+  
   # Compare directories
   python main.py --dir folder1 folder2
   
+  # Compare a base file against many variants
+  python main.py --many golden.conf host1.conf host2.conf host3.conf
+  
+  # Compare JSON/YAML as data, matching array objects by their "id"
+  python main.py --structure --id-field id old.json new.json
+  
   # Three-way merge
   python main.py --merge base.txt yours.txt theirs.txt -o output.txt
   
@@ -71,18 +83,46 @@ Examples:
     
     # Comparison mode
     parser.add_argument('--dir', action='store_true', help='Compare directories')
-    parser.add_argument('--merge', action='store_true', help='Three-way merge mode')
+    parser.add_argument('--many', action='store_true',
+                        help='Compare the first file against each of the others and summarize drift')
+    parser.add_argument('--merge', action='store_true',
+                        help='Three-way merge of base, yours and theirs (exit code 1 on conflicts)')
+    parser.add_argument('--structure', action='store_true',
+                        help='Compare JSON/YAML files as data, reporting changes by path. '
+                             'Not chosen from the file extension, since without it these '
+                             'files get the usual line diff, which keeps line numbers and '
+                             'can be written as a patch with --unified')
+    parser.add_argument('--id-field',
+                        help='Field identifying array objects in structural comparisons (e.g. id)')
+    parser.add_argument('--table', action='store_true',
+                        help='Compare CSV files as tables, matching rows by --key')
+    parser.add_argument('--key',
+                        help='Comma-separated key columns for --table (e.g. id,date)')
     
     # Output options
     parser.add_argument('-o', '--output', help='Output file path')
     parser.add_argument('--html', action='store_true', help='Generate HTML report')
     parser.add_argument('--pdf', action='store_true', help='Generate PDF report')
-    parser.add_argument('--unified', action='store_true', help='Generate unified diff')
+    parser.add_argument('--unified', action='store_true',
+                        help='Generate unified diff (to --output, or stdout if not given)')
+    parser.add_argument('-U', '--context', type=int, default=3,
+                        help='Context lines in unified diff hunks (default: 3)')
     
     # Comparison options
     parser.add_argument('--ignore-case', action='store_true', help='Ignore case differences')
     parser.add_argument('--ignore-whitespace', action='store_true', help='Ignore whitespace')
     parser.add_argument('--ignore-blank-lines', action='store_true', help='Ignore blank lines')
+    parser.add_argument('--ignore-comments', action='store_true',
+                        help='Ignore comments (language from --syntax or the file name)')
+    parser.add_argument('--algorithm',
+                        choices=['myers', 'greedy', 'linear', 'bitparallel', 'patience', 'histogram'],
+                        default='myers', help='Line diff algorithm')
+    parser.add_argument('--timeout', type=float,
+                        help='Time budget in seconds; slow diffs finish with a faster, non-minimal result')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='Worker processes for very large files (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or write the on-disk cache of diff results')
     parser.add_argument('--syntax', help='Syntax highlighting language')
     parser.add_argument('--encoding', help='File encoding (utf-8, utf-16, etc.)')
     
@@ -114,18 +154,35 @@ def cli_compare_files(file1: str, file2: str, args):
             'ignore_case': args.ignore_case,
             'ignore_whitespace': args.ignore_whitespace,
             'ignore_blank_lines': args.ignore_blank_lines,
+            'ignore_comments': args.ignore_comments,
+            'algorithm': args.algorithm,
+            'max_workers': args.jobs,
         }
         
+        if args.ignore_comments:
+            from core.comment_stripper import detect_language
+            options['language'] = args.syntax or detect_language(file1)
+        
+        token = CancellationToken(timeout=args.timeout) if args.timeout else None
+        
         # Read files
         file_handler = FileHandler(encoding=args.encoding)
-        lines1, info1 = file_handler.read_file(file1)
-        lines2, info2 = file_handler.read_file(file2)
+        lines1, info1 = file_handler.read_file(file1, token)
+        lines2, info2 = file_handler.read_file(file2, token)
         
         logger.info(f"Comparing {file1} ({len(lines1)} lines) with {file2} ({len(lines2)} lines)")
         
         # Compare
-        diff_engine = create_diff_engine(options)
-        results = diff_engine.compare_lines(lines1, lines2)
+        cache = None if args.no_cache else get_config_manager().get_diff_cache()
+        diff_engine = create_diff_engine(options, cache)
+        results = diff_engine.compare_lines(lines1, lines2, token,
+                                            (info1.content_key, info2.content_key))
+        
+        if args.unified and not args.output:
+            # Stream the patch straight to stdout so it can be piped
+            from core.myers_algorithm import write_unified_diff
+            write_unified_diff(results, sys.stdout, file1, file2, args.context)
+            return 0
         
         # Display results
         print(f"\n=== Comparison Results ===")
@@ -147,10 +204,9 @@ def cli_compare_files(file1: str, file2: str, args):
                 print(f"\nGenerating HTML report to {args.output}...")
                 # HTML generation would go here
             elif args.unified:
-                from core.myers_algorithm import format_diff_unified
-                unified_diff = format_diff_unified(results, file1, file2)
+                from core.myers_algorithm import write_unified_diff
                 with open(args.output, 'w', encoding='utf-8') as f:
-                    f.write(unified_diff)
+                    write_unified_diff(results, f, file1, file2, args.context)
                 print(f"\nUnified diff saved to {args.output}")
         
         return 0
@@ -161,6 +217,207 @@ def cli_compare_files(file1: str, file2: str, args):
         return 1
 
 
+def cli_compare_documents(file1: str, file2: str, args: argparse.Namespace) -> int:
+    """
+    Compare two JSON or YAML files structurally in CLI mode.
+    
+    Args:
+        file1: First file path
+        file2: Second file path
+        args: Command-line arguments
+    """
+    logger = logging.getLogger('PythonExamDiff')
+    
+    try:
+        from core.structural_diff import StructuralDiffer
+        from utils.report_generator import ReportGenerator
+        
+        token = CancellationToken(timeout=args.timeout) if args.timeout else None
+        
+        file_handler = FileHandler(encoding=args.encoding)
+        doc1, _ = file_handler.read_document(file1, token)
+        doc2, _ = file_handler.read_document(file2, token)
+        
+        logger.info(f"Comparing documents {file1} and {file2}")
+        
+        changes = StructuralDiffer(args.id_field).compare(doc1, doc2, token)
+        
+        generator = ReportGenerator("Structural Comparison Report")
+        if args.output and args.html:
+            generator.generate_structural_html(file1, file2, changes, args.output)
+            print(f"HTML report saved to {args.output}")
+        elif args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(generator.generate_structural_text(file1, file2, changes))
+            print(f"Report saved to {args.output}")
+        else:
+            print(generator.generate_structural_text(file1, file2, changes))
+        
+        return 0
+    
+    except Exception as e:
+        logger.error(f"Error comparing documents: {e}", exc_info=True)
+        print(f"ERROR: {e}")
+        return 1
+
+
+def cli_compare_tables(file1: str, file2: str, args: argparse.Namespace) -> int:
+    """
+    Compare two CSV files by key in CLI mode.
+    
+    Args:
+        file1: First file path
+        file2: Second file path
+        args: Command-line arguments
+    """
+    logger = logging.getLogger('PythonExamDiff')
+    
+    try:
+        from core.table_diff import TableDiffer
+        
+        token = CancellationToken(timeout=args.timeout) if args.timeout else None
+        
+        key_columns = [name.strip() for name in args.key.split(',') if name.strip()]
+        differ = TableDiffer(key_columns, encoding=args.encoding or 'utf-8')
+        
+        logger.info(f"Comparing tables {file1} and {file2} by {', '.join(key_columns)}")
+        
+        result = differ.compare_files(file1, file2, token)
+        
+        print(f"\n=== Table Comparison Results ===")
+        print(f"File 1: {file1}")
+        print(f"File 2: {file2}")
+        print(f"\n{result.format_summary()}")
+        
+        for diff in result.diff_results():
+            if diff.type.value == 'delete':
+                print(f"\nDELETE row at line {diff.old_start+1}: {diff.old_lines[0]}")
+            elif diff.type.value == 'insert':
+                print(f"\nINSERT row at line {diff.new_start+1}: {diff.new_lines[0]}")
+            else:
+                print(f"\nREPLACE row at line {diff.old_start+1}:")
+                print("  OLD:", diff.old_lines[0])
+                print("  NEW:", diff.new_lines[0])
+        
+        if args.output and args.html:
+            from utils.report_generator import ReportGenerator
+            ReportGenerator("Table Comparison Report").generate_table_html(
+                file1, file2, result, args.output)
+            print(f"\nHTML report saved to {args.output}")
+        
+        return 0
+    
+    except Exception as e:
+        logger.error(f"Error comparing tables: {e}", exc_info=True)
+        print(f"ERROR: {e}")
+        return 1
+
+
+def cli_compare_many(base: str, variants: List[str], args: argparse.Namespace) -> int:
+    """
+    Compare one base file against many variants in CLI mode.
+    
+    Args:
+        base: Base file path
+        variants: Variant file paths
+        args: Command-line arguments
+    """
+    logger = logging.getLogger('PythonExamDiff')
+    
+    try:
+        options = {
+            'ignore_case': args.ignore_case,
+            'ignore_whitespace': args.ignore_whitespace,
+            'ignore_blank_lines': args.ignore_blank_lines,
+            'ignore_comments': args.ignore_comments,
+            'algorithm': args.algorithm,
+            'max_workers': args.jobs,
+        }
+        if args.ignore_comments:
+            from core.comment_stripper import detect_language
+            options['language'] = args.syntax or detect_language(base)
+        
+        token = CancellationToken(timeout=args.timeout) if args.timeout else None
+        
+        file_handler = FileHandler(encoding=args.encoding)
+        base_lines, base_info = file_handler.read_file(base, token)
+        variant_lines = [file_handler.read_file(path, token)[0] for path in variants]
+        
+        logger.info(f"Comparing {base} ({len(base_lines)} lines) with {len(variants)} variants")
+        
+        diff_engine = create_diff_engine(options)
+        base_index = diff_engine.index_base(base_lines, base_info.content_key)
+        many = diff_engine.compare_many(base_index, variant_lines, token)
+        
+        print(f"\n=== N-Way Comparison ===")
+        print(f"Base: {base}")
+        for path, results in zip(variants, many.results):
+            changes = len([r for r in results if r.type.value != 'equal'])
+            print(f"  {path}: {changes} change(s)")
+        print(f"\n=== Drift Summary ===")
+        print(many.format_summary())
+        
+        return 0
+    
+    except Exception as e:
+        logger.error(f"Error comparing files: {e}", exc_info=True)
+        print(f"ERROR: {e}")
+        return 1
+
+
+def cli_merge_files(base: str, yours: str, theirs: str, args: argparse.Namespace) -> int:
+    """
+    Three-way merge files in CLI mode.
+    
+    The merged file is streamed to --output, or stdout if not given, with
+    diff3 conflict blocks labelled by file name.
+    
+    Args:
+        base: Base file path
+        yours: Your version's file path
+        theirs: Their version's file path
+        args: Command-line arguments
+        
+    Returns:
+        0 if the merge is clean, 1 if it has conflicts, 2 on errors
+    """
+    logger = logging.getLogger('PythonExamDiff')
+    
+    try:
+        from core.merge import ThreeWayMerger
+        
+        token = CancellationToken(timeout=args.timeout) if args.timeout else None
+        
+        file_handler = FileHandler(encoding=args.encoding)
+        base_lines, _ = file_handler.read_file(base, token)
+        yours_lines, _ = file_handler.read_file(yours, token)
+        theirs_lines, _ = file_handler.read_file(theirs, token)
+        
+        logger.info(f"Merging {yours} and {theirs} (base {base})")
+        
+        cache = None if args.no_cache else get_config_manager().get_diff_cache()
+        engine = create_diff_engine({'algorithm': args.algorithm, 'max_workers': args.jobs}, cache)
+        merger = ThreeWayMerger(engine, labels=(yours, base, theirs))
+        
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                conflicts = merger.write(base_lines, yours_lines, theirs_lines, f, token)
+        else:
+            conflicts = merger.write(base_lines, yours_lines, theirs_lines, sys.stdout, token)
+        
+        # stderr keeps stdout clean for the merged file
+        if conflicts:
+            print(f"Merge has {len(conflicts)} conflict(s)", file=sys.stderr)
+            return 1
+        print("Merge complete, no conflicts", file=sys.stderr)
+        return 0
+    
+    except Exception as e:
+        logger.error(f"Error merging files: {e}", exc_info=True)
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+
+
 def cli_compare_directories(dir1: str, dir2: str, args):
     """
     Compare two directories in CLI mode.
@@ -189,7 +446,9 @@ def cli_compare_directories(dir1: str, dir2: str, args):
         def progress(msg):
             print(f"  {msg}")
         
-        result = handler.compare_directories(dir1, dir2, progress_callback=progress)
+        token = CancellationToken(timeout=args.timeout) if args.timeout else None
+        result = handler.compare_directories(dir1, dir2, progress_callback=progress,
+                                             token=token)
         
         # Display statistics
         stats = result.get_statistics()
@@ -267,14 +526,20 @@ def main():
     
     try:
         # Determine mode
-        if args.no_gui or args.html or args.pdf or args.unified:
+        if (args.no_gui or args.html or args.pdf or args.unified or args.merge or args.many
+                or args.structure or args.table):
             # CLI mode
             if args.merge:
                 if len(args.files) != 3:
                     print("ERROR: Three-way merge requires 3 files: base, yours, theirs")
                     return 1
-                print("Three-way merge not yet implemented in CLI mode.")
-                return 1
+                return cli_merge_files(args.files[0], args.files[1], args.files[2], args)
+            
+            elif args.many:
+                if len(args.files) < 2:
+                    print("ERROR: N-way comparison requires a base file and at least one variant")
+                    return 1
+                return cli_compare_many(args.files[0], args.files[1:], args)
             
             elif args.dir:
                 if len(args.files) != 2:
@@ -282,6 +547,18 @@ def main():
                     return 1
                 return cli_compare_directories(args.files[0], args.files[1], args)
             
+            elif args.table:
+                if len(args.files) != 2 or not args.key:
+                    print("ERROR: Table comparison requires 2 CSV files and --key")
+                    return 1
+                return cli_compare_tables(args.files[0], args.files[1], args)
+            
+            elif args.structure:
+                if len(args.files) != 2:
+                    print("ERROR: Structural comparison requires 2 JSON or YAML files")
+                    return 1
+                return cli_compare_documents(args.files[0], args.files[1], args)
+            
             elif len(args.files) == 2:
                 return cli_compare_files(args.files[0], args.files[1], args)
             
@@ -302,4 +579,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # Worker processes of frozen (PyInstaller) builds re-run this script
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Test Async Runner
+=================
+
+Unit tests for the asyncio front-end of the engine and handlers.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from core.async_runner import AsyncRunner
+from core.cancellation import CancellationToken, OperationCancelled
+from core.diff_engine import DiffEngine
+from core.directory_handler import DirectoryHandler, FileStatus
+
+
+@pytest.fixture(scope='module')
+def runner():
+    """Runner with one worker process, shared by the tests."""
+    runner = AsyncRunner(io_workers=2, cpu_workers=1)
+    yield runner
+    runner.shutdown()
+
+
+def _shape(results):
+    """Reduce results to comparable tuples."""
+    return [(r.type, r.old_start, r.old_count, r.new_start, r.new_count) for r in results]
+
+
+class TestAsyncEngine:
+    """Test async comparisons against their blocking counterparts."""
+
+    def test_compare_files_async(self, tmp_path, runner):
+        """Test async file comparison matches compare_lines."""
+        lines_a = ["a", "b", "c", "d"]
+        lines_b = ["a", "B", "c", "d", "e"]
+        (tmp_path / "a.txt").write_text("\n".join(lines_a), encoding='utf-8')
+        (tmp_path / "b.txt").write_text("\n".join(lines_b), encoding='utf-8')
+        engine = DiffEngine({'ignore_case': True, 'moving_block_detection': True})
+
+        results = asyncio.run(engine.compare_files_async(
+            str(tmp_path / "a.txt"), str(tmp_path / "b.txt"), runner=runner))
+
+        assert _shape(results) == _shape(engine.compare_lines(lines_a, lines_b))
+        assert list(results[-1].new_lines) == ["e"]
+
+    def test_concurrent_requests_share_slots(self, runner):
+        """Test many concurrent diffs complete with bounded admission."""
+        engine = DiffEngine()
+        pairs = [([str(i), "x", "y"], [str(i), "y", "z"]) for i in range(12)]
+
+        async def compare_all():
+            return await asyncio.gather(*(engine.compare_lines_async(a, b, runner=runner)
+                                          for a, b in pairs))
+
+        for results, (a, b) in zip(asyncio.run(compare_all()), pairs):
+            assert _shape(results) == _shape(engine.compare_lines(a, b))
+
+    def test_task_cancellation_cancels_token(self, runner):
+        """Test cancelling the awaiting task cancels the operation's token."""
+        started, release = threading.Event(), threading.Event()
+        token = CancellationToken()
+
+        def blocking_read():
+            started.set()
+            release.wait(5)
+            token.check()
+
+        async def cancel_read():
+            task = asyncio.ensure_future(runner.run_io(blocking_read, token=token))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_read())
+        release.set()
+        assert token.cancelled
+
+    def test_cancelled_token_stops_diff(self, runner):
+        """Test a cancelled token is not handed to the process pool."""
+        token = CancellationToken()
+        token.cancel()
+
+        with pytest.raises(OperationCancelled):
+            asyncio.run(DiffEngine().compare_lines_async(["a"], ["b"], token, runner=runner))
+
+
+class TestAsyncDirectories:
+    """Test async directory comparison."""
+
+    def test_matches_blocking_comparison(self, tmp_path, runner):
+        """Test async directory comparison gives the same entries."""
+        left, right = tmp_path / "left", tmp_path / "right"
+        (left / "sub").mkdir(parents=True)
+        (right / "sub").mkdir(parents=True)
+        (left / "same.txt").write_text("x", encoding='utf-8')
+        (right / "same.txt").write_text("x", encoding='utf-8')
+        (left / "sub" / "diff.txt").write_text("1", encoding='utf-8')
+        (right / "sub" / "diff.txt").write_text("2", encoding='utf-8')
+        (left / "only.txt").write_text("l", encoding='utf-8')
+        handler = DirectoryHandler()
+
+        result = asyncio.run(handler.compare_directories_async(str(left), str(right),
+                                                               runner=runner))
+        expected = handler.compare_directories(str(left), str(right))
+
+        assert [(e.relative_path, e.status) for e in result.entries] == [
+            (e.relative_path, e.status) for e in expected.entries]
+        assert FileStatus.LEFT_ONLY in {e.status for e in result.entries}
+        assert result.get_statistics() == expected.get_statistics()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,95 @@
+"""
+Test Base Index
+===============
+
+Unit tests for N-way comparison against a shared base.
+"""
+
+import pickle
+
+import pytest
+from core.base_index import BaseIndex, anchor_gaps
+from core.diff_engine import DiffEngine
+
+
+def _shape(results):
+    """Reduce results to comparable tuples."""
+    return [(r.type, r.old_start, r.old_count, r.new_start, r.new_count) for r in results]
+
+
+class TestBaseIndex:
+    """Test the index and its anchors."""
+
+    def test_unique_lines_and_encoding(self):
+        """Test unique base lines are indexed and unknown lines encode as -1."""
+        index = BaseIndex(["a", "b", "a", "c"])
+
+        ids, _ = index.encode(["c", "x", "a"])
+
+        assert set(index.unique.values()) == {1, 3}
+        assert list(ids) == [index.table["c"], -1, index.table["a"]]
+
+    def test_anchors_keep_order(self):
+        """Test anchors are the longest in-order chain of unique lines."""
+        index = BaseIndex(["a", "b", "c", "d"])
+        ids, _ = index.encode(["c", "a", "b", "d"])
+
+        assert index.anchors(ids) == [(0, 1), (1, 2), (3, 3)]
+        assert anchor_gaps([(0, 1), (1, 2), (3, 3)], 4, 4) == [(0, 0, 0, 1), (2, 3, 3, 3)]
+
+    def test_pickle_round_trip(self):
+        """Test the index can be sent to worker processes."""
+        index = BaseIndex(["A", "b"], {'ignore_case': True})
+
+        copy = pickle.loads(pickle.dumps(index))
+
+        assert list(copy.encode(["a"])[0]) == [index.table["a"]]
+
+
+class TestCompareMany:
+    """Test comparisons of many variants."""
+
+    def test_matches_pairwise_comparison(self):
+        """Test indexed comparisons equal plain compare_lines results."""
+        engine = DiffEngine({'ignore_blank_lines': True})
+        base = ["x = 1", "", "y = 2", "z = 3"]
+        variants = [["x = 1", "y = 20", "z = 3"], ["x = 1", "", "", "y = 2", "z = 3", "w"]]
+
+        many = engine.compare_many(engine.index_base(base), variants)
+
+        assert [_shape(r) for r in many.results] == [
+            _shape(engine.compare_lines(base, v)) for v in variants]
+
+    def test_large_variant_uses_anchors(self):
+        """Test large inputs diffed between anchors still match compare_lines."""
+        engine = DiffEngine()
+        base = [f"line {i}" for i in range(15000)]
+        variant = base[:500] + ["new"] + base[500:9000] + base[9100:] + base[9000:9100]
+
+        results = engine.compare_to_base(engine.index_base(base), variant)
+
+        assert _shape(results) == _shape(engine.compare_lines(base, variant))
+
+    def test_drift_summary(self):
+        """Test lines are grouped by the number of variants changing them."""
+        engine = DiffEngine()
+        base = ["a", "b", "c", "d"]
+        variants = [["a", "B", "c", "d"], ["a", "B", "c", "D"], ["a", "b", "c", "d", "e"]]
+
+        many = engine.compare_many(engine.index_base(base), variants)
+
+        assert many.drift_summary() == {1: [3], 2: [1]}
+        assert many.lines_differing_in(2) == [1]
+        assert list(many.inserted) == [0, 0, 0, 0, 1]
+        assert many.format_summary().splitlines()[0] == "1 base line(s) differ in 2 of 3 variants"
+
+    def test_index_options_must_match(self):
+        """Test an index built with other options is rejected."""
+        index = DiffEngine({'ignore_case': True}).index_base(["a"])
+
+        with pytest.raises(ValueError):
+            DiffEngine().compare_to_base(index, ["a"])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,76 @@
+"""
+Test Bit-Parallel LCS
+=====================
+
+Unit tests for the bit-parallel LCS kernel.
+"""
+
+import random
+
+import pytest
+from core.bit_parallel import lcs_length, lcs_path, lcs_opcodes
+from core.diff_engine import DiffEngine
+from core.myers_algorithm import DiffType
+
+
+def reference_lcs(a, b):
+    """Length of the LCS by the textbook dynamic program."""
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return prev[-1]
+
+
+class TestBitParallelLCS:
+    """Test the bit-parallel LCS kernel."""
+    
+    def test_lcs_length(self):
+        """Test the LCS length matches the dynamic program."""
+        rng = random.Random(4)
+        for _ in range(300):
+            a = [rng.randint(0, 4) for _ in range(rng.randint(0, 40))]
+            b = [rng.randint(0, 4) for _ in range(rng.randint(0, 40))]
+            
+            assert lcs_length(a, b) == reference_lcs(a, b)
+    
+    def test_lcs_path_is_minimal(self):
+        """Test the path is a valid edit path with LCS-many matches."""
+        rng = random.Random(5)
+        for _ in range(300):
+            a = [rng.randint(0, 4) for _ in range(rng.randint(0, 40))]
+            b = [rng.randint(0, 4) for _ in range(rng.randint(0, 40))]
+            
+            path = lcs_path(a, b)
+            
+            assert path[0] == (0, 0) and path[-1] == (len(a), len(b))
+            matches = 0
+            for (x1, y1), (x2, y2) in zip(path, path[1:]):
+                assert (x2 - x1, y2 - y1) in ((1, 0), (0, 1), (1, 1))
+                if (x2 - x1, y2 - y1) == (1, 1):
+                    assert a[x1] == b[y1]
+                    matches += 1
+            assert matches == reference_lcs(a, b)
+    
+    def test_lcs_opcodes(self):
+        """Test opcodes use difflib's format and tags."""
+        assert lcs_opcodes("abcd", "axcd") == [
+            ('equal', 0, 1, 0, 1), ('replace', 1, 2, 1, 2), ('equal', 2, 4, 2, 4)]
+        assert lcs_opcodes("", "ab") == [('insert', 0, 0, 0, 2)]
+        assert lcs_opcodes("", "") == []
+    
+    def test_long_line_char_diff(self):
+        """Test long intra-line diffs are minimal despite repeated characters."""
+        line_a = "x = [" + ", ".join(str(i % 10) for i in range(400)) + "]"
+        line_b = line_a.replace("7", "8")
+        
+        diffs = DiffEngine().compare_chars(line_a, line_b)
+        
+        deleted = [d.char for d in diffs if d.type == DiffType.DELETE]
+        assert deleted == ["7"] * line_a.count("7")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,114 @@
+"""
+Test Cancellation
+=================
+
+Unit tests for cancellation tokens and time-budgeted comparisons.
+"""
+
+import random
+
+import pytest
+from core.cancellation import CancellationToken, OperationCancelled
+from core.myers_algorithm import MyersDiff, DiffType
+from core.diff_engine import DiffEngine
+from core.file_handler import FileHandler
+from core.directory_handler import CompareMode, DirectoryHandler
+
+
+class TestCancellationToken:
+    """Test the cancellation token."""
+    
+    def test_no_deadline(self):
+        """Test a fresh token without a deadline never stops work."""
+        token = CancellationToken()
+        
+        assert not token.cancelled and not token.expired
+        assert token.remaining() is None
+        token.check()
+    
+    def test_cancel(self):
+        """Test cancel() makes check() raise."""
+        token = CancellationToken()
+        token.cancel()
+        
+        assert token.cancelled
+        with pytest.raises(OperationCancelled):
+            token.check()
+    
+    def test_timeout(self):
+        """Test an elapsed time budget makes check() raise."""
+        token = CancellationToken(timeout=0)
+        
+        assert token.expired and token.remaining() == 0.0
+        with pytest.raises(OperationCancelled):
+            token.check()
+
+
+class TestTimeBudgetedDiff:
+    """Test diffs that run out of time or are cancelled."""
+    
+    @pytest.mark.parametrize("algorithm", ["greedy", "linear"])
+    def test_expired_diff_is_valid(self, algorithm):
+        """Test an expired deadline still yields a valid edit script."""
+        rng = random.Random(11)
+        seq_a = [str(rng.randint(0, 5)) for _ in range(400)]
+        seq_b = [str(rng.randint(0, 5)) for _ in range(400)]
+        
+        differ = MyersDiff(seq_a, seq_b, algorithm=algorithm)
+        results = differ.compute(CancellationToken(timeout=0))
+        
+        assert differ.too_expensive
+        assert [line for r in results for line in r.old_lines] == seq_a
+        assert [line for r in results for line in r.new_lines] == seq_b
+        for r in results:
+            if r.type == DiffType.EQUAL:
+                assert list(r.old_lines) == list(r.new_lines)
+    
+    def test_cheap_diff_is_not_affected(self):
+        """Test diffs below the heuristic cutoff stay minimal."""
+        differ = MyersDiff(["a", "b", "c"], ["a", "x", "c"])
+        results = differ.compute(CancellationToken(timeout=0))
+        
+        assert not differ.too_expensive
+        assert [r.type for r in results] == [DiffType.EQUAL, DiffType.REPLACE, DiffType.EQUAL]
+    
+    def test_cancelled_diff_raises(self):
+        """Test a cancelled token aborts an expensive diff."""
+        token = CancellationToken()
+        token.cancel()
+        seq_a = [str(i) for i in range(300)]
+        seq_b = [str(i) for i in range(300, 600)] + seq_a[::7]
+        
+        with pytest.raises(OperationCancelled):
+            DiffEngine().compare_lines(seq_a, seq_b, token)
+    
+    def test_cancelled_file_and_directory_reads(self, tmp_path):
+        """Test file reading and directory comparison honour the token."""
+        (tmp_path / "left").mkdir()
+        (tmp_path / "right").mkdir()
+        (tmp_path / "left" / "a.txt").write_text("one\ntwo\n")
+        token = CancellationToken()
+        token.cancel()
+        
+        with pytest.raises(OperationCancelled):
+            FileHandler().read_file(str(tmp_path / "left" / "a.txt"), token)
+        with pytest.raises(OperationCancelled):
+            DirectoryHandler().compare_directories(
+                str(tmp_path / "left"), str(tmp_path / "right"), token=token)
+
+    
+    @pytest.mark.parametrize("mode", [CompareMode.CONTENT, CompareMode.HASH])
+    def test_cancelled_file_comparison_is_not_an_error(self, tmp_path, mode):
+        """Test cancelling while comparing two files raises instead of ERROR."""
+        (tmp_path / "a.txt").write_text("same")
+        (tmp_path / "b.txt").write_text("same")
+        token = CancellationToken()
+        token.cancel()
+        
+        with pytest.raises(OperationCancelled):
+            DirectoryHandler(compare_mode=mode)._compare_files(
+                str(tmp_path / "a.txt"), str(tmp_path / "b.txt"), token)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,124 @@
+"""
+Test Comment Stripper
+=====================
+
+Unit tests for language-aware comment removal.
+"""
+
+import pytest
+from core.comment_stripper import CommentStripper, resolve_language
+from core.diff_engine import DiffEngine
+
+
+class TestCommentStripper:
+    """Test the single-pass comment scanner."""
+
+    def test_c_block_comments_span_lines(self):
+        """Test block comments are removed across lines, keeping line count."""
+        lines = [
+            "int a; /* start",
+            "   middle",
+            "end */ int b; // tail",
+        ]
+
+        stripped = CommentStripper('c').strip_lines(lines)
+
+        assert stripped == ["int a; ", "", " int b; "]
+
+    def test_markers_in_strings_are_kept(self):
+        """Test comment markers inside string literals are not comments."""
+        stripper = CommentStripper('c')
+        lines = ['s = "a // b /* c */"; // real', "c = '\"'; // quote"]
+
+        stripped = stripper.strip_lines(lines)
+
+        assert stripped == ['s = "a // b /* c */"; ', "c = '\"'; "]
+
+    def test_backslash_at_line_or_text_end_in_string(self):
+        """Test strings ending in a backslash continue or end without errors."""
+        lines = ['#define S "abc\\', 'def" // x']
+
+        assert CommentStripper('c').strip_lines(lines) == ['#define S "abc\\', 'def" ']
+        assert CommentStripper('python').strip_lines(['x = "abc\\']) == ['x = "abc\\']
+        assert CommentStripper('python').strip_lines(['x = """abc\\']) == ['x = """abc\\']
+
+    def test_line_breaks_inside_lines(self):
+        """Test lines holding line breaks still give one line each."""
+        lines = ['int a; // x\n', 'int b; /* y\nz */ c;\n', 'd;']
+
+        stripped = CommentStripper('c').strip_lines(lines)
+
+        assert len(stripped) == len(lines)
+        assert stripped == ['int a; \n', 'int b; \n c;\n', 'd;']
+
+    def test_c_preprocessor_is_not_a_comment(self):
+        """Test '#' is only a comment in languages that use it."""
+        assert CommentStripper('c').strip_lines(["#include <x.h>"]) == ["#include <x.h>"]
+        assert CommentStripper('python').strip_lines(["x = 1  # one"]) == ["x = 1  "]
+
+    def test_python_multiline_strings(self):
+        """Test '#' inside triple-quoted strings is kept."""
+        lines = ['s = """', '# not a comment', '"""  # comment', "t = 'a\\'#'"]
+
+        stripped = CommentStripper('python').strip_lines(lines)
+
+        assert stripped == ['s = """', '# not a comment', '"""  ', "t = 'a\\'#'"]
+
+    def test_nested_block_comments(self):
+        """Test nesting languages close a block only at its own end."""
+        assert CommentStripper('rust').strip_lines(["a /* x /* y */ z */ b"]) == ["a  b"]
+
+    def test_shell_hash_at_word_start(self):
+        """Test shell '#' only starts a comment at the start of a word."""
+        stripped = CommentStripper('shell').strip_lines(["echo $# ${#x} # note"])
+
+        assert stripped == ["echo $# ${#x} "]
+
+    def test_language_aliases(self):
+        """Test Pygments lexer names resolve to comment syntaxes."""
+        assert resolve_language('C++') == 'cpp'
+        assert resolve_language('Bash') == 'shell'
+        assert resolve_language('Brainfuck') is None
+        with pytest.raises(ValueError):
+            CommentStripper('brainfuck')
+
+
+class TestIgnoreComments:
+    """Test DiffEngine uses the scanner for known languages."""
+
+    def test_multiline_comment_edit_is_ignored(self):
+        """Test edits inside a block comment are not reported."""
+        lines_a = ["int x;", "/* old", "   text */", "int y;"]
+        lines_b = ["int x;", "/* new", "   words */", "int y;"]
+        engine = DiffEngine({'ignore_comments': True, 'language': 'c'})
+
+        results = engine.compare_lines(lines_a, lines_b, content_hashes=("h1", "h2"))
+
+        assert [r.type.value for r in results] == ['equal']
+
+    def test_comment_only_lines_count_as_blank(self):
+        """Test added comment lines are dropped with ignore_blank_lines."""
+        lines_a = ["x = 1", "y = 2"]
+        lines_b = ["x = 1", "# explain y", "y = 2"]
+        engine = DiffEngine({'ignore_comments': True, 'ignore_blank_lines': True,
+                             'language': 'python'})
+
+        results = engine.compare_lines(lines_a, lines_b)
+
+        assert all(r.type.value == 'equal' for r in results)
+
+
+    def test_lines_with_terminators(self):
+        """Test results stay within lines that keep their terminators."""
+        lines_a = ["int a; // x\n", "int b;\n"]
+        lines_b = ["int a; // y\n", "int c;\n"]
+        engine = DiffEngine({'ignore_comments': True, 'language': 'c'})
+
+        results = engine.compare_lines(lines_a, lines_b)
+
+        assert [(r.type.value, r.old_start, r.old_count, r.new_start, r.new_count)
+                for r in results] == [('equal', 0, 1, 0, 1), ('replace', 1, 1, 1, 1)]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,129 @@
+"""
+Test Diff Cache
+===============
+
+Unit tests for the on-disk cache of diff results.
+"""
+
+import os
+
+import pytest
+from core.diff_cache import DiffCache
+from core.diff_engine import DiffEngine
+from core.file_handler import FileHandler
+from core.myers_algorithm import DiffType, MyersDiff
+
+
+class TestDiffCache:
+    """Test the content-addressed diff cache."""
+
+    def test_roundtrip(self, tmp_path):
+        """Test stored edit scripts are returned unchanged."""
+        cache = DiffCache(tmp_path)
+        ops = MyersDiff(list("abcabba"), list("cbabac")).compute_opcodes()
+
+        cache.put("k", ops)
+
+        assert cache.get("k") == ops
+        assert cache.get("missing") is None
+
+    def test_key_depends_on_inputs(self):
+        """Test keys change with hashes, options and engine version."""
+        key = DiffCache.make_key("a", "b", {'ignore_case': True}, 1)
+
+        assert key == DiffCache.make_key("a", "b", {'ignore_case': True}, 1)
+        assert key != DiffCache.make_key("b", "a", {'ignore_case': True}, 1)
+        assert key != DiffCache.make_key("a", "b", {}, 1)
+        assert key != DiffCache.make_key("a", "b", {'ignore_case': True}, 2)
+
+    def test_corrupt_entry_is_miss(self, tmp_path):
+        """Test entries that fail to decode are treated as misses."""
+        cache = DiffCache(tmp_path)
+        cache.put("k", MyersDiff(["a"], ["b"]).compute_opcodes())
+
+        (tmp_path / ("k" + DiffCache.SUFFIX)).write_bytes(b"EXDC garbage")
+
+        assert cache.get("k") is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test old entries are evicted once the size limit is exceeded."""
+        ops = MyersDiff([str(i) for i in range(50)], ["x"]).compute_opcodes()
+        entry_size = len(DiffCache(tmp_path)._encode(ops))
+        cache = DiffCache(tmp_path, max_bytes=2 * entry_size)
+
+        cache.put("old", ops)
+        cache.put("used", ops)
+        os.utime(tmp_path / ("old" + DiffCache.SUFFIX), (1, 1))
+        os.utime(tmp_path / ("used" + DiffCache.SUFFIX), (2, 2))
+        cache.get("used")
+        cache.put("new", ops)
+
+        assert cache.get("old") is None
+        assert cache.get("used") == ops
+        assert cache.get("new") == ops
+
+
+class TestEngineCache:
+    """Test DiffEngine reads and writes the cache."""
+
+    def test_hit_skips_diff(self, tmp_path, monkeypatch):
+        """Test a cached comparison is not diffed again."""
+        cache = DiffCache(tmp_path)
+        lines_a = ["a", "b", "c"]
+        lines_b = ["a", "x", "c"]
+        expected = DiffEngine(cache=cache).compare_lines(lines_a, lines_b,
+                                                         content_hashes=("h1", "h2"))
+
+        def fail(self, token=None):
+            raise AssertionError("diff recomputed")
+        monkeypatch.setattr(MyersDiff, "compute_opcodes", fail)
+
+        # Default-valued and execution-only options share the entry
+        engine = DiffEngine({'ignore_case': False, 'parallel': False}, cache)
+        results = engine.compare_lines(lines_a, lines_b, content_hashes=("h1", "h2"))
+
+        assert [(r.type, r.old_start, r.old_count, r.new_start, r.new_count)
+                for r in results] == [
+            (r.type, r.old_start, r.old_count, r.new_start, r.new_count)
+            for r in expected]
+        assert list(results[1].new_lines) == ["x"]
+
+    def test_options_change_key(self, tmp_path):
+        """Test options that affect the result do not share entries."""
+        cache = DiffCache(tmp_path)
+        lines_a = ["A"]
+        lines_b = ["a"]
+        DiffEngine(cache=cache).compare_lines(lines_a, lines_b, content_hashes=("h1", "h2"))
+
+        results = DiffEngine({'ignore_case': True}, cache).compare_lines(
+            lines_a, lines_b, content_hashes=("h1", "h2"))
+
+        assert len(results) == 1 and results[0].type.value == 'equal'
+        assert len(list(tmp_path.glob('*' + DiffCache.SUFFIX))) == 2
+
+    def test_entry_not_covering_lines_is_a_miss(self, tmp_path):
+        """Test a stale entry for the same hashes is not used."""
+        cache = DiffCache(tmp_path)
+        DiffEngine(cache=cache).compare_lines(["a", "b"], ["a"], content_hashes=("h1", "h2"))
+
+        results = DiffEngine(cache=cache).compare_lines(["a", "b", "c"], ["a", "c"],
+                                                        content_hashes=("h1", "h2"))
+
+        assert [(r.type, r.old_start, r.old_count) for r in results] == [
+            (DiffType.EQUAL, 0, 1), (DiffType.DELETE, 1, 1), (DiffType.EQUAL, 2, 1)]
+
+    def test_content_key_uses_forced_encoding(self, tmp_path):
+        """Test files decoded with a forced encoding get their own key."""
+        path = tmp_path / "f.txt"
+        path.write_bytes("hello from the caf\u00e9\n".encode('utf-8'))
+
+        _, detected = FileHandler().read_file(str(path))
+        lines, forced = FileHandler(encoding='ascii').read_file(str(path))
+
+        assert lines == ["hello from the caf\ufffd\ufffd"]
+        assert forced.encoding == 'ascii'
+        assert forced.content_key != detected.content_key
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
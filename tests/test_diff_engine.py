@@ -0,0 +1,159 @@
+"""
+Test Diff Engine
+================
+
+Unit tests for the high-level DiffEngine interface.
+"""
+
+import random
+
+import pytest
+from core.myers_algorithm import DiffType
+from core.diff_engine import DiffEngine, DiffSession, _segment_cuts
+
+
+class TestParallelDiff:
+    """Test anchor-segmented parallel line diffs."""
+
+    @pytest.fixture
+    def inputs(self):
+        """Two versions of a file with scattered edits and unique lines."""
+        rng = random.Random(3)
+        seq_a = [f"row {i}" if i % 3 else "}" for i in range(600)]
+        seq_b = list(seq_a)
+        for _ in range(30):
+            i = rng.randrange(len(seq_b))
+            seq_b[i:i + 1] = [f"new {rng.random()}", "}"]
+        return seq_a, seq_b
+
+    def test_segment_cuts(self):
+        """Test cuts start and end at the corners and move forward."""
+        ids_a = list(range(100))
+        ids_b = list(range(100))
+
+        cuts = _segment_cuts(ids_a, ids_b, 4)
+
+        assert cuts[0] == (0, 0) and cuts[-1] == (100, 100)
+        assert len(cuts) == 5
+        assert all(x1 < x2 and y1 < y2 for (x1, y1), (x2, y2) in zip(cuts, cuts[1:]))
+
+    @pytest.mark.parametrize("algorithm", ["myers", "linear", "patience", "histogram"])
+    def test_parallel_matches_sequential(self, inputs, monkeypatch, algorithm):
+        """Test stitched segment results reconstruct both inputs at equal cost."""
+        seq_a, seq_b = inputs
+        monkeypatch.setattr(DiffEngine, "PARALLEL_THRESHOLD", 100)
+
+        sequential = DiffEngine({'algorithm': algorithm, 'parallel': False})
+        parallel = DiffEngine({'algorithm': algorithm, 'max_workers': 2})
+        expected = sequential.compare_lines(seq_a, seq_b)
+        results = parallel.compare_lines(seq_a, seq_b)
+
+        assert [line for r in results for line in r.old_lines] == seq_a
+        assert [line for r in results for line in r.new_lines] == seq_b
+        cost = lambda rs: sum(r.old_count + r.new_count for r in rs
+                              if r.type != DiffType.EQUAL)
+        assert cost(results) == cost(expected)
+
+        # Runs are coalesced across segment boundaries
+        for prev, cur in zip(results, results[1:]):
+            assert (prev.type == DiffType.EQUAL) != (cur.type == DiffType.EQUAL)
+
+
+class TestSimilarity:
+    """Test the distance-only similarity score."""
+
+    def test_similarity_score(self):
+        """Test the score is 2 * LCS / total lines."""
+        engine = DiffEngine()
+
+        assert engine.similarity(["a", "b", "c", "d"], ["a", "x", "c", "d"]) == 0.75
+        assert engine.similarity([], []) == 1.0
+        assert engine.similarity(["a"], ["b"]) == 0.0
+
+    def test_similarity_cutoff(self):
+        """Test scores below min_similarity are cut off to 0.0."""
+        engine = DiffEngine({'ignore_case': True})
+        lines_a = ["A", "b", "c", "d"]
+        lines_b = ["a", "x", "c", "d"]
+
+        assert engine.similarity(lines_a, lines_b, min_similarity=0.75) == 0.75
+        assert engine.similarity(lines_a, lines_b, min_similarity=0.8) == 0.0
+
+
+
+class TestDiffSession:
+    """Test incremental re-diffing after edits."""
+
+    def check_session(self, session):
+        """Assert the session's results are a valid diff of its lines."""
+        results = session.results
+        assert [line for r in results for line in r.old_lines] == session.lines_a
+        assert [line for r in results for line in r.new_lines] == session.lines_b
+        for r in results:
+            if r.type == DiffType.EQUAL:
+                assert list(r.old_lines) == list(r.new_lines)
+        for prev, cur in zip(results, results[1:]):
+            assert (prev.type == DiffType.EQUAL) != (cur.type == DiffType.EQUAL)
+
+    def test_edit_splices_region(self):
+        """Test an edit inside an unchanged block only adds one hunk."""
+        lines = [f"line{i}" for i in range(10)]
+        session = DiffSession(lines, lines)
+
+        session.apply_edit('a', 4, 5, ["edited"])
+
+        assert [(r.type, r.old_start, r.old_count) for r in session.results] == [
+            (DiffType.EQUAL, 0, 4), (DiffType.REPLACE, 4, 1), (DiffType.EQUAL, 5, 5)]
+
+        # Reverting the edit merges everything back into one run
+        session.apply_edit('a', 4, 5, ["line4"])
+        assert [r.type for r in session.results] == [DiffType.EQUAL]
+
+    def test_random_edits_stay_valid(self):
+        """Test results stay a valid diff over a series of random edits."""
+        rng = random.Random(3)
+        for _ in range(50):
+            seq_a = [str(rng.randint(0, 6)) for _ in range(rng.randint(0, 30))]
+            seq_b = [str(rng.randint(0, 6)) for _ in range(rng.randint(0, 30))]
+            session = DiffSession(seq_a, seq_b)
+
+            for _ in range(10):
+                side = rng.choice("ab")
+                lines = session.lines_a if side == "a" else session.lines_b
+                start = rng.randint(0, len(lines))
+                end = rng.randint(start, min(len(lines), start + 4))
+                new_lines = [str(rng.randint(0, 6)) for _ in range(rng.randint(0, 4))]
+
+                session.apply_edit(side, start, end, new_lines)
+
+                self.check_session(session)
+
+    def test_edit_closing_block_comment(self):
+        """Test edits update the comment state of the lines after them."""
+        lines_a = ["/* start", "x", "end */", "y"]
+        lines_b = ["/* start", "q", "end */", "y"]
+        session = DiffSession(lines_a, lines_b, {'ignore_comments': True, 'language': 'c'})
+
+        session.apply_edit('a', 1, 2, ["zzz"])
+        assert [r.type for r in session.results] == [DiffType.EQUAL]
+
+        # Removing the closing line comments out "y" as well
+        session.apply_edit('a', 1, 3, ["zzz"])
+        assert [(r.type, r.old_start, r.old_count, r.new_start, r.new_count)
+                for r in session.results] == [
+            (DiffType.EQUAL, 0, 3, 0, 3), (DiffType.INSERT, 3, 0, 3, 1)]
+
+    def test_invalid_edits(self):
+        """Test bad sides, ranges and line-dropping options are rejected."""
+        session = DiffSession(["a"], ["b"])
+
+        with pytest.raises(ValueError):
+            session.apply_edit('c', 0, 0, [])
+        with pytest.raises(ValueError):
+            session.apply_edit('a', 1, 3, [])
+        with pytest.raises(ValueError):
+            DiffSession(["a"], ["b"], {'ignore_blank_lines': True})
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
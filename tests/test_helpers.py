@@ -0,0 +1,31 @@
+"""
+Test Helpers
+============
+
+Unit tests for the general utility functions.
+"""
+
+import pytest
+from utils.helpers import calculate_similarity
+
+
+class TestCalculateSimilarity:
+    """Test the character-level similarity score."""
+
+    def test_lcs_ratio(self):
+        """Test the score is twice the LCS over the total length."""
+        assert calculate_similarity("kitten", "sitting") == pytest.approx(8 / 13)
+        assert calculate_similarity("abc", "abc") == 1.0
+        assert calculate_similarity("abc", "") == 0.0
+        assert calculate_similarity("abc", "xyz") == 0.0
+
+    def test_same_metric_at_any_length(self):
+        """Test long strings are scored like short ones."""
+        for k in (100, 1000, 5000):
+            # The LCS is the run of 'a's, whatever the length
+            assert calculate_similarity("a" * k, "b" * k + "a" * k) == pytest.approx(2 / 3)
+            assert calculate_similarity("xa" * k, "ya" * k) == pytest.approx(0.5)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
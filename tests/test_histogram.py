@@ -0,0 +1,55 @@
+"""
+Test Histogram Algorithm
+=======================
+
+Unit tests for the histogram diff implementation.
+"""
+
+import random
+
+import pytest
+from core.myers_algorithm import DiffType, myers_diff
+from core.histogram_algorithm import HistogramDiff, histogram_diff
+from core.diff_engine import DiffEngine
+
+
+class TestHistogramDiff:
+    """Test histogram diff algorithm."""
+    
+    def test_reconstructs_sequences(self):
+        """Test histogram results cover both inputs in order."""
+        rng = random.Random(11)
+        for _ in range(200):
+            seq_a = [str(rng.randint(0, 6)) for _ in range(rng.randint(0, 25))]
+            seq_b = [str(rng.randint(0, 6)) for _ in range(rng.randint(0, 25))]
+            
+            results = histogram_diff(seq_a, seq_b)
+            
+            assert [line for r in results for line in r.old_lines] == seq_a
+            assert [line for r in results for line in r.new_lines] == seq_b
+    
+    def test_anchors_on_rare_lines(self):
+        """Test the rarest common line is matched when nothing is unique."""
+        seq_a = ["x", "rare", "x", "rare", "x", "x"]
+        seq_b = ["rare", "x", "rare", "y"]
+        
+        results = histogram_diff(seq_a, seq_b)
+        matched = [line for r in results if r.type == DiffType.EQUAL for line in r.old_lines]
+        
+        assert matched.count("rare") == 2
+    
+    def test_falls_back_to_myers(self):
+        """Test regions of only very frequent lines are handed to Myers."""
+        seq_a = ["x"] * (HistogramDiff.MAX_CHAIN_LENGTH + 1) + ["a"]
+        seq_b = ["b"] + ["x"] * (HistogramDiff.MAX_CHAIN_LENGTH + 1)
+        
+        assert histogram_diff(seq_a, seq_b) == myers_diff(seq_a, seq_b)
+    
+    def test_engine_option(self):
+        """Test DiffEngine selects histogram through its options."""
+        engine = DiffEngine(options={"algorithm": "histogram"})
+        assert isinstance(engine._create_differ(["a"], ["b"]), HistogramDiff)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,89 @@
+"""
+Test Inline Diff
+================
+
+Unit tests for batched intra-line change spans.
+"""
+
+import pytest
+from core.diff_engine import DiffEngine
+from core.inline_diff import InlineDiffer, inline_spans
+from core.myers_algorithm import OP_DELETE, OP_INSERT, OP_REPLACE
+
+
+def _triples(spans):
+    """Split a flat span array into (start, end, type) tuples."""
+    return [tuple(spans[k:k + 3]) for k in range(0, len(spans), 3)]
+
+
+class TestInlineDiffer:
+    """Test span computation for single line pairs."""
+
+    def test_word_spans(self):
+        """Test changed words map to character offsets in each line."""
+        old_spans, new_spans = InlineDiffer('word').line_spans(
+            "total = price * count", "total = cost * count + tax")
+
+        assert _triples(old_spans) == [(8, 13, OP_REPLACE)]
+        assert _triples(new_spans) == [(8, 12, OP_REPLACE), (20, 26, OP_INSERT)]
+
+    def test_char_spans(self):
+        """Test character spans distinguish deletions from replacements."""
+        differ = InlineDiffer('char')
+
+        old_spans, new_spans = differ.line_spans("abcXdef", "abdeYf")
+        assert _triples(old_spans) == [(2, 4, OP_DELETE)]
+        assert _triples(new_spans) == [(4, 5, OP_INSERT)]
+
+        old_spans, new_spans = differ.line_spans("abcXdef", "abZdeYf")
+        assert _triples(old_spans) == [(2, 4, OP_REPLACE)]
+        assert _triples(new_spans) == [(2, 3, OP_REPLACE), (5, 6, OP_INSERT)]
+
+    def test_equal_lines_have_no_spans(self):
+        """Test identical lines produce empty span arrays."""
+        old_spans, new_spans = InlineDiffer('char').line_spans("same", "same")
+
+        assert len(old_spans) == 0 and len(new_spans) == 0
+
+    def test_results_are_cached(self):
+        """Test repeated line pairs reuse the cached spans."""
+        differ = InlineDiffer('word')
+
+        first = differ.line_spans("x = 1", "x = 2")
+        second = InlineDiffer('word').line_spans("x = 1", "x = 2")
+
+        assert first is second
+
+    def test_unknown_granularity(self):
+        """Test unsupported granularities are rejected."""
+        with pytest.raises(ValueError):
+            InlineDiffer('sentence')
+
+
+class TestResultSpans:
+    """Test spans over whole comparisons."""
+
+    def test_replace_hunks(self):
+        """Test every REPLACE line pair gets spans with file line numbers."""
+        lines_a = ["keep", "a = 1", "b = 2", "keep", "c = 3"]
+        lines_b = ["keep", "a = 10", "b = 20", "keep", "c = 30"]
+        results = DiffEngine().compare_lines(lines_a, lines_b)
+
+        spans = DiffEngine({'inline_granularity': 'char'}).inline_spans(results)
+
+        assert [(i, j) for i, j, _, _ in spans] == [(1, 1), (2, 2), (4, 4)]
+        assert all(_triples(new) == [(5, 6, OP_INSERT)] for _, _, _, new in spans)
+
+    def test_fuzzy_pairs_are_used(self):
+        """Test spans follow the fuzzy line pairing of a hunk."""
+        lines_a = ["start", "value = compute(x)", "end"]
+        lines_b = ["start", "# new comment", "value = compute(y)", "end"]
+        results = DiffEngine({'fuzzy_matching': True}).compare_lines(lines_a, lines_b)
+
+        spans = inline_spans(results, 'char')
+
+        assert [(i, j) for i, j, _, _ in spans] == [(1, 2)]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,81 @@
+"""
+Test Line Aligner
+=================
+
+Unit tests for fuzzy line pairing inside REPLACE hunks.
+"""
+
+import pytest
+from core.diff_engine import DiffEngine
+from core.line_aligner import FuzzyLineAligner, align_lines, layout_pairs
+
+
+class TestFuzzyLineAligner:
+    """Test similarity-based line pairing."""
+
+    def test_pairs_modified_lines_around_insertions(self):
+        """Test modified lines are paired even when lines are added between them."""
+        old = ["def total(items):", "return sum(items)"]
+        new = ["def total(items, start=0):", "# add the start value", "return sum(items) + start"]
+
+        rows = align_lines(old, new)
+
+        assert rows == [(0, 0), (None, 1), (1, 2)]
+
+    def test_reindented_lines_pair(self):
+        """Test lines differing only in indentation are paired."""
+        old = ["if x:", "    y = 1"]
+        new = ["if x:", "        y = 1"]
+
+        assert FuzzyLineAligner().pair_lines(old, new) == [(0, 0), (1, 1)]
+
+    def test_dissimilar_lines_stay_unpaired(self):
+        """Test lines below the threshold are not paired."""
+        rows = align_lines(["alpha beta gamma"], ["x = 42"])
+
+        assert rows == [(0, None), (None, 0)]
+
+    def test_size_cap(self):
+        """Test hunks above the size cap are not paired."""
+        aligner = FuzzyLineAligner(max_lines=2)
+
+        assert aligner.pair_lines(["a", "b", "c"], ["a", "b", "c"]) == []
+
+    def test_layout_covers_all_lines(self):
+        """Test every line appears exactly once, in order."""
+        rows = layout_pairs([(1, 0), (3, 2)], 5, 4)
+
+        assert [i for i, _ in rows if i is not None] == [0, 1, 2, 3, 4]
+        assert [j for _, j in rows if j is not None] == [0, 1, 2, 3]
+
+    def test_invalid_options(self):
+        """Test out-of-range options are rejected."""
+        with pytest.raises(ValueError):
+            FuzzyLineAligner(threshold=0.0)
+        with pytest.raises(ValueError):
+            FuzzyLineAligner(band=-1)
+
+
+class TestFuzzyMatching:
+    """Test DiffEngine stores line pairings on REPLACE results."""
+
+    def test_replace_results_get_line_pairs(self):
+        """Test fuzzy_matching aligns the lines of REPLACE hunks."""
+        lines_a = ["start", "value = compute(a, b)", "end"]
+        lines_b = ["start", "# new", "value = compute(a, b, c)", "end"]
+
+        results = DiffEngine({'fuzzy_matching': True}).compare_lines(lines_a, lines_b)
+
+        replace = [r for r in results if r.type.value == 'replace']
+        assert len(replace) == 1
+        assert replace[0].line_pairs == [(None, 0), (0, 1)]
+
+    def test_no_pairs_without_fuzzy_matching(self):
+        """Test results are not aligned unless fuzzy_matching is on."""
+        results = DiffEngine().compare_lines(["a b c"], ["a b d"])
+
+        assert results[0].line_pairs is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,123 @@
+"""
+Test Line Normalizer
+====================
+
+Unit tests for compiled line preprocessing and original line mapping.
+"""
+
+import pytest
+from core.diff_engine import DiffEngine
+from core.line_normalizer import LineNormalizer
+from core.myers_algorithm import DiffType, iter_unified_diff
+
+
+class TestLineNormalizer:
+    """Test comparison keys and the index map."""
+
+    def test_identity(self):
+        """Test lines are used as they are without options."""
+        keys, index = LineNormalizer().normalize(["A ", "b"])
+
+        assert keys == ["A ", "b"]
+        assert index is None
+
+    def test_fused_steps(self):
+        """Test all enabled steps are applied in one pass."""
+        normalizer = LineNormalizer({
+            'ignore_case': True,
+            'ignore_whitespace': True,
+            'ignore_comments': True,
+        })
+
+        keys, index = normalizer.normalize(["  Foo   Bar  // note", "x = 1  # set X"])
+
+        assert keys == ["foo bar", "x = 1"]
+        assert index is None
+
+    def test_dropped_lines_index(self):
+        """Test dropped lines are skipped and kept lines map back."""
+        normalizer = LineNormalizer({
+            'ignore_blank_lines': True,
+            'ignore_line_patterns': [r'^import ', r'TODO'],
+        })
+
+        keys, index = normalizer.normalize(["import os", "", "a", "  ", "b  # TODO", "c"])
+
+        assert keys == ["a", "c"]
+        assert list(index) == [2, 5]
+
+    def test_patterns_with_groups(self):
+        """Test patterns that cannot be joined are matched one by one."""
+        normalizer = LineNormalizer({
+            'ignore_comments': True,
+            'comment_patterns': [r'(["\']).*?\1', r'(?i)REM.*$'],
+        })
+
+        keys, _ = normalizer.normalize(["x 'str' y rem drop"])
+
+        assert keys == ["x  y "]
+
+
+class TestOriginalLineNumbers:
+    """Test results of line-dropping comparisons use original positions."""
+
+    def test_blank_lines_keep_positions(self):
+        """Test results skip blank lines instead of shifting line numbers."""
+        lines_a = ["a", "", "", "b", "c"]
+        lines_b = ["a", "b", "", "x"]
+
+        results = DiffEngine({'ignore_blank_lines': True}).compare_lines(lines_a, lines_b)
+
+        assert [(r.type, r.old_start, r.old_count, r.new_start, r.new_count)
+                for r in results] == [
+            (DiffType.EQUAL, 0, 1, 0, 1),
+            (DiffType.EQUAL, 3, 1, 1, 1),
+            (DiffType.REPLACE, 4, 1, 3, 1),
+        ]
+        assert list(results[-1].old_lines) == ["c"]
+        assert list(results[-1].new_lines) == ["x"]
+
+    def test_ignored_changes_have_no_hunks(self):
+        """Test differences in dropped lines alone produce no unified hunks."""
+        lines_a = ["a", "b", "c"]
+        lines_b = ["a", "", "b", "c"]
+
+        results = DiffEngine({'ignore_blank_lines': True}).compare_lines(lines_a, lines_b)
+
+        assert all(r.type == DiffType.EQUAL for r in results)
+        assert list(iter_unified_diff(results)) == ["--- a", "+++ b"]
+
+    def test_unified_diff_applies_with_dropped_lines(self):
+        """Test hunks cover dropped lines, so the patch applies to A."""
+        lines_a = ["a", "", "", "b", "c", "d", "", "e"]
+        lines_b = ["a", "b", "", "x", "d", "e", "", ""]
+
+        results = DiffEngine({'ignore_blank_lines': True}).compare_lines(lines_a, lines_b)
+        patch = list(iter_unified_diff(results, context_lines=1))
+
+        assert patch[2:] == ["@@ -1,8 +1,8 @@", " a", "-", "-", " b", "+", "-c",
+                             "+x", " d", "-", " e", "+", "+"]
+        assert _apply_unified(lines_a, patch) == lines_b
+
+
+def _apply_unified(lines, patch):
+    """Apply unified diff lines to a list of lines, checking the context."""
+    result, position = [], 0
+    for line in patch[2:]:
+        if line.startswith("@@"):
+            start = int(line.split()[1][1:].split(",")[0])
+            start = start - 1 if start else 0
+            result.extend(lines[position:start])
+            position = start
+        elif line[0] in " -":
+            assert lines[position] == line[1:]
+            position += 1
+            if line[0] == " ":
+                result.append(line[1:])
+        else:
+            result.append(line[1:])
+    return result + lines[position:]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
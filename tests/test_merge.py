@@ -0,0 +1,115 @@
+"""
+Test Merge
+==========
+
+Unit tests for the hunk-aligned three-way merge.
+"""
+
+import io
+
+import pytest
+from core.diff_engine import DiffEngine
+from core.merge import CONFLICT, ThreeWayMerger, merge_files
+
+
+def _merge(base, yours, theirs):
+    """Merge with the default merger."""
+    return ThreeWayMerger().merge(base, yours, theirs)
+
+
+class TestThreeWayMerger:
+    """Test merged output and conflicts."""
+
+    def test_disjoint_changes_merge_cleanly(self):
+        """Test changes to different parts are both applied."""
+        base = ["a", "b", "c", "d", "e"]
+        yours = ["a", "B", "c", "d", "e"]
+        theirs = ["a", "b", "c", "d", "E", "f"]
+
+        merged, conflicts = _merge(base, yours, theirs)
+
+        assert merged == ["a", "B", "c", "d", "E", "f"]
+        assert conflicts == []
+
+    def test_identical_changes(self):
+        """Test the same change on both sides is taken once."""
+        base = ["a", "b", "c"]
+        both = ["a", "x", "y", "c"]
+
+        merged, conflicts = _merge(base, both, list(both))
+
+        assert merged == both
+        assert conflicts == []
+
+    def test_insert_at_same_position(self):
+        """Test different insertions at the same base line conflict."""
+        base = ["a", "b"]
+        yours = ["a", "mine", "b"]
+        theirs = ["a", "other", "b"]
+
+        merged, conflicts = _merge(base, yours, theirs)
+
+        assert merged == ["a", "<<<<<<< YOURS", "mine", "||||||| BASE", "=======",
+                          "other", ">>>>>>> THEIRS", "b"]
+        assert conflicts == [{'line': 1, 'base_lines': [], 'yours_lines': ['mine'],
+                              'theirs_lines': ['other']}]
+
+    def test_overlapping_hunks_of_different_lengths(self):
+        """Test overlapping hunks form one conflict over their combined range."""
+        base = ["1", "2", "3", "4", "5", "6"]
+        yours = ["1", "X", "6"]               # replaces 2-5
+        theirs = ["1", "2", "3", "Y", "Z", "W", "5", "6"]   # replaces 4
+
+        merged, conflicts = _merge(base, yours, theirs)
+
+        assert conflicts == [{'line': 1, 'base_lines': ["2", "3", "4", "5"],
+                              'yours_lines': ["X"],
+                              'theirs_lines': ["2", "3", "Y", "Z", "W", "5"]}]
+        assert merged[0] == "1" and merged[-1] == "6"
+
+    def test_conflict_block_layout(self):
+        """Test conflicts are written as diff3 blocks with the base section."""
+        stream = io.StringIO()
+
+        count = merge_files(["a", "b", "c"], ["a", "y", "c"], ["a", "t", "c"], stream,
+                            labels=("mine.txt", "base.txt", "theirs.txt"))
+
+        assert count == 1
+        assert stream.getvalue() == (
+            "a\n"
+            "<<<<<<< mine.txt\n"
+            "y\n"
+            "||||||| base.txt\n"
+            "b\n"
+            "=======\n"
+            "t\n"
+            ">>>>>>> theirs.txt\n"
+            "c\n"
+        )
+
+    def test_chunks_cover_all_versions(self):
+        """Test chunks tile base, yours and theirs in order."""
+        base = list("abcdefgh")
+        yours = list("axcdefgh") + ["i"]
+        theirs = list("abceyfgh")
+
+        pos = (0, 0, 0)
+        for chunk in ThreeWayMerger().merge_chunks(base, yours, theirs):
+            assert (chunk.base_start, chunk.yours_start, chunk.theirs_start) == pos
+            pos = (chunk.base_end, chunk.yours_end, chunk.theirs_end)
+            assert chunk.kind != CONFLICT
+        assert pos == (len(base), len(yours), len(theirs))
+
+    def test_normalizing_options_do_not_hide_edits(self):
+        """Test edits invisible to the engine's options are still merged."""
+        engine = DiffEngine({'ignore_case': True, 'ignore_comments': True})
+
+        merged, conflicts = engine.three_way_merge(["a", "b", "c"], ["a", "B", "c"],
+                                                   ["a", "b", "c", "d"])
+
+        assert merged == ["a", "B", "c", "d"]
+        assert conflicts == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
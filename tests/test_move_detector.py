@@ -0,0 +1,104 @@
+"""
+Test Move Detector
+==================
+
+Unit tests for hash-indexed moved block detection.
+"""
+
+import pytest
+from core.diff_engine import DiffEngine
+from core.move_detector import MoveDetector, detect_moves
+from core.myers_algorithm import DiffType
+
+
+FUNCTION = ["def helper(x):", "    y = x * 2", "    return y + 1"]
+
+
+def _check_tiling(results, lines_a, lines_b):
+    """Assert results cover both files in order, line by line."""
+    old = new = 0
+    for result in results:
+        assert result.old_start == old
+        assert result.new_start == new
+        assert list(result.old_lines) == lines_a[old:old + result.old_count]
+        assert list(result.new_lines) == lines_b[new:new + result.new_count]
+        old += result.old_count
+        new += result.new_count
+    assert (old, new) == (len(lines_a), len(lines_b))
+
+
+class TestMoveDetector:
+    """Test moves are found and tagged."""
+
+    def test_moved_function_is_tagged(self):
+        """Test a function moved below other code becomes a linked MOVED pair."""
+        lines_a = FUNCTION + ["", "a = 1", "b = 2", "c = 3"]
+        lines_b = ["a = 1", "b = 2", "c = 3", ""] + FUNCTION
+        engine = DiffEngine({'moving_block_detection': True})
+
+        results = engine.compare_lines(lines_a, lines_b)
+
+        moved = [r for r in results if r.type == DiffType.MOVED]
+        assert [(r.old_start, r.old_count, r.new_count, r.move_link) for r in moved] == [
+            (0, 3, 0, 4),
+            (7, 0, 3, 0),
+        ]
+        _check_tiling(results, lines_a, lines_b)
+
+    def test_reindented_block_is_a_move(self):
+        """Test moves are found regardless of indentation."""
+        lines_a = ["x = 0"] + FUNCTION + ["z = 9"]
+        lines_b = ["x = 0", "z = 9", "class C:"] + ["    " + line for line in FUNCTION]
+        engine = DiffEngine({'moving_block_detection': True})
+
+        results = engine.compare_lines(lines_a, lines_b)
+
+        assert sum(r.type == DiffType.MOVED for r in results) == 2
+        _check_tiling(results, lines_a, lines_b)
+
+    def test_trivial_blocks_are_not_moves(self):
+        """Test blocks of braces and blank lines never count as moves."""
+        lines_a = ["}", "", "}", "one", "two", "three", "four"]
+        lines_b = ["one", "two", "three", "four", "}", "", "}"]
+
+        results = DiffEngine({'moving_block_detection': True}).compare_lines(lines_a, lines_b)
+
+        assert not any(r.type == DiffType.MOVED for r in results)
+
+    def test_in_place_change_is_not_a_move(self):
+        """Test a block replaced by itself within one hunk is not a move."""
+        lines_a = ["keep"] + FUNCTION + ["end"]
+        lines_b = ["keep"] + ["\t" + line for line in FUNCTION] + ["end"]
+
+        results = DiffEngine({'moving_block_detection': True}).compare_lines(lines_a, lines_b)
+
+        assert [r.type for r in results] == [DiffType.EQUAL, DiffType.REPLACE, DiffType.EQUAL]
+
+    def test_partial_moves_and_min_lines(self):
+        """Test only blocks of at least min_lines lines are moved."""
+        lines_a = ["m1", "m2", "m3", "m4", "s1", "s2", "x", "y", "z"]
+        lines_b = ["x", "y", "z", "s2", "s1", "m1", "m2", "m3", "m4"]
+        engine = DiffEngine({'moving_block_detection': True, 'move_min_lines': 3})
+
+        results = engine.compare_lines(lines_a, lines_b)
+
+        moved = [r for r in results if r.type == DiffType.MOVED]
+        assert [list(r.old_lines or r.new_lines) for r in moved] == [
+            ["x", "y", "z"], ["x", "y", "z"]
+        ]
+        _check_tiling(results, lines_a, lines_b)
+
+    def test_no_moves_returns_input(self):
+        """Test results without moves are returned unchanged."""
+        results = DiffEngine().compare_lines(["a", "b"], ["a", "c"])
+
+        assert detect_moves(results) is results
+
+    def test_invalid_min_lines(self):
+        """Test a minimum block length below one is rejected."""
+        with pytest.raises(ValueError):
+            MoveDetector(0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
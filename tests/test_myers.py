@@ -5,8 +5,19 @@ Test Myers Algorithm
 Unit tests for the Myers diff algorithm implementation.
 """
 
+import io
+import random
+
 import pytest
-from core.myers_algorithm import MyersDiff, DiffType, myers_diff, format_diff_unified
+from core.bit_parallel import BIT_PARALLEL_LIMIT
+from core.myers_algorithm import (MyersDiff, DiffResult, DiffType, LineView,
+                                  myers_diff, format_diff_unified,
+                                  write_unified_diff)
+
+
+def edit_cost(results):
+    """Count the lines touched by non-equal operations."""
+    return sum(r.old_count + r.new_count for r in results if r.type != DiffType.EQUAL)
 
 
 class TestMyersDiff:
@@ -30,11 +41,11 @@ class TestMyersDiff:
         
         results = myers_diff(seq_a, seq_b)
         
-        # Should have delete and insert operations
-        has_delete = any(r.type == DiffType.DELETE for r in results)
-        has_insert = any(r.type == DiffType.INSERT for r in results)
-        
-        assert has_delete or has_insert
+        # Should be a single run replacing every line
+        assert len(results) == 1
+        assert results[0].type == DiffType.REPLACE
+        assert results[0].old_lines == seq_a
+        assert results[0].new_lines == seq_b
     
     def test_insertion(self):
         """Test insertion detection."""
@@ -116,6 +127,32 @@ class TestMyersDiff:
         assert "---" in unified
         assert "+++" in unified
     
+    def test_unified_diff_context_hunks(self):
+        """Test distant changes split into hunks trimmed to the context size."""
+        seq_a = [f"line{i}" for i in range(20)]
+        seq_b = list(seq_a)
+        seq_b[2] = "changed2"
+        seq_b[15] = "changed15"
+        
+        results = myers_diff(seq_a, seq_b)
+        lines = format_diff_unified(results, "a.txt", "b.txt", 2).split("\n")
+        
+        assert lines[:2] == ["--- a.txt", "+++ b.txt"]
+        assert [l for l in lines if l.startswith("@@")] == [
+            "@@ -1,5 +1,5 @@", "@@ -14,5 +14,5 @@"]
+        assert lines[3:8] == [" line0", " line1", "-line2", "+changed2", " line3"]
+    
+    def test_write_unified_diff_streams(self):
+        """Test the writer emits the same text as the string formatter."""
+        seq_a = ["a", "b", "c", "d"]
+        seq_b = ["a", "c", "d", "e"]
+        results = myers_diff(seq_a, seq_b)
+        
+        stream = io.StringIO()
+        write_unified_diff(results, stream, "x", "y")
+        
+        assert stream.getvalue() == format_diff_unified(results, "x", "y") + "\n"
+    
     def test_long_common_prefix(self):
         """Test sequences with long common prefix."""
         seq_a = ["line1", "line2", "line3", "old"]
@@ -138,6 +175,117 @@ class TestMyersDiff:
         has_equal = any(r.type == DiffType.EQUAL and r.old_count == 3 for r in results)
         assert has_equal
 
+    
+    def test_trimmed_results_are_reoffset(self):
+        """Test results after prefix/suffix trimming use absolute positions."""
+        seq_a = [f"line{i}" for i in range(100)]
+        seq_b = seq_a[:40] + ["new"] + seq_a[41:]
+        
+        for algorithm in ("greedy", "linear"):
+            results = MyersDiff(seq_a, seq_b, algorithm=algorithm).compute()
+            
+            assert [r.type for r in results] == [DiffType.EQUAL, DiffType.REPLACE, DiffType.EQUAL]
+            assert (results[0].old_start, results[0].old_count) == (0, 40)
+            assert (results[1].old_start, results[1].new_start) == (40, 40)
+            assert results[1].old_lines == ["line40"]
+            assert (results[2].old_start, results[2].old_count) == (41, 59)
+    
+    def test_runs_are_coalesced(self):
+        """Test edits are run-length encoded into difflib-style opcodes."""
+        seq_a = ["a", "b", "c", "d"]
+        seq_b = ["a", "x", "y", "z", "d", "e", "f"]
+        
+        differ = MyersDiff(seq_a, seq_b)
+        
+        assert differ.get_opcodes() == [
+            ("equal", 0, 1, 0, 1),
+            ("replace", 1, 3, 1, 4),
+            ("equal", 3, 4, 4, 5),
+            ("insert", 4, 4, 5, 7),
+        ]
+        assert [r.type for r in differ.compute()] == [
+            DiffType.EQUAL, DiffType.REPLACE, DiffType.EQUAL, DiffType.INSERT
+        ]
+    
+    def test_results_view_source_lines(self):
+        """Test results reference the inputs through lazy read-only views."""
+        seq_a = ["a", "b", "c", "d"]
+        seq_b = ["a", "b", "x", "d"]
+        
+        results = myers_diff(seq_a, seq_b)
+        equal = results[0]
+        
+        assert isinstance(equal.old_lines, LineView)
+        assert equal.old_lines == ["a", "b"]
+        assert equal.old_lines[-1] == "b"
+        assert equal.old_lines[:1] == ["a"]
+        assert "b" in equal.new_lines
+        with pytest.raises(TypeError):
+            equal.old_lines[0] = "z"
+        
+        explicit = DiffResult(DiffType.INSERT, 0, 0, 0, 1, old_lines=[], new_lines=["n"])
+        assert explicit.new_lines == ["n"]
+        assert not hasattr(explicit, "__dict__")
+    
+    def test_linear_matches_greedy(self):
+        """Test the linear-space engine finds edit scripts of the same length."""
+        rng = random.Random(42)
+        for _ in range(200):
+            seq_a = [str(rng.randint(0, 4)) for _ in range(rng.randint(0, 25))]
+            seq_b = [str(rng.randint(0, 4)) for _ in range(rng.randint(0, 25))]
+            
+            greedy = MyersDiff(seq_a, seq_b, algorithm="greedy").compute()
+            linear = MyersDiff(seq_a, seq_b, algorithm="linear").compute()
+            
+            assert edit_cost(linear) == edit_cost(greedy)
+            assert [line for r in linear for line in r.old_lines] == seq_a
+            assert [line for r in linear for line in r.new_lines] == seq_b
+    
+    def test_linear_default_above_threshold(self):
+        """Test the linear engine is picked automatically for large inputs."""
+        small = MyersDiff(["a"], ["b"])
+        assert small.algorithm == "bitparallel"
+        
+        size = MyersDiff.LINEAR_SPACE_THRESHOLD // 2 + 1
+        large = MyersDiff(["x"] * size, ["x"] * size)
+        assert large.algorithm == "linear"
+    
+    def test_line_interning(self):
+        """Test lines are interned and one-sided lines never match."""
+        differ = MyersDiff(["a", "b", "a", "only_a"], ["b", "a", "only_b"])
+        
+        assert differ.ids_a[0] == differ.ids_a[2] == differ.ids_b[1]
+        assert differ.ids_a[1] == differ.ids_b[0]
+        assert differ.ids_a[3] != differ.ids_b[2]
+        assert differ.ids_a[3] < 0 and differ.ids_b[2] < 0
+    
+    def test_distance(self):
+        """Test distance() matches the cost of the computed edit script."""
+        rng = random.Random(9)
+        for _ in range(200):
+            seq_a = [str(rng.randint(0, 4)) for _ in range(rng.randint(0, 30))]
+            seq_b = [str(rng.randint(0, 4)) for _ in range(rng.randint(0, 30))]
+            
+            expected = edit_cost(myers_diff(seq_a, seq_b))
+            
+            assert MyersDiff(seq_a, seq_b).distance() == expected
+            assert MyersDiff(seq_a, seq_b).distance(expected) == expected
+            if expected:
+                assert MyersDiff(seq_a, seq_b).distance(expected - 1) is None
+    
+    def test_distance_beyond_bit_parallel_limit(self):
+        """Test long sequences fall back to the frontier search."""
+        seq_a = [str(i) for i in range(BIT_PARALLEL_LIMIT + 100)]
+        seq_b = seq_a[:50] + ["x"] + seq_a[60:-5] + ["y", "z"]
+        
+        assert MyersDiff(seq_a, seq_b).distance() == 18
+        assert MyersDiff(seq_a, seq_b).distance(17) is None
+    
+    def test_unknown_algorithm(self):
+        """Test an unsupported algorithm name is rejected."""
+        with pytest.raises(ValueError):
+            MyersDiff(["a"], ["b"], algorithm="quantum")
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
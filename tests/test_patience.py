@@ -0,0 +1,59 @@
+"""
+Test Patience Algorithm
+======================
+
+Unit tests for the patience diff implementation.
+"""
+
+import random
+
+import pytest
+from core.myers_algorithm import DiffType
+from core.patience_algorithm import PatienceDiff, patience_diff, unique_anchors
+from core.diff_engine import DiffEngine
+
+
+class TestPatienceDiff:
+    """Test patience diff algorithm."""
+    
+    def test_unique_anchors(self):
+        """Test anchors are unique on both sides and in increasing order."""
+        ids_a = [1, 2, 3, 4, 2]
+        ids_b = [3, 1, 4, 5]
+        
+        # 2 is duplicated in A, 1 and 3 cross, so the chain is 3 -> 4
+        assert unique_anchors(ids_a, ids_b, 0, 5, 0, 4) == [(2, 0), (3, 2)]
+    
+    def test_reconstructs_sequences(self):
+        """Test patience results cover both inputs in order."""
+        rng = random.Random(7)
+        for _ in range(200):
+            seq_a = [str(rng.randint(0, 6)) for _ in range(rng.randint(0, 25))]
+            seq_b = [str(rng.randint(0, 6)) for _ in range(rng.randint(0, 25))]
+            
+            results = patience_diff(seq_a, seq_b)
+            
+            assert [line for r in results for line in r.old_lines] == seq_a
+            assert [line for r in results for line in r.new_lines] == seq_b
+    
+    def test_anchors_on_unique_lines(self):
+        """Test a unique line is matched in preference to a blank line."""
+        seq_a = ["first()", "unique()", ""]
+        seq_b = ["", "", "unique()"]
+        
+        def matched(results):
+            return [line for r in results if r.type == DiffType.EQUAL for line in r.old_lines]
+        
+        assert matched(patience_diff(seq_a, seq_b)) == ["unique()"]
+    
+    def test_engine_option(self):
+        """Test DiffEngine selects patience through its options."""
+        engine = DiffEngine(options={"algorithm": "patience"})
+        assert isinstance(engine._create_differ(["a"], ["b"]), PatienceDiff)
+        
+        with pytest.raises(ValueError):
+            DiffEngine(options={"algorithm": "bogus"}).compare_lines(["a"], ["b"])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
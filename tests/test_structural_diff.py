@@ -0,0 +1,109 @@
+"""
+Test Structural Diff
+====================
+
+Unit tests for path-addressed JSON and YAML comparison.
+"""
+
+import io
+import json
+
+import pytest
+from core.file_handler import FileHandler
+from core.myers_algorithm import DiffType
+from core.structural_diff import StructuralDiffer, load_document
+
+
+def _changes(doc_a, doc_b, id_field=None):
+    """Compare and reduce the changes to (type, path) tuples."""
+    return [(c.type, c.path) for c in StructuralDiffer(id_field).compare(doc_a, doc_b)]
+
+
+class TestStructuralDiffer:
+    """Test alignment and change paths."""
+
+    def test_key_order_and_equal_subtrees(self):
+        """Test reordered keys are not changes."""
+        doc_a = {"a": 1, "b": {"c": [1, 2], "d": None}}
+        doc_b = {"b": {"d": None, "c": [1, 2]}, "a": 1}
+
+        assert _changes(doc_a, doc_b) == []
+
+    def test_object_changes(self):
+        """Test added, removed and changed keys are reported by path."""
+        doc_a = {"name": "x", "config": {"port": 80, "debug key": True}}
+        doc_b = {"name": "x", "config": {"port": 8080}, "tags": []}
+
+        changes = StructuralDiffer().compare(doc_a, doc_b)
+
+        assert [(c.type, c.path) for c in changes] == [
+            (DiffType.REPLACE, '$.config.port'),
+            (DiffType.DELETE, '$.config["debug key"]'),
+            (DiffType.INSERT, '$.tags'),
+        ]
+        assert (changes[0].old_value, changes[0].new_value) == (80, 8080)
+
+    def test_scalar_types_differ(self):
+        """Test values of different types are changes even if equal in Python."""
+        assert _changes({"a": 1, "b": 1}, {"a": True, "b": 1.0}) == [
+            (DiffType.REPLACE, '$.a'), (DiffType.REPLACE, '$.b')]
+
+    def test_arrays_aligned_by_content(self):
+        """Test array insertions do not shift every following element."""
+        doc_a = [{"v": 1}, {"v": 2}, {"v": 3}]
+        doc_b = [{"v": 0}, {"v": 1}, {"v": 2}, {"v": 30}]
+
+        assert _changes(doc_a, doc_b) == [
+            (DiffType.INSERT, '$[0]'), (DiffType.REPLACE, '$[2].v')]
+
+    def test_arrays_aligned_by_identity(self):
+        """Test objects are matched by the identity field regardless of order."""
+        doc_a = {"users": [{"id": 1, "mail": "a"}, {"id": 2, "mail": "b"}]}
+        doc_b = {"users": [{"id": 3, "mail": "c"}, {"id": 2, "mail": "B"},
+                           {"id": 1, "mail": "a"}]}
+
+        assert _changes(doc_a, doc_b, id_field="id") == [
+            (DiffType.REPLACE, '$.users[id=2].mail'),
+            (DiffType.INSERT, '$.users[id=3]'),
+        ]
+
+
+class TestLoadDocument:
+    """Test incremental parsing."""
+
+    def test_top_level_array_across_chunks(self, monkeypatch):
+        """Test array elements split across reads are decoded whole."""
+        monkeypatch.setattr('core.structural_diff.CHUNK_SIZE', 4)
+        text = '[ 12345, {"a": "long string value"} ,\n[true, null], -1.5e3 ]  '
+
+        assert load_document(io.StringIO(text)) == json.loads(text)
+
+    def test_malformed_json(self):
+        """Test malformed documents raise ValueError."""
+        with pytest.raises(ValueError):
+            load_document(io.StringIO('[1, 2 3]'))
+        with pytest.raises(ValueError):
+            load_document(io.StringIO('{"a": 1} x'))
+
+    def test_yaml_and_json_lines(self):
+        """Test YAML streams and JSON Lines load as documents."""
+        assert load_document(io.StringIO("a: 1\nb: [x, y]\n"), 'yaml') == {"a": 1, "b": ["x", "y"]}
+        assert load_document(io.StringIO("a: 1\n---\na: 2\n"), 'yaml') == [{"a": 1}, {"a": 2}]
+        assert load_document(io.StringIO('{"a": 1}\n\n[2]\n'), 'jsonl') == [{"a": 1}, [2]]
+
+    def test_file_handler_selects_format(self, tmp_path):
+        """Test the file handler parses documents by file type."""
+        path = tmp_path / "config.yml"
+        path.write_text("port: 80\n", encoding='utf-8')
+        handler = FileHandler()
+
+        document, info = handler.read_document(str(path))
+
+        assert handler.document_format(str(path)) == 'yaml'
+        assert handler.document_format("notes.txt") is None
+        assert document == {"port": 80}
+        assert info.size == 9
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
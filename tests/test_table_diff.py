@@ -0,0 +1,87 @@
+"""
+Test Table Diff
+===============
+
+Unit tests for the keyed CSV comparison.
+"""
+
+import pytest
+from core.myers_algorithm import DiffType
+from core.table_diff import TableDiffer
+
+
+def _write(path, text):
+    """Write a CSV file and return its path."""
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def tables(tmp_path):
+    """Old and new versions of a table with shuffled rows."""
+    old = _write(tmp_path / "old.csv", "id,day,name,qty\n1,mon,a,5\n2,mon,b,6\n1,tue,a,7\n")
+    new = _write(tmp_path / "new.csv", "id,day,name,qty\n1,tue,a,8\n3,mon,c,1\n1,mon,a,5\n")
+    return old, new
+
+
+class TestTableDiffer:
+    """Test row matching and change reporting."""
+
+    def test_rows_matched_by_composite_key(self, tables):
+        """Test row order is ignored and changes are reported per column."""
+        result = TableDiffer(["id", "day"]).compare_files(*tables)
+
+        assert [c.key for c in result.removed] == [("2", "mon")]
+        assert [c.key for c in result.added] == [("3", "mon")]
+        assert len(result.changed) == 1
+        change = result.changed[0]
+        assert (change.key, change.old_row, change.new_row) == (("1", "tue"), 3, 1)
+        assert change.columns == {"qty": ("7", "8")}
+        assert result.added[0].values == {"id": "3", "day": "mon", "name": "c", "qty": "1"}
+
+    def test_spilled_join_matches_in_memory_join(self, tmp_path):
+        """Test partitioning through spill files gives the same result."""
+        old_rows = [f"{i},{i % 3},v{i}" for i in range(500)]
+        new_rows = [f"{i},{i % 3},v{i}" for i in range(499, 0, -1) if i != 7]
+        new_rows[10] = "489,0,changed"
+        new_rows.append("1000,1,new")
+        old = _write(tmp_path / "old.csv", "k,g,v\n" + "\n".join(old_rows) + "\n")
+        new = _write(tmp_path / "new.csv", "k,g,v\n" + "\n".join(new_rows) + "\n")
+
+        in_memory = TableDiffer(["k"]).compare_files(old, new)
+        spilled = TableDiffer(["k"], memory_budget=4096).compare_files(old, new)
+
+        assert in_memory.partitions == 0 and spilled.partitions > 1
+        for result in (in_memory, spilled):
+            assert [c.key for c in result.removed] == [("0",), ("7",)]
+            assert [c.key for c in result.added] == [("1000",)]
+            assert [(c.key, c.columns) for c in result.changed] == [
+                (("489",), {"v": ("v489", "changed")})]
+            assert (result.rows_a, result.rows_b) == (500, 499)
+
+    def test_column_changes_and_diff_results(self, tmp_path):
+        """Test columns of one file only are listed and not compared."""
+        old = _write(tmp_path / "old.csv", "id,a,b\n1,x,y\n")
+        new = _write(tmp_path / "new.csv", "id,b,c\n1,Y,z\n")
+
+        result = TableDiffer(["id"]).compare_files(old, new)
+
+        assert (result.added_columns, result.removed_columns) == (["c"], ["a"])
+        assert [(r.type, r.old_start, list(r.old_lines), list(r.new_lines))
+                for r in result.diff_results()] == [(DiffType.REPLACE, 1, ["1: b=y"], ["1: b=Y"])]
+
+    def test_invalid_tables(self, tmp_path):
+        """Test missing key columns and duplicate keys are rejected."""
+        good = _write(tmp_path / "good.csv", "id,v\n1,a\n")
+        duplicate = _write(tmp_path / "dup.csv", "id,v\n1,a\n1,b\n")
+
+        with pytest.raises(ValueError):
+            TableDiffer(["name"]).compare_files(good, good)
+        with pytest.raises(ValueError):
+            TableDiffer(["id"]).compare_files(duplicate, good)
+        with pytest.raises(ValueError):
+            TableDiffer([])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
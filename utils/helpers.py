@@ -47,6 +47,10 @@ def calculate_similarity(str1: str, str2: str) -> float:
     """
     Calculate similarity between two strings (0.0 to 1.0).
     
+    The score is 2 * LCS / (len(str1) + len(str2)) over characters, for
+    strings of any length. The LCS is computed a machine word at a time,
+    in O(len(str1) * len(str2) / 64) after trimming the common ends.
+    
     Args:
         str1: First string
         str2: Second string
@@ -60,9 +64,16 @@ def calculate_similarity(str1: str, str2: str) -> float:
     if not str1 or not str2:
         return 0.0
     
-    # Simple Levenshtein distance ratio
-    from difflib import SequenceMatcher
-    return SequenceMatcher(None, str1, str2).ratio()
+    from os.path import commonprefix
+    from core.bit_parallel import lcs_length
+    total = len(str1) + len(str2)
+    prefix = len(commonprefix([str1, str2]))
+    str1, str2 = str1[prefix:], str2[prefix:]
+    suffix = len(commonprefix([str1[::-1], str2[::-1]]))
+    common = prefix + suffix
+    if suffix:
+        str1, str2 = str1[:-suffix], str2[:-suffix]
+    return 2.0 * (common + lcs_length(str1, str2)) / total
 
 
 def truncate_string(text: str, max_length: int = 50, suffix: str = "...") -> str:
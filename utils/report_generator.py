@@ -5,11 +5,14 @@ Report Generator - HTML and PDF Report Generation
 Generates comparison reports in various formats.
 """
 
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from datetime import datetime
+import json
 import os
 
 from core.myers_algorithm import DiffResult, DiffType
+from core.structural_diff import StructuralChange
+from core.table_diff import TableResult
 
 
 class ReportGenerator:
@@ -184,6 +187,11 @@ class ReportGenerator:
             border-left: 3px solid #ffc107;
         }}
         
+        .line-moved {{
+            background: #d1ecf1;
+            border-left: 3px solid #17a2b8;
+        }}
+        
         .section-title {{
             font-size: 18px;
             font-weight: bold;
@@ -261,7 +269,8 @@ class ReportGenerator:
                 DiffType.EQUAL: 'line-equal',
                 DiffType.INSERT: 'line-added',
                 DiffType.DELETE: 'line-deleted',
-                DiffType.REPLACE: 'line-modified'
+                DiffType.REPLACE: 'line-modified',
+                DiffType.MOVED: 'line-moved'
             }[result.type]
             
             if result.type == DiffType.EQUAL:
@@ -348,6 +357,9 @@ class ReportGenerator:
             if result.type != DiffType.EQUAL:
                 lines.append(f"Difference #{i+1}: {result.type.value}")
                 lines.append(f"  Location: Line {result.old_start+1}")
+                if result.type == DiffType.MOVED and result.move_link is not None:
+                    direction = "to" if result.old_count else "from"
+                    lines.append(f"  Moved {direction}: Line {result.move_link+1}")
                 if result.old_lines:
                     lines.append("  OLD: " + ", ".join(result.old_lines[:3]))
                 if result.new_lines:
@@ -356,6 +368,165 @@ class ReportGenerator:
         
         return "\n".join(lines)
 
+    
+    def generate_structural_text(self, file1: str, file2: str,
+                                 changes: List[StructuralChange]) -> str:
+        """
+        Generate plain text report of a structural comparison.
+        
+        Args:
+            file1: First file path
+            file2: Second file path
+            changes: Path-addressed changes
+            
+        Returns:
+            Report as string, one "+ path", "- path" or "~ path" line
+            per change
+        """
+        lines = []
+        lines.append("=" * 70)
+        lines.append(f"STRUCTURAL COMPARISON REPORT")
+        lines.append("=" * 70)
+        lines.append(f"Generated: {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append(f"File 1: {file1}")
+        lines.append(f"File 2: {file2}")
+        lines.append("")
+        lines.append(f"Total Differences: {len(changes)}")
+        lines.append("")
+        
+        for change in changes:
+            if change.type == DiffType.INSERT:
+                lines.append(f"+ {change.path}: {self._format_value(change.new_value)}")
+            elif change.type == DiffType.DELETE:
+                lines.append(f"- {change.path}: {self._format_value(change.old_value)}")
+            else:
+                lines.append(f"~ {change.path}: {self._format_value(change.old_value)} -> "
+                             f"{self._format_value(change.new_value)}")
+        
+        return "\n".join(lines)
+    
+    def generate_structural_html(self, file1: str, file2: str,
+                                 changes: List[StructuralChange],
+                                 output_path: str) -> None:
+        """
+        Generate HTML report of a structural comparison.
+        
+        Args:
+            file1: First file path
+            file2: Second file path
+            changes: Path-addressed changes
+            output_path: Output file path
+        """
+        added = len([c for c in changes if c.type == DiffType.INSERT])
+        deleted = len([c for c in changes if c.type == DiffType.DELETE])
+        summary = (f"{len(changes)} difference(s): {added} added, {deleted} removed, "
+                   f"{len(changes) - added - deleted} changed")
+        
+        rows = []
+        for change in changes:
+            old = '' if change.type == DiffType.INSERT else self._format_value(change.old_value)
+            new = '' if change.type == DiffType.DELETE else self._format_value(change.new_value)
+            rows.append((change.type, [change.path, old, new]))
+        
+        html = self._build_change_table(file1, file2, summary, ['Path', 'Old', 'New'], rows)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+    
+    def generate_table_html(self, file1: str, file2: str, result: TableResult,
+                            output_path: str) -> None:
+        """
+        Generate HTML report of a keyed table comparison.
+        
+        Args:
+            file1: First file path
+            file2: Second file path
+            result: Table comparison result
+            output_path: Output file path
+        """
+        rows = []
+        for change in result.changed:
+            for name, (old, new) in change.columns.items():
+                rows.append((change.type, [', '.join(change.key), name, old, new]))
+        for change in result.removed:
+            rows.append((change.type, [', '.join(change.key), '',
+                                       ', '.join(change.values.values()), '']))
+        for change in result.added:
+            rows.append((change.type, [', '.join(change.key), '', '',
+                                       ', '.join(change.values.values())]))
+        
+        key = ', '.join(result.key_columns)
+        html = self._build_change_table(file1, file2, result.format_summary(),
+                                        [key, 'Column', 'Old', 'New'], rows)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+    
+    def _build_change_table(self, file1: str, file2: str, summary: str,
+                            headings: List[str],
+                            rows: List[Tuple[DiffType, List[str]]]) -> str:
+        """
+        Build an HTML page with one table row per change.
+        
+        Args:
+            file1: First file path
+            file2: Second file path
+            summary: Summary line shown above the table
+            headings: Column headings
+            rows: (change type, cells) per row; the first cell is shown bold
+            
+        Returns:
+            HTML content
+        """
+        css_class = {
+            DiffType.INSERT: 'line-added',
+            DiffType.DELETE: 'line-deleted',
+            DiffType.REPLACE: 'line-modified',
+        }
+        heading_cells = ''.join(f"<th>{self._escape_html(h)}</th>" for h in headings)
+        table_rows = []
+        for change_type, cells in rows:
+            first, rest = cells[0], cells[1:]
+            rest_cells = ''.join(f"<td>{self._escape_html(cell)}</td>" for cell in rest)
+            table_rows.append(f"""
+            <tr class="{css_class[change_type]}"><td class="key">{self._escape_html(first)}</td>{rest_cells}</tr>""")
+        
+        return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>{self._escape_html(self.title)}</title>
+    <style>
+        body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #f5f5f5; padding: 20px; }}
+        .container {{ max-width: 1400px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; }}
+        h1 {{ color: #2c3e50; }}
+        table {{ width: 100%; border-collapse: collapse; font-family: 'Consolas', 'Monaco', monospace; font-size: 14px; }}
+        th, td {{ text-align: left; padding: 5px; vertical-align: top; white-space: pre-wrap; word-break: break-all; }}
+        th {{ background: #ecf0f1; }}
+        .key {{ font-weight: bold; }}
+        .line-added {{ background: #d4edda; }}
+        .line-deleted {{ background: #f8d7da; }}
+        .line-modified {{ background: #fff3cd; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>{self._escape_html(self.title)}</h1>
+        <p>Generated on {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}</p>
+        <p><strong>File 1:</strong> {self._escape_html(os.path.basename(file1))}
+           <strong>File 2:</strong> {self._escape_html(os.path.basename(file2))}</p>
+        <p>{self._escape_html(summary)}</p>
+        <table>
+            <tr>{heading_cells}</tr>{"".join(table_rows)}
+        </table>
+    </div>
+</body>
+</html>
+"""
+    
+    def _format_value(self, value: Any, limit: int = 200) -> str:
+        """Format a document value compactly, truncated to limit characters."""
+        text = json.dumps(value, ensure_ascii=False, default=str)
+        return text if len(text) <= limit else text[:limit - 3] + "..."
+
 
 def create_html_report(file1: str, file2: str,
                       lines1: List[str], lines2: List[str],